@@ -75,30 +75,80 @@ export default function Home() {
     }
   };
 
+  const updateLastAssistant = (content: string) => {
+    setChatHistory((prev) => {
+      const next = [...prev];
+      next[next.length - 1] = { role: "assistant", content };
+      return next;
+    });
+  };
+
   const handleChat = async () => {
     if (!userQuery.trim()) return;
+    const query = userQuery;
     setLoading(true);
     setError("");
+    setUserQuery("");
+    setChatHistory((prev) => [
+      ...prev,
+      { role: "user", content: query },
+      { role: "assistant", content: "" },
+    ]);
     try {
-      const response = await axios.post(
-        `${API_URL}/chat/`,
-        { user_id: formData.user_id, query: userQuery },
-        { headers: { "Content-Type": "application/json" } }
-      );
-      console.log("Chat response received:", response.data);
-      setChatHistory((prev) => [
-        ...prev,
-        { role: "user", content: userQuery },
-        { role: "assistant", content: response.data.response },
-      ]);
-      setUserQuery("");
+      const response = await fetch(`${API_URL}/chat/stream/`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ user_id: formData.user_id, query }),
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat request failed with status ${response.status}`);
+      }
+
+      // Tokens render as a live draft until the first formatted section
+      // arrives; the final "done" frame carries the authoritative response.
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let draft = "";
+      const sections: string[] = [];
+
+      const handleFrame = (frame: string) => {
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        }
+        if (!data) return;
+        const payload = JSON.parse(data);
+        if (event === "token") {
+          draft += payload.text;
+          if (sections.length === 0) updateLastAssistant(draft);
+        } else if (event === "section") {
+          sections.push(payload.content);
+          updateLastAssistant(sections.join("\n\n"));
+        } else if (event === "done") {
+          updateLastAssistant(payload.response);
+        } else if (event === "error") {
+          throw new Error(payload.detail);
+        }
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          handleFrame(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+        }
+      }
     } catch (error) {
-      const axiosError = error as AxiosError;
       setError("Failed to get response. Please try again.");
-      console.error(
-        "Error chatting:",
-        axiosError.response?.data || axiosError
-      );
+      console.error("Error chatting:", error);
+      setChatHistory((prev) => prev.slice(0, -1));
     } finally {
       setLoading(false);
     }
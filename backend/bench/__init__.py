@@ -0,0 +1 @@
+"""Benchmark harness: `python -m bench.run` from the backend directory."""
@@ -0,0 +1,191 @@
+"""Recorded stand-ins for Gemini, the vector index, TheMealDB and DuckDuckGo.
+
+Each one replays fixtures from `fixtures/recorded.json` after an injected
+delay, so a benchmark exercises the real graph, tools and caches without
+network access or API quota.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage
+
+from src.intent import classify
+from src.telemetry import record_llm_call
+
+class Latency:
+    """Fixed delay plus uniform jitter (as a fraction of the delay), in seconds."""
+
+    def __init__(self, seconds: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        spread = self.seconds * self.jitter
+        return max(0.0, self.seconds + self._random.uniform(-spread, spread))
+
+    def wait(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+    async def await_(self) -> None:
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+def _last_user_text(messages: Any) -> str:
+    if isinstance(messages, str):
+        return messages
+    for message in reversed(list(messages)):
+        if getattr(message, "type", "") == "human":
+            return message.content
+    return ""
+
+def _prompt_text(messages: Any) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(getattr(message, "content", message)) for message in messages)
+
+class RecordedChatModel:
+    """Chat model that answers from recorded fixtures.
+
+    With tools bound it returns a recorded tool call chosen by keywords in the
+    user's message (or plain chat text); unbound, it returns the first
+    recorded completion whose marker appears in the prompt.
+    """
+
+    def __init__(self, fixtures: Dict[str, Any], latency: Latency, tools_bound: bool = False):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.tools_bound = tools_bound
+        self._calls = 0
+
+    def bind_tools(self, tools: List[Any], **kwargs) -> "RecordedChatModel":
+        return RecordedChatModel(self.fixtures, self.latency, tools_bound=True)
+
+    def _respond(self, messages: Any) -> AIMessage:
+        usage = self.fixtures["usage"]
+        record_llm_call("ok", usage["input_tokens"], usage["output_tokens"])
+        if self.tools_bound:
+            query = _last_user_text(messages)
+            lowered = query.lower()
+            for rule in self.fixtures["tool_selection"]:
+                if any(marker in lowered for marker in rule["match"]):
+                    self._calls += 1
+                    if rule.get("dish"):
+                        args = {rule["arg"]: classify(query)["dish"] or query}
+                    else:
+                        args = dict(rule["args"])
+                    return AIMessage(content="", tool_calls=[
+                        {"name": rule["tool"], "args": args, "id": f"call_{self._calls}"}
+                    ])
+            return AIMessage(content=self.fixtures["chat"])
+        prompt = _prompt_text(messages)
+        for completion in self.fixtures["completions"]:
+            if completion["match"] in prompt:
+                return AIMessage(content=completion["text"])
+        return AIMessage(content=self.fixtures["chat"])
+
+    def invoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        self.latency.wait()
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        await self.latency.await_()
+        return self._respond(messages)
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from a hash of the text."""
+
+    def __init__(self, latency: Latency, dimension: int = 768):
+        self.latency = latency
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency.wait()
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.latency.wait()
+        return [self._vector(text) for text in texts]
+
+class DelayedIndex:
+    """Adds per-call latency in front of a vector index (e.g. `LocalVectorIndex`)."""
+
+    def __init__(self, index: Any, latency: Latency):
+        self.index = index
+        self.latency = latency
+
+    def upsert(self, *args, **kwargs):
+        self.latency.wait()
+        return self.index.upsert(*args, **kwargs)
+
+    def fetch(self, *args, **kwargs):
+        self.latency.wait()
+        return self.index.fetch(*args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        self.latency.wait()
+        return self.index.query(*args, **kwargs)
+
+class RecordedResponse:
+    def __init__(self, payload: Dict[str, Any], status_code: int = 200):
+        self.status_code = status_code
+        self.headers: Dict[str, str] = {}
+        self._payload = payload
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        pass
+
+class RecordedMealDBSession:
+    """Stands in for `HTTP_CLIENT.session`, answering TheMealDB name searches."""
+
+    def __init__(self, meals: List[dict], latency: Latency):
+        self.meals = meals
+        self.latency = latency
+
+    def request(self, method: str, url: str, **kwargs) -> RecordedResponse:
+        self.latency.wait()
+        parts = urlsplit(url)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        params.update(kwargs.get("params") or {})
+        term = (params.get("s") or "").lower()
+        letter = (params.get("f") or "").lower()
+        found = [
+            meal for meal in self.meals
+            if (term and term in meal["strMeal"].lower()) or (letter and meal["strMeal"].lower().startswith(letter))
+        ]
+        return RecordedResponse({"meals": found or None})
+
+class RecordedSearch:
+    """Stands in for the DuckDuckGo search tool."""
+
+    def __init__(self, text: str, latency: Latency):
+        self.text = text
+        self.latency = latency
+
+    def invoke(self, query: str) -> str:
+        self.latency.wait()
+        return self.text
+
+def load_fixtures(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,73 @@
+"""Microbenchmark of the per-turn prompt preparation in llm_node.
+
+    python -m bench.llm_node --turns 2000
+
+Compares building the chat prompt and the tool schemas on every turn (what
+llm_node did before both were built once) with formatting the shared PROMPT.
+The schemas are converted with langchain_core's `convert_to_openai_tool`, the
+same conversion `bind_tools` runs for Gemini. No model is called.
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=8, help="earlier messages in each turn's prompt")
+    return parser.parse_args(argv)
+
+def time_per_turn(fn: Callable[[], Any], turns: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "mean_us": round(statistics.mean(samples) * 1e6, 1),
+        "p50_us": round(statistics.median(samples) * 1e6, 1),
+    }
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from bench.run import configure_environment
+    configure_environment(tempfile.mkdtemp(prefix="dietbot-bench-"))
+
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    from src.nodes import llm
+    from src.tools import TOOLS
+
+    variables = {field: "x" for field in llm.REQUIRED_FIELDS}
+    variables.update(
+        user_query="give me a recipe for lasagna",
+        conversation_summary="user: asked about protein",
+        retrieved_context="",
+        history=[("user" if i % 2 == 0 else "assistant", f"message {i}") for i in range(args.history)],
+    )
+    # The same system messages as llm.PROMPT, parsed again each turn.
+    system = [("system", message.prompt.template) for message in llm.PROMPT.messages[:-2]]
+
+    def per_turn() -> None:
+        prompt = ChatPromptTemplate.from_messages(system + [MessagesPlaceholder("history"), ("user", "{user_query}")])
+        [convert_to_openai_tool(tool) for tool in TOOLS]
+        prompt.format_messages(**variables)
+
+    def compiled() -> None:
+        llm.PROMPT.format_messages(**variables)
+
+    before = time_per_turn(per_turn, args.turns)
+    after = time_per_turn(compiled, args.turns)
+    return {
+        "turns": args.turns,
+        "tools": len(TOOLS),
+        "rebuilt_each_turn": before,
+        "compiled_once": after,
+        "speedup": round(before["mean_us"] / after["mean_us"], 1),
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(parse_args(sys.argv[1:])), indent=2))
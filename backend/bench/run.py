@@ -0,0 +1,195 @@
+"""End-to-end benchmark of the FastAPI app against recorded stand-ins.
+
+    python -m bench.run --requests 200 --concurrency 16 --out bench-results.json
+
+Runs from the backend directory. The app is driven in-process over ASGI, so
+the numbers cover routing, the graph, tools, caches and persistence, with
+Gemini, the vector index, TheMealDB and DuckDuckGo replaced by fixtures that
+answer after the configured latency.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "recorded.json")
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--users", type=int, default=20, help="profiles submitted before the chat phase")
+    parser.add_argument("--requests", type=int, default=200, help="chat requests to send")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per chat model call")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="seconds per embedding call")
+    parser.add_argument("--index-latency", type=float, default=0.05, help="seconds per vector index call")
+    parser.add_argument("--http-latency", type=float, default=0.3, help="seconds per TheMealDB call")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="seconds per web search")
+    parser.add_argument("--jitter", type=float, default=0.2, help="uniform jitter as a fraction of each latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+def configure_environment(workdir: str) -> None:
+    # Must run before any src module is imported: config reads these at import.
+    os.environ.update({
+        "VECTOR_STORE": "local",
+        "VECTOR_STORE_PATH": os.path.join(workdir, "vectors"),
+        "RECIPE_DB_PATH": os.path.join(workdir, "recipes.db"),
+        "MEAL_PLAN_DB_PATH": os.path.join(workdir, "meal_plans.db"),
+        "EMBEDDING_CACHE_DB_PATH": "",
+        "CONVERSATION_BACKEND": "memory",
+    })
+
+def install_fakes(fixtures: Dict[str, Any], args: argparse.Namespace, workdir: str) -> None:
+    from bench.fakes import (
+        DelayedIndex,
+        HashEmbeddings,
+        Latency,
+        RecordedChatModel,
+        RecordedMealDBSession,
+        RecordedSearch,
+    )
+    from src import config
+    from src.embedding_cache import CachedEmbeddings
+    from src.scheduler import scheduled_embeddings, scheduled_llm
+    from src.tools import http_client
+    from src.vector_store import LocalVectorIndex
+
+    def latency(seconds: float, offset: int) -> Latency:
+        return Latency(seconds, args.jitter, seed=args.seed + offset)
+
+    config.override_clients(
+        llm=scheduled_llm(RecordedChatModel(fixtures["llm"], latency(args.llm_latency, 1))),
+        embedder=CachedEmbeddings(
+            scheduled_embeddings(HashEmbeddings(latency(args.embed_latency, 2))),
+            config.EMBEDDING_MODEL,
+            max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+        ),
+        vector_index=DelayedIndex(LocalVectorIndex(os.path.join(workdir, "vectors")), latency(args.index_latency, 3)),
+    )
+    http_client.HTTP_CLIENT.session = RecordedMealDBSession(fixtures["mealdb"]["meals"], latency(args.http_latency, 4))
+    http_client._search_tool = RecordedSearch(fixtures["search"], latency(args.search_latency, 5))
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(np.mean(latencies)) * 1000, 1),
+        "p50_ms": round(p50 * 1000, 1),
+        "p95_ms": round(p95 * 1000, 1),
+        "p99_ms": round(p99 * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+async def drive(client, calls: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Send `calls` (`{"url", "json" | "data"}`) with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(call: Dict[str, Any]) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(call["url"], json=call.get("json"), data=call.get("data"))
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(call) for call in calls))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def breakdown(histogram) -> Dict[str, Any]:
+    result = {}
+    for labels, series in sorted(histogram.snapshot().items()):
+        count = series["count"]
+        result["/".join(labels)] = {
+            "calls": count,
+            "mean_ms": round(series["sum"] / count * 1000, 1) if count else 0.0,
+            "total_s": round(series["sum"], 3),
+        }
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("The benchmark needs httpx (pip install httpx).")
+
+    workdir = tempfile.mkdtemp(prefix="dietbot-bench-")
+    configure_environment(workdir)
+    from bench.fakes import load_fixtures
+    fixtures = load_fixtures(args.fixtures)
+    install_fakes(fixtures, args, workdir)
+
+    import main
+    from src.telemetry import NODE_SECONDS, TOOL_SECONDS
+
+    profiles = fixtures["profiles"]
+    queries = fixtures["queries"]
+    users = [f"bench_user_{i}" for i in range(args.users)]
+    submit_calls = [
+        {"url": "/submit-details/", "data": {"user_id": user, **profiles[i % len(profiles)]}}
+        for i, user in enumerate(users)
+    ]
+    chat_calls = [
+        {"url": "/chat/", "json": {"user_id": users[i % len(users)], "query": queries[i % len(queries)]}}
+        for i in range(args.requests)
+    ]
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        submit = await drive(client, submit_calls, args.concurrency)
+        chat = await drive(client, chat_calls, args.concurrency)
+    await asyncio.to_thread(main.TOOL_RESULT_QUEUE.stop, drain=True)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "endpoints": {"submit_details": submit, "chat": chat},
+        "nodes": breakdown(NODE_SECONDS),
+        "tools": breakdown(TOOL_SECONDS),
+        "caches": {
+            "profile": main.PROFILE_CACHE.stats(),
+            "nutrition": main.NUTRITION_CACHE.stats(),
+            "recipe": main.RECIPE_CACHE.stats(),
+            "embedding": main.get_embedder().stats(),
+        },
+        "persistence": main.TOOL_RESULT_QUEUE.stats(),
+        "coalescing": main.TOOL_FLIGHTS.stats(),
+        "scheduler": main.GEMINI_SCHEDULER.stats(),
+    }
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
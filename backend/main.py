@@ -1,9 +1,20 @@
 from fastapi import FastAPI, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
-from src.config import PINECONE_INDEX, EMBEDDER
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from src.batch_plans import generate_plans
+from src.config import BATCH_PLAN_CONCURRENCY, BATCH_PLAN_MAX_PROFILES, MEAL_PLAN_MAX_DAYS, get_embedder, get_vector_index
 from src.state import AgentState
-from src.workflow import build_workflow
+from src.persistence import TOOL_RESULT_QUEUE
+from src.response_cache import NUTRITION_CACHE, RECIPE_CACHE
+from src.scheduler import GEMINI_SCHEDULER
+from src.singleflight import TOOL_FLIGHTS
+from src.profile_store import PROFILE_CACHE, cache_profile, fetch_profile, get_cached_profile, invalidate_profile, load_profile, profile_vector_id
+from src.streaming import sse_event, stream_chat
+from src.telemetry import render_metrics, trace_request
+from src.weekly_plans import create_week, get_week, refresh_week, swap_week_meal
 from pydantic import BaseModel, validator
+from typing import List, Optional
+import asyncio
 import json
 import logging
 from dotenv import load_dotenv
@@ -16,7 +27,15 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
-graph = build_workflow()
+_graph = None
+
+def get_graph():
+    """Compile the agent graph on first use; the import stays cheap for workers and tools."""
+    global _graph
+    if _graph is None:
+        from src.workflow import build_workflow
+        _graph = build_workflow(async_mode=True)
+    return _graph
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,10 +44,48 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+@app.on_event("startup")
+async def compile_graph():
+    # Built per worker process after any fork; model and index clients stay lazy.
+    get_graph()
+
+@app.on_event("shutdown")
+async def drain_persistence_queue():
+    # Flush queued tool results before the worker exits.
+    await asyncio.to_thread(TOOL_RESULT_QUEUE.stop, drain=True)
+
 class ChatRequest(BaseModel):
     user_id: str
     query: str
 
+class BatchProfile(BaseModel):
+    id: Optional[str] = None
+    age: str
+    gender: str
+    height: str
+    weight: str
+    preferences: str = ""
+    restrictions: str = ""
+    goal: str = "maintenance"
+
+    @validator("id", "age", "height", "weight", pre=True)
+    def as_text(cls, value):
+        return value if value is None else str(value)
+
+class BatchPlanRequest(BaseModel):
+    profiles: List[BatchProfile]
+    concurrency: Optional[int] = None
+
+class WeekPlanRequest(BaseModel):
+    user_id: str
+    days: int = 7
+
+class SwapMealRequest(BaseModel):
+    user_id: str
+    day: int
+    slot: str
+
 class UserDetails(BaseModel):
     age: float
     gender: str
@@ -64,15 +121,9 @@ class UserDetails(BaseModel):
         return weight
 
 def get_user_context_from_pinecone(user_id: str) -> dict:
-    """Fetch user profile directly by fixed vector_id."""
+    """Fetch user profile through the profile cache; Pinecone is hit only on a miss."""
     try:
-        response = PINECONE_INDEX.fetch(ids=[f"{user_id}_profile"])
-        logger.debug(f"Pinecone fetch for {user_id}: {response}")
-        vectors = response.vectors
-        if vectors and f"{user_id}_profile" in vectors:
-            return vectors[f"{user_id}_profile"].metadata
-        logger.warning(f"No profile found for user_id: {user_id}")
-        return {}
+        return fetch_profile(user_id)
     except Exception as e:
         logger.error(f"Error fetching user context from Pinecone: {str(e)}")
         return {}
@@ -83,23 +134,25 @@ def store_user_details(user_id: str, details: UserDetails):
         details_dict = details.dict()
 
         profile_text = json.dumps(details_dict)
-        embedding = EMBEDDER.embed_query(profile_text)
-        vector_id = f"{user_id}_profile"
+        embedding = get_embedder().embed_query(profile_text)
+        vector_id = profile_vector_id(user_id)
         metadata = {
             "user_id": user_id,
             "type": "user_profile",
             **details_dict
         }
-        PINECONE_INDEX.upsert(vectors=[(vector_id, embedding, metadata)])
+        invalidate_profile(user_id)
+        get_vector_index().upsert(vectors=[(vector_id, embedding, metadata)])
         logger.info(f"Stored profile for user_id: {user_id}")
 
         # Verify storage
-        verify_response = PINECONE_INDEX.fetch(ids=[vector_id])
+        verify_response = get_vector_index().fetch(ids=[vector_id])
         logger.debug(f"Verification fetch for {user_id}: {verify_response}")
         if not verify_response.vectors or vector_id not in verify_response.vectors:
             logger.error(f"Failed to verify storage for {user_id}")
         else:
             logger.info(f"Verified profile storage for {user_id}: {verify_response.vectors[vector_id].metadata}")
+            cache_profile(user_id, verify_response.vectors[vector_id].metadata)
 
         return {"message": f"Stored details for {user_id}", "user_id": user_id}
     except Exception as e:
@@ -127,40 +180,162 @@ async def submit_details(
             restrictions=restrictions,
             goal=goal
         )
-        result = store_user_details(user_id, details)
+        result = await asyncio.to_thread(store_user_details, user_id, details)
+        try:
+            # Keep a stored multi-day plan in step with the new profile; only affected days change.
+            await asyncio.to_thread(refresh_week, user_id, details.dict())
+        except Exception as e:
+            logger.error(f"Error refreshing meal plan for user_id {user_id}: {str(e)}")
         return {"status": "success", "user_id": user_id}
     except Exception as e:
         logger.error(f"Error in submit-details for user_id {user_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))  # Return the error message
 
+@app.get("/profile-cache/stats")
+async def profile_cache_stats():
+    return PROFILE_CACHE.stats()
+
+@app.get("/response-cache/stats")
+async def response_cache_stats():
+    return {"nutrition": NUTRITION_CACHE.stats(), "recipe": RECIPE_CACHE.stats()}
+
+@app.get("/embedding-cache/stats")
+async def embedding_cache_stats():
+    return get_embedder().stats()
+
+@app.get("/coalescing/stats")
+async def coalescing_stats():
+    return TOOL_FLIGHTS.stats()
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    return GEMINI_SCHEDULER.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, node, tool, LLM, external-call and cache metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/persistence/stats")
+async def persistence_stats():
+    return TOOL_RESULT_QUEUE.stats()
+
+async def _load_user_context(user_id: str) -> dict:
+    user_context = get_cached_profile(user_id)
+    if user_context is None:
+        # Straight to the store: fetch_profile would count a second cache miss.
+        try:
+            user_context = await asyncio.to_thread(load_profile, user_id)
+        except Exception as e:
+            logger.error(f"Error fetching user context from Pinecone: {str(e)}")
+            user_context = {}
+    return user_context
+
+def _initial_state(request: ChatRequest, user_context: dict) -> AgentState:
+    return AgentState(
+        user_id=request.user_id,
+        user_query=request.query,
+        user_context=user_context,  # Pre-populate with fetched data
+        conversation_history=[],
+        tool_calls=[],
+        retrieved_context="",
+        tool_outputs=[],
+        response=""
+    )
+
 @app.post("/chat/")
 async def chat(request: ChatRequest):
+    with trace_request("chat"):
+        try:
+            # Fetch user context from Pinecone
+            user_context = await _load_user_context(request.user_id)
+
+            # Log the user context to check if `age` is available
+            logger.debug(f"User context for {request.user_id}: {user_context}")
+
+            if not user_context:
+                return {"response": "No profile found. Please submit your details first."}
+
+            initial_state = _initial_state(request, user_context)
+
+            # Log the state before invoking workflow
+            logger.debug("Initial state before invoking workflow: %s", initial_state)
+
+            result = await get_graph().ainvoke(initial_state)
+
+            return {"response": result["response"]}
+        except Exception as e:
+            logger.error(f"Error in chat for user_id {request.user_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error processing chat request")
+
+@app.post("/meal-plans/batch/")
+async def batch_meal_plans(request: BatchPlanRequest):
+    """Meal plans for many profiles at once, streamed as NDJSON in completion order."""
+    if len(request.profiles) > BATCH_PLAN_MAX_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_PLAN_MAX_PROFILES} profiles per batch")
+    profiles = [profile.dict() for profile in request.profiles]
+    concurrency = min(request.concurrency or BATCH_PLAN_CONCURRENCY, BATCH_PLAN_CONCURRENCY)
+
+    async def lines():
+        with trace_request("meal_plans_batch"):
+            async for result in generate_plans(profiles, concurrency):
+                yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+async def _require_profile(user_id: str) -> dict:
+    user_context = await _load_user_context(user_id)
+    if not user_context:
+        raise HTTPException(status_code=404, detail="No profile found. Please submit your details first.")
+    return user_context
+
+@app.post("/meal-plans/week/")
+async def create_week_plan(request: WeekPlanRequest):
+    """Plan `days` days (default 7) for the user's profile, replacing any stored plan."""
+    if not 1 <= request.days <= MEAL_PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MEAL_PLAN_MAX_DAYS}")
+    user_context = await _require_profile(request.user_id)
     try:
-        # Fetch user context from Pinecone
-        user_context = get_user_context_from_pinecone(request.user_id)
+        return await asyncio.to_thread(create_week, request.user_id, user_context, request.days)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Unable to generate a meal plan that meets all your dietary requirements: {str(e)}")
 
-        # Log the user context to check if `age` is available
-        logger.debug(f"User context for {request.user_id}: {user_context}")
+@app.get("/meal-plans/week/{user_id}")
+async def read_week_plan(user_id: str):
+    try:
+        plan = await asyncio.to_thread(get_week, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Unable to generate a meal plan that meets all your dietary requirements: {str(e)}")
+    if plan is None:
+        raise HTTPException(status_code=404, detail="No meal plan found")
+    return plan
 
-        if not user_context:
-            return {"response": "No profile found. Please submit your details first."}
-
-        initial_state = AgentState(
-            user_id=request.user_id,
-            user_query=request.query,
-            user_context=user_context,  # Pre-populate with fetched data
-            conversation_history=[],
-            tool_calls=[],
-            tool_outputs=[],
-            response=""
-        )
+@app.post("/meal-plans/week/swap/")
+async def swap_week_plan_meal(request: SwapMealRequest):
+    """Swap one meal of a stored plan; other days are reused as they are."""
+    user_context = await _require_profile(request.user_id)
+    try:
+        return await asyncio.to_thread(swap_week_meal, request.user_id, user_context, request.day, request.slot)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="No meal plan found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # Log the state before invoking workflow
-        logger.debug(f"Initial state before invoking workflow: {initial_state}")
+@app.post("/chat/stream/")
+async def chat_stream(request: ChatRequest):
+    """Server-Sent Events variant of /chat/: token, section, done and error frames."""
+    user_context = await _load_user_context(request.user_id)
 
-        result = graph.invoke(initial_state)
+    async def events():
+        if not user_context:
+            yield sse_event("done", {"response": "No profile found. Please submit your details first."})
+            return
+        with trace_request("chat_stream"):
+            async for frame in stream_chat(get_graph(), _initial_state(request, user_context)):
+                yield frame
 
-        return {"response": result["response"]}
-    except Exception as e:
-        logger.error(f"Error in chat for user_id {request.user_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error processing chat request")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
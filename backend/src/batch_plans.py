@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.compliance import parse_profile
+from src.config import BATCH_PLAN_CONCURRENCY
+from src.scheduler import gemini_lane
+from src.targets import GOALS, daily_calories, parse_profiles
+from src.tools import meal_plan_for
+
+logger = logging.getLogger(__name__)
+
+def group_profiles(profiles: Sequence[dict]) -> Tuple[Dict[tuple, List[int]], Dict[tuple, dict], np.ndarray]:
+    """Group profiles that would get the same plan.
+
+    Returns `{(constraints, goal, calories): [profile positions]}`, the parsed
+    dietary profile for each constraint key, and the daily calorie target of
+    every profile. Constraints compare parsed profiles, so "Vegetarian" and
+    "vegetarian " share a group, and free text is parsed once per distinct pair.
+    """
+    columns = parse_profiles(profiles)
+    calories = np.rint(daily_calories(columns)).astype(int)
+    parsed: Dict[Tuple[str, str], dict] = {}
+    dietary: Dict[tuple, dict] = {}
+    groups: Dict[tuple, List[int]] = {}
+    for position, profile in enumerate(profiles):
+        pair = ((profile.get("preferences") or "").strip() or "none", (profile.get("restrictions") or "").strip() or "none")
+        if pair not in parsed:
+            parsed[pair] = parse_profile(*pair)
+        constraints = (parsed[pair]["diet"], frozenset(parsed[pair]["forbidden"]), parsed[pair]["require_animal"])
+        dietary.setdefault(constraints, parsed[pair])
+        key = (constraints, GOALS[columns["goal"][position]], int(calories[position]))
+        groups.setdefault(key, []).append(position)
+    return groups, dietary, calories
+
+async def generate_plans(profiles: Sequence[dict], concurrency: int = BATCH_PLAN_CONCURRENCY) -> AsyncIterator[dict]:
+    """Yield one result per profile as its plan completes.
+
+    Each group of identical profiles is planned once, with at most
+    `concurrency` groups in flight (plans may call the LLM when
+    MEAL_PLAN_LLM_POLISH is on). Results carry the profile's `id` (or its
+    position) and `status`: ok, no_plan when the constraints can't be met, or
+    error.
+    """
+    groups, dietary, calories = group_profiles(profiles)
+    logger.info(f"Batch meal plans: {len(profiles)} profiles in {len(groups)} groups")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def plan(key: tuple, members: List[int]):
+        constraints, goal, target = key
+        async with semaphore:
+            try:
+                # Polishing calls queue behind interactive chat (see src/scheduler.py).
+                with gemini_lane("batch"):
+                    return members, await asyncio.to_thread(meal_plan_for, float(target), dietary[constraints], goal), None
+            except Exception as e:
+                logger.error(f"Batch meal plan failed for group {key}: {str(e)}")
+                return members, None, str(e)
+
+    tasks = [asyncio.create_task(plan(key, members)) for key, members in groups.items()]
+    try:
+        for done in asyncio.as_completed(tasks):
+            members, result, error = await done
+            for position in members:
+                profile_id = profiles[position].get("id")
+                line = {"id": profile_id if profile_id is not None else str(position), "daily_calories": int(calories[position])}
+                if error is not None:
+                    line.update(status="error", error=error)
+                else:
+                    line.update(result, status="ok" if "meals" in result else "no_plan")
+                yield line
+    finally:
+        # The client went away or the caller stopped early: drop groups not started yet.
+        for task in tasks:
+            task.cancel()
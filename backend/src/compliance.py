@@ -0,0 +1,258 @@
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Ingredient taxonomy. Terms match as whole words with an optional plural "s"/"es".
+TAXONOMY: Dict[str, List[str]] = {
+    "pork": [
+        "pork", "bacon", "ham", "lard", "prosciutto", "pancetta", "chorizo", "salami",
+        "pepperoni", "gammon", "pork belly", "spare rib",
+    ],
+    "beef": ["beef", "steak", "veal", "brisket", "oxtail", "mince", "minced beef", "ground beef"],
+    "lamb": ["lamb", "mutton", "goat", "venison"],
+    "meat": [
+        "chicken", "turkey", "duck", "goose", "rabbit",
+        "sausage", "meatball", "gelatin", "gelatine", "liver", "kidney", "chicken breast",
+        "chicken thigh", "poultry", "meat",
+    ],
+    "fish": [
+        "fish", "salmon", "tuna", "cod", "haddock", "anchovy", "anchovies", "sardine", "mackerel",
+        "trout", "tilapia", "halibut", "sea bass", "snapper", "herring", "pollock", "fish sauce",
+        "worcestershire sauce", "kipper", "monkfish",
+    ],
+    "shellfish": [
+        "prawn", "shrimp", "crab", "lobster", "mussel", "clam", "oyster", "scallop", "squid",
+        "calamari", "octopus", "crayfish", "oyster sauce",
+    ],
+    "dairy": [
+        "milk", "cheese", "butter", "cream", "yogurt", "yoghurt", "curd", "ghee", "paneer",
+        "parmesan", "mozzarella", "cheddar", "ricotta", "mascarpone", "feta", "creme fraiche",
+        "buttermilk", "whey", "custard", "double cream", "single cream", "sour cream",
+        "condensed milk", "evaporated milk", "gruyere", "brie", "halloumi", "raita", "khoya",
+    ],
+    "egg": ["egg", "egg yolk", "egg white", "mayonnaise", "mayo", "meringue"],
+    "gluten": [
+        "wheat", "flour", "plain flour", "bread", "breadcrumb", "pasta", "spaghetti", "penne",
+        "lasagne", "lasagna", "macaroni", "couscous", "barley", "rye", "semolina", "bulgur",
+        "seitan", "tortilla", "pita", "naan", "roti", "paratha", "puff pastry", "pastry",
+        "noodle", "soy sauce", "bagel", "wrap",
+    ],
+    "nuts": [
+        "almond", "walnut", "cashew", "pecan", "pistachio", "hazelnut", "macadamia",
+        "brazil nut", "pine nut", "nut",
+    ],
+    "peanuts": ["peanut", "peanut butter", "groundnut"],
+    "soy": ["soy", "soya", "tofu", "tempeh", "edamame", "soy sauce", "miso", "bean curd"],
+    "honey": ["honey"],
+}
+
+# Categories that are part of a broader one for preference purposes.
+PARENTS = {"pork": "meat", "beef": "meat", "lamb": "meat"}
+ANIMAL = {"meat", "fish", "shellfish"}
+_ALL_MEAT = {"meat", *PARENTS}
+
+# Phrases that contain a taxonomy term without being that thing, with the
+# categories they rule out for the terms inside them. Only those categories
+# are dropped: "almond milk" is not dairy but is still nuts.
+_PLANT_DAIRY = [
+    "coconut milk", "coconut cream", "coconut yogurt", "coconut yoghurt", "almond milk", "soy milk",
+    "soya milk", "oat milk", "rice milk", "cashew milk", "hazelnut milk", "hemp milk", "pea milk",
+    "peanut butter", "almond butter", "cashew butter", "nut butter", "seed butter", "sunflower butter",
+    "cocoa butter", "shea butter", "apple butter", "butter bean", "butternut", "butternut squash",
+    "cream of tartar", "bean curd",
+]
+_GLUTEN_FREE_STARCH = [
+    "buckwheat", "buckwheat flour", "tapioca flour", "rice noodle", "rice flour", "corn flour", "cornflour", "chickpea flour", "gram flour",
+    "almond flour", "coconut flour", "potato flour", "corn tortilla", "zucchini noodle", "courgette noodle",
+]
+EXCEPTIONS: Dict[str, Set[str]] = {
+    **{phrase: {"dairy"} for phrase in _PLANT_DAIRY},
+    **{phrase: {"gluten"} for phrase in _GLUTEN_FREE_STARCH},
+    **{phrase: _ALL_MEAT for phrase in ("goat cheese", "goat's cheese", "goats cheese", "goat milk", "goat's milk", "goats milk", "kidney bean")},
+    "vegetable stock": {"meat", "fish"},
+    "vegetable broth": {"meat", "fish"},
+    "nutmeg": {"nuts"},
+    "eggplant": {"egg"},
+}
+
+# Labels that rule categories out for the next two words ("gluten-free pasta",
+# "vegan butter"). Allergen-free claims other than these are not trusted, and
+# lactose-free is deliberately absent: lactose-free milk is still dairy.
+_PLANT_BASED = {"dairy", "egg", "honey", "fish", "shellfish", *_ALL_MEAT}
+FREE_FROM: Dict[str, Set[str]] = {
+    "gluten-free": {"gluten"},
+    "dairy-free": {"dairy"},
+    "egg-free": {"egg"},
+    "eggless": {"egg"},
+    "meat-free": _ALL_MEAT,
+    "meatless": _ALL_MEAT,
+    "vegan": _PLANT_BASED,
+    "plant-based": _PLANT_BASED,
+}
+
+# Ingredients whose compliance depends on how they were made.
+AMBIGUOUS: Dict[str, Set[str]] = {
+    "stock": {"meat", "fish"},
+    "broth": {"meat", "fish"},
+    "bouillon": {"meat", "fish"},
+    "stock cube": {"meat", "fish"},
+    "gravy": {"meat", "dairy"},
+    "margarine": {"dairy"},
+    "pesto": {"dairy", "nuts"},
+    "curry paste": {"fish", "shellfish"},
+    "chocolate": {"dairy"},
+}
+
+def _alternation(terms: Iterable[str]) -> str:
+    # Longest first so "peanut butter" wins over "butter" at the same position.
+    return "|".join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True))
+
+_TERM_CATEGORIES: Dict[str, Set[str]] = {}
+for _category, _terms in TAXONOMY.items():
+    for _term in _terms:
+        _TERM_CATEGORIES.setdefault(_term, set()).add(_category)
+        if _category in PARENTS:
+            _TERM_CATEGORIES[_term].add(PARENTS[_category])
+
+_TERM_RE = re.compile(rf"\b({_alternation(_TERM_CATEGORIES)})(?:e?s)?\b")
+# Words in an exception may be joined by spaces or hyphens ("kidney-bean curry").
+_EXCEPTION_RE = re.compile(r"\b(" + _alternation(EXCEPTIONS).replace(r"\ ", r"[\s-]") + r")(?:e?s)?\b")
+# "gluten-free" also matches "gluten free" and "glutenfree"; the label covers the two words after it.
+_FREE_FROM_BY_KEY = {label.replace("-", ""): categories for label, categories in FREE_FROM.items()}
+_FREE_FROM_RE = re.compile(
+    r"\b(" + "|".join(re.escape(label).replace(r"\-", r"[\s-]?") for label in FREE_FROM) + r")\b((?:[\s-]+[a-z']+){0,2})"
+)
+_AMBIGUOUS_RE = re.compile(rf"\b({_alternation(AMBIGUOUS)})(?:e?s)?\b")
+
+# Checked in order on the preferences with negated clauses removed, so an
+# explicit vegan or vegetarian wins over an incidental "meat".
+_PREFERENCE_RULES = [
+    ("vegan", re.compile(r"(?<!non)(?<!non[\s-])\bvegan\b|plant[\s-]?based")),
+    ("pescatarian", re.compile(r"pesc[ae]tarian")),
+    ("vegetarian", re.compile(r"(?<!non)(?<!non[\s-])\bveg(?:etarian|gie)?\b")),
+    ("non_veg", re.compile(r"non[\s-]?veg|\bmeat\b|omnivore|\beverything\b")),
+]
+
+# "no meat", "without fish", "I don't eat pork", "avoid dairy", "everything
+# except beef": the rest of the clause (up to punctuation or "but") is
+# something the user excludes, not a preference.
+_NEGATION_RE = re.compile(
+    r"\b(?:no|not|never|without|avoid(?:s|ing)?|exclud(?:e|es|ing)|except|(?:do|does|can)(?:n't|nt| not)|cannot|won't)\b"
+    r"(?:(?!\bbut\b)[^,;.])*"
+)
+
+_RESTRICTION_RULES = {
+    "dairy": re.compile(r"dairy|lactose|\bmilk\b"),
+    "gluten": re.compile(r"gluten|wheat|c(o)?eliac"),
+    "nuts": re.compile(r"\bnuts?\b|tree[\s-]?nut"),
+    "peanuts": re.compile(r"peanut"),
+    "egg": re.compile(r"\beggs?\b"),
+    "shellfish": re.compile(r"shellfish|seafood|prawn|shrimp"),
+    "fish": re.compile(r"\bfish\b|seafood"),
+    "soy": re.compile(r"\bsoy|soya"),
+    "pork": re.compile(r"\bpork\b|halal|kosher|red[\s-]meat"),
+    "beef": re.compile(r"\bbeef\b|red[\s-]meat"),
+    "lamb": re.compile(r"\blamb\b|\bmutton\b|red[\s-]meat"),
+    # "red meat" excludes only the categories above, not poultry.
+    "meat": re.compile(r"(?<!red )(?<!red-)\bmeat\b"),
+    "honey": re.compile(r"\bhoney\b"),
+}
+
+def _exclusions(text: str) -> List[Tuple[int, int, Set[str]]]:
+    """`(start, end, categories)` spans of lowercased `text` where exception
+    phrases and free-from labels rule categories out."""
+    spans = [
+        (match.start(), match.end(), EXCEPTIONS[match.group(1).replace("-", " ")])
+        for match in _EXCEPTION_RE.finditer(text)
+    ]
+    for match in _FREE_FROM_RE.finditer(text):
+        spans.append((match.start(), match.end(), _FREE_FROM_BY_KEY[re.sub(r"[\s-]", "", match.group(1))]))
+    return spans
+
+def _ruled_out(spans: List[Tuple[int, int, Set[str]]], match: re.Match) -> Set[str]:
+    ruled_out: Set[str] = set()
+    for start, end, categories in spans:
+        if start <= match.start() and match.end() <= end:
+            ruled_out |= categories
+    return ruled_out
+
+def categorize(text: str) -> Dict[str, Set[str]]:
+    """Map each taxonomy category found in `text` to the terms that matched it."""
+    text = text.lower()
+    spans = _exclusions(text)
+    found: Dict[str, Set[str]] = {}
+    for match in _TERM_RE.finditer(text):
+        term = match.group(1)
+        for category in _TERM_CATEGORIES[term] - _ruled_out(spans, match):
+            found.setdefault(category, set()).add(term)
+    return found
+
+def parse_profile(preferences: str = "", restrictions: str = "") -> dict:
+    """Turn free-text preferences/restrictions into forbidden categories.
+
+    Returns `{"diet": ..., "forbidden": set, "require_animal": bool}` where
+    diet is one of non_veg, vegan, pescatarian, vegetarian or none.
+    """
+    preferences = (preferences or "").lower()
+    restrictions = (restrictions or "").lower()
+    negated = " ".join(match.group(0) for match in _NEGATION_RE.finditer(preferences))
+    stated = _NEGATION_RE.sub(" ", preferences)
+    diet = next((name for name, pattern in _PREFERENCE_RULES if pattern.search(stated)), "none")
+
+    forbidden: Set[str] = set()
+    if diet in ("vegetarian", "vegan"):
+        forbidden |= ANIMAL
+    if diet == "vegan":
+        forbidden |= {"dairy", "egg", "honey"}
+    if diet == "pescatarian":
+        forbidden.add("meat")
+    # Exclusions written into the preferences ("vegetarian, no eggs") count as restrictions.
+    for text in (negated, restrictions):
+        if text.strip() not in ("", "none", "no", "n/a", "na"):
+            forbidden |= {category for category, pattern in _RESTRICTION_RULES.items() if pattern.search(text)}
+    return {"diet": diet, "forbidden": forbidden, "require_animal": diet == "non_veg"}
+
+def check_ingredients(ingredients: Iterable[str], profile: dict) -> dict:
+    """Check ingredient strings against a profile from `parse_profile`.
+
+    `violations` lists definite conflicts, `ambiguous` lists ingredients that
+    might conflict depending on preparation (e.g. "stock"), and `missing`
+    names an unmet requirement such as a non-veg diet without any meat or fish.
+    """
+    forbidden = profile["forbidden"]
+    violations, ambiguous = [], []
+    has_animal = False
+    for ingredient in ingredients:
+        text = ingredient.lower()
+        found = categorize(text)
+        has_animal = has_animal or bool(ANIMAL & found.keys())
+        hits = forbidden & found.keys()
+        for category in sorted(hits):
+            violations.append({"ingredient": ingredient, "category": category, "terms": sorted(found[category])})
+        if not hits:
+            spans = _exclusions(text)
+            for match in _AMBIGUOUS_RE.finditer(text):
+                risky = (AMBIGUOUS[match.group(1)] - _ruled_out(spans, match)) & forbidden
+                if risky:
+                    ambiguous.append({"ingredient": ingredient, "categories": sorted(risky)})
+                    break
+
+    missing = ["meat, fish or poultry"] if profile["require_animal"] and not has_animal else []
+    return {
+        "compliant": not violations and not missing,
+        "violations": violations,
+        "ambiguous": ambiguous,
+        "missing": missing,
+    }
+
+def check_text(text: str, profile: dict) -> dict:
+    """Like `check_ingredients` for free text, treating each line as an item."""
+    return check_ingredients([line for line in text.splitlines() if line.strip()], profile)
+
+def describe(result: dict) -> str:
+    """Human-readable reason for a non-compliant result."""
+    reasons = [
+        f"contains {v['category']} ({', '.join(v['terms'])} in '{v['ingredient']}')"
+        for v in result["violations"]
+    ]
+    reasons += [f"has no {item}" for item in result["missing"]]
+    return "; ".join(reasons) or "matches your preferences and restrictions"
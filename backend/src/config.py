@@ -1,23 +1,181 @@
-from pinecone import Pinecone
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
-pc = Pinecone(api_key=os.getenv("PC_API_KEY"))
-PINECONE_INDEX = pc.Index("diet-bot-index-v2")
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone")  # pinecone | local
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "vector_store")
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "diet-bot-index-v2")
 
 CHAT_MODEL = "gemini-1.5-pro"
 EMBEDDING_MODEL = "models/text-embedding-004"
 
-EMBEDDER = GoogleGenerativeAIEmbeddings(
-    model=EMBEDDING_MODEL,
-    google_api_key=os.getenv("GEM_API_KEY")
-)
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "1024"))
 
-LLM = ChatGoogleGenerativeAI(
-    model=CHAT_MODEL,
-    temperature=0.7,
-    google_api_key=os.getenv("GEM_API_KEY")
-)
\ No newline at end of file
+CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "memory")  # memory | sqlite | redis
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CONVERSATION_WINDOW = int(os.getenv("CONVERSATION_WINDOW", "8"))
+CONVERSATION_SUMMARY_MAX_CHARS = int(os.getenv("CONVERSATION_SUMMARY_MAX_CHARS", "1500"))
+CONVERSATION_MESSAGE_MAX_CHARS = int(os.getenv("CONVERSATION_MESSAGE_MAX_CHARS", "2000"))
+CONVERSATION_MEMORY_MAX_USERS = int(os.getenv("CONVERSATION_MEMORY_MAX_USERS", "10000"))
+
+PERSISTENCE_QUEUE_MAX_SIZE = int(os.getenv("PERSISTENCE_QUEUE_MAX_SIZE", "1000"))
+PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", "32"))
+PERSISTENCE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL_SECONDS", "1.0"))
+PERSISTENCE_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("PERSISTENCE_ENQUEUE_TIMEOUT_SECONDS", "0"))
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3.05"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE_SECONDS = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.25"))
+HTTP_BACKOFF_CAP_SECONDS = float(os.getenv("HTTP_BACKOFF_CAP_SECONDS", "4"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_PER_HOST_CONCURRENCY = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", "8"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET_SECONDS = float(os.getenv("HTTP_BREAKER_RESET_SECONDS", "30"))
+
+RECIPE_DB_PATH = os.getenv("RECIPE_DB_PATH", "recipes.db")
+# Empty uses the bundled src/data/nutrients.csv; may point at a compiled .npz.
+NUTRIENT_DB_PATH = os.getenv("NUTRIENT_DB_PATH", "")
+
+MEAL_PLAN_LLM_POLISH = os.getenv("MEAL_PLAN_LLM_POLISH", "false").lower() == "true"
+BATCH_PLAN_CONCURRENCY = int(os.getenv("BATCH_PLAN_CONCURRENCY", "8"))
+BATCH_PLAN_MAX_PROFILES = int(os.getenv("BATCH_PLAN_MAX_PROFILES", "1000"))
+MEAL_PLAN_DB_PATH = os.getenv("MEAL_PLAN_DB_PATH", "meal_plans.db")
+MEAL_PLAN_MAX_DAYS = int(os.getenv("MEAL_PLAN_MAX_DAYS", "14"))
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+EMBEDDING_CACHE_DB_PATH = os.getenv("EMBEDDING_CACHE_DB_PATH", "embeddings.db")  # empty disables the disk tier
+EMBEDDING_CACHE_DISK_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.7"))
+RETRIEVAL_HALF_LIFE_SECONDS = float(os.getenv("RETRIEVAL_HALF_LIFE_SECONDS", str(7 * 86400)))
+RETRIEVAL_RECENCY_WEIGHT = float(os.getenv("RETRIEVAL_RECENCY_WEIGHT", "0.3"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "800"))
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+# Timed-out tool threads that may keep running after giving their slot back (see src/tool_pool.py).
+TOOL_MAX_ABANDONED = int(os.getenv("TOOL_MAX_ABANDONED", "16"))
+TOOL_TIMEOUTS = {
+    "diet_recommendations": float(os.getenv("DIET_TOOL_TIMEOUT_SECONDS", TOOL_TIMEOUT_SECONDS)),
+    "recipe_fetcher": float(os.getenv("RECIPE_TOOL_TIMEOUT_SECONDS", TOOL_TIMEOUT_SECONDS)),
+    "nut_content_fetcher": float(os.getenv("NUTRITION_TOOL_TIMEOUT_SECONDS", TOOL_TIMEOUT_SECONDS)),
+}
+# Identical concurrent tool calls share one execution (see src/singleflight.py).
+TOOL_COALESCING_ENABLED = os.getenv("TOOL_COALESCING_ENABLED", "true").lower() == "true"
+
+# Every Gemini chat and embedding call is admitted by src/scheduler.py. Set
+# the limits to the project's quota; 0 disables that limit.
+GEMINI_SCHEDULER_ENABLED = os.getenv("GEMINI_SCHEDULER_ENABLED", "true").lower() == "true"
+GEMINI_CHAT_RPM = float(os.getenv("GEMINI_CHAT_RPM", "1000"))
+GEMINI_CHAT_TPM = float(os.getenv("GEMINI_CHAT_TPM", "1000000"))
+GEMINI_EMBED_RPM = float(os.getenv("GEMINI_EMBED_RPM", "1500"))
+GEMINI_EMBED_TPM = float(os.getenv("GEMINI_EMBED_TPM", "0"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "1"))
+GEMINI_BACKOFF_CAP_SECONDS = float(os.getenv("GEMINI_BACKOFF_CAP_SECONDS", "30"))
+
+# Clients are built on first use rather than at import, so importing config
+# (or anything that imports it) stays fast and needs no credentials.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _client(name: str, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+def _build_vector_index():
+    from src.vector_store import build_vector_index
+    return build_vector_index(VECTOR_STORE, VECTOR_STORE_PATH, os.getenv("PC_API_KEY"), PINECONE_INDEX_NAME)
+
+def _build_embedder():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from src.embedding_cache import CachedEmbeddings
+    from src.scheduler import scheduled_embeddings
+    # The scheduler sits inside the cache, so cache hits use no quota. The
+    # embeddings client has no retry setting and makes a single attempt, so
+    # 429s reach the scheduler's backoff as they do for the chat model.
+    return CachedEmbeddings(
+        scheduled_embeddings(GoogleGenerativeAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            google_api_key=os.getenv("GEM_API_KEY")
+        )),
+        EMBEDDING_MODEL,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        db_path=EMBEDDING_CACHE_DB_PATH or None,
+        disk_max_entries=EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+    )
+
+def _build_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from src.scheduler import scheduled_llm
+    from src.telemetry import TOKEN_USAGE_HANDLER
+    return scheduled_llm(ChatGoogleGenerativeAI(
+        model=CHAT_MODEL,
+        temperature=0.7,
+        google_api_key=os.getenv("GEM_API_KEY"),
+        # A single attempt: the scheduler retries 429s itself after pausing the
+        # quota. (0 means "SDK default" in recent versions, so 1, not 0.)
+        max_retries=1,
+        callbacks=[TOKEN_USAGE_HANDLER]
+    ))
+
+def get_vector_index():
+    """The configured vector index (Pinecone or local), created on first call."""
+    return _client("vector_index", _build_vector_index)
+
+def get_embedder():
+    """The cached Gemini embeddings client, created on first call."""
+    return _client("embedder", _build_embedder)
+
+def get_llm():
+    """The Gemini chat model, created on first call."""
+    return _client("llm", _build_llm)
+
+def override_clients(**clients) -> None:
+    """Install ready-made clients (`vector_index`, `embedder`, `llm`), e.g. recorded
+    stand-ins for benchmarks, in place of the lazily built ones."""
+    unknown = set(clients) - {"vector_index", "embedder", "llm"}
+    if unknown:
+        raise ValueError(f"Unknown clients: {sorted(unknown)}")
+    with _clients_lock:
+        _clients.update(clients)
+
+def reset_clients() -> None:
+    """Forget every client so the next call builds a fresh one.
+
+    Runs in forked children: sockets, gRPC channels and SQLite handles
+    inherited from the parent must not be shared across processes.
+    """
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_clients)
+
+_LAZY = {"PINECONE_INDEX": get_vector_index, "EMBEDDER": get_embedder, "LLM": get_llm}
+
+def __getattr__(name: str):
+    # PEP 562: keeps `config.LLM` style access working without eager construction.
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
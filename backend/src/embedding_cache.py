@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.cache import TTLCache
+from src.telemetry import record_cache, record_external_call
+
+logger = logging.getLogger(__name__)
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache in front of an `Embeddings` model.
+
+    Keys hash the model name, the kind of embedding (query and document
+    embeddings differ for Gemini) and the text. Vectors are kept in an
+    in-memory LRU and, when `db_path` is set, in SQLite as float32 blobs with
+    least-recently-used eviction past `disk_max_entries`. Only texts missing
+    from both tiers reach the wrapped model, in one batched call.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        model: str,
+        max_entries: int = 4096,
+        db_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+    ):
+        self.embedder = embedder
+        self.model = model
+        self.disk_max_entries = disk_max_entries
+        self._memory = TTLCache(max_entries=max_entries, ttl_seconds=float("inf"))
+        self._conn = None
+        self._lock = threading.Lock()
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything not cached (e.g. model settings) comes from the wrapped embedder.
+        return getattr(self.embedder, name)
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _load_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        if self._conn is None or not keys:
+            return {}
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows])
+        return {key: np.frombuffer(blob, dtype=np.float32).tolist() for key, blob in rows}
+
+    def _store_disk(self, vectors: Dict[str, List[float]]) -> None:
+        if self._conn is None or not vectors:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()],
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.disk_max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                )
+
+    def _embed(self, kind: str, texts: List[str], compute) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        # Hits and misses are counted per unique text, so they add up to `len(unique)`.
+        unique = dict(zip(keys, texts))
+        found: Dict[str, List[float]] = {}
+        for key in unique:
+            vector = self._memory.get(key)
+            if vector is not None:
+                found[key] = vector
+        memory_hits = len(found)
+
+        on_disk = self._load_disk([key for key in unique if key not in found])
+        for key, vector in on_disk.items():
+            self._memory.set(key, vector)
+        found.update(on_disk)
+
+        # Texts still missing go to the model in one call.
+        missing = {key: text for key, text in unique.items() if key not in found}
+        if missing:
+            record_external_call("gemini_embeddings")
+            vectors = compute(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            for key, vector in computed.items():
+                self._memory.set(key, vector)
+            self._store_disk(computed)
+            found.update(computed)
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += len(on_disk)
+            self.misses += len(missing)
+            self.api_calls += 1 if missing else 0
+        record_cache("embedding", "memory_hit", memory_hits)
+        record_cache("embedding", "disk_hit", len(on_disk))
+        record_cache("embedding", "miss", len(missing))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text], lambda texts: [self.embedder.embed_query(texts[0])])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._embed("document", list(texts), self.embedder.embed_documents)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "model": self.model,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "api_calls": self.api_calls,
+                "avoided_embeddings": self.memory_hits + self.disk_hits,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return stats
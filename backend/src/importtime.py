@@ -0,0 +1,45 @@
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Cold-import budget for the web app module, in milliseconds. Importing must
+# not build clients, touch the network or compile the graph.
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def measure(module: str = "main") -> Tuple[float, List[Tuple[float, str]]]:
+    """Cumulative import time of `module` in a fresh interpreter, in ms, plus
+    its slowest direct imports as `(ms, name)` pairs."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    # Children are printed before their parent, indented two spaces per level.
+    children: List[Tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        ms, depth, name = int(match.group(2)) / 1000, len(match.group(3)) // 2, match.group(4)
+        if depth == 1:
+            children.append((ms, name))
+        elif depth == 0:
+            if name == module:
+                return ms, sorted(children, reverse=True)[:10]
+            children = []
+    return 0.0, []
+
+if __name__ == "__main__":
+    # python -m src.importtime [module] [budget_ms]; exits 1 when over budget.
+    module = sys.argv[1] if len(sys.argv) > 1 else "main"
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET_MS
+    total, slowest = measure(module)
+    print(f"import {module}: {total:.1f} ms (budget {budget:.0f} ms)")
+    for ms, name in slowest:
+        print(f"  {ms:8.1f} ms  {name}")
+    sys.exit(0 if total <= budget else 1)
@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+LABELLED_QUERIES_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_queries.json")
+DEFAULT_THRESHOLD = 0.8
+INTENTS = ["diet_recommendations", "recipe_fetcher", "nut_content_fetcher"]
+
+# Dish name: letters, digits, spaces and a few joiners; no sentence punctuation.
+_DISH = r"(?P<dish>[a-z0-9][a-z0-9 '&,-]{1,60}?)"
+_END = r"\s*(?:please|pls|thanks|thank you|today|tonight)?\s*[.!?]*$"
+
+# (intent, confidence, pattern). The first matching rule of each intent wins;
+# rules that extract a dish are more specific and score higher.
+_RULES = [
+    ("nut_content_fetcher", 0.95, re.compile(
+        rf"^(?:what are |what's |whats |what is |show me |tell me |give me )?(?:the )?"
+        rf"(?:calories|calorie count|nutrition(?:al)? (?:info|information|content|facts|value|values)|nutrition|"
+        rf"macros|macronutrients|protein|nutrients) (?:in|of|for) (?:a |an |one |the )?{_DISH}{_END}")),
+    ("nut_content_fetcher", 0.95, re.compile(
+        rf"^how many (?:calories|grams of protein|carbs) (?:are |is )?(?:there )?(?:in|does) (?:a |an |one |the )?{_DISH}"
+        rf"(?: have| contain)?{_END}")),
+    ("nut_content_fetcher", 0.9, re.compile(rf"^{_DISH} (?:calories|nutrition|nutritional (?:info|content|facts)|macros){_END}")),
+    ("recipe_fetcher", 0.95, re.compile(
+        rf"^(?:can you |could you |please )?(?:give me |show me |find me |find |get me |share |i want |i need |send me )?"
+        rf"(?:a |the |an )?(?:good |simple |easy |quick |healthy )?recipe (?:for|of) (?:a |an |the )?{_DISH}{_END}")),
+    ("recipe_fetcher", 0.95, re.compile(
+        rf"^(?:how (?:do i|do you|can i|to|should i) |teach me (?:how )?to |help me )(?:make|cook|prepare|bake) "
+        rf"(?:a |an |the |some )?{_DISH}{_END}")),
+    ("recipe_fetcher", 0.9, re.compile(rf"^(?:a |an )?{_DISH} recipe{_END}")),
+    # Diet rules only fire on request phrasing; a plan or diet merely mentioned
+    # ("why does my meal plan ...", "is a keto diet ...") is left to the LLM.
+    ("diet_recommendations", 0.95, re.compile(
+        r"^(?:please |can you |could you |would you )?(?:make|create|build|design|generate|write|draft|suggest|recommend|"
+        r"give|get|send|show|i need|i want|i'd like|id like)(?: me)? (?:a |an |my |the |some )?(?:[a-z-]+ ){0,3}?"
+        r"(?:meal|diet|eating|nutrition|food) plan\b|^(?:please |can you |could you )?plan (?:my|a|the) (?:meals|diet|day of eating)\b")),
+    ("diet_recommendations", 0.9, re.compile(
+        r"^(?:please |can you |could you )?(?:(?:suggest|recommend|give me|i need|i want) )?(?:a |an |the |some )?(?:good |healthy )?"
+        r"diet (?:for|to) (?:weight loss|losing weight|lose weight|muscle gain|gain(?:ing)? muscle|maintenance|bulk|cut)\b|"
+        r"^what should i eat (?:today|this week|for the day|daily)\b")),
+    # Bare keywords: a hint, but below the default threshold.
+    ("nut_content_fetcher", 0.6, re.compile(r"\b(?:calories|nutrition|nutritional|macros)\b")),
+    ("recipe_fetcher", 0.6, re.compile(
+        r"\b(?:recipe|recipes|cook|make(?!(?: me)? (?:a |an |my |the )?(?:[a-z-]+ ){0,3}?(?:meal|diet|eating|food) plan\b))\b")),
+    ("diet_recommendations", 0.6, re.compile(r"\b(?:diet|meals?|eat)\b")),
+]
+
+# Queries with these are follow-ups, compound requests, negations or questions
+# about something rather than requests for it; the LLM should read them in context.
+_DEFER = re.compile(
+    r"\b(?:it|that|this one|instead|also|and then|yes|no|same|again|another|compare|vs|versus|or)\b|"
+    r"\b(?:not|never|dont|cannot|\w+n't|rather than|why|whether)\b|"
+    r"^(?:is|are|was|were|does|do|did|should|would|will|has|have)\b"
+)
+_DISH_NOISE = re.compile(r"\b(?:please|pls|thanks|recipe|dish)\b")
+
+def _clean_dish(dish: str) -> str:
+    dish = _DISH_NOISE.sub(" ", dish)
+    return " ".join(dish.strip(" ,'&-").split())
+
+def classify(query: str) -> Dict:
+    """Classify a chat query as one of `INTENTS` without calling a model.
+
+    Returns `{"intent": ..., "confidence": float, "dish": str | None}`; intent
+    is None when nothing matched. Conflicting intents, follow-up wording or a
+    missing dish lower the confidence so the caller falls back to the LLM.
+    """
+    text = " ".join((query or "").lower().split())
+    matched: Dict[str, tuple] = {}
+    for intent, confidence, pattern in _RULES:
+        if intent in matched:
+            continue
+        match = pattern.search(text)
+        if match:
+            dish = match.groupdict().get("dish")
+            matched[intent] = (confidence, _clean_dish(dish) if dish else None)
+
+    if not matched:
+        return {"intent": None, "confidence": 0.0, "dish": None}
+
+    intent, (confidence, dish) = max(matched.items(), key=lambda item: item[1][0])
+    if len(matched) > 1:
+        confidence = min(confidence, 0.5)
+    if intent != "diet_recommendations" and not dish:
+        confidence = min(confidence, 0.6)
+    if _DEFER.search(text):
+        confidence = min(confidence, 0.5)
+    return {"intent": intent, "confidence": confidence, "dish": dish}
+
+def route(query: str, threshold: float = DEFAULT_THRESHOLD) -> Optional[Dict]:
+    """`classify` result if it clears `threshold`, otherwise None."""
+    result = classify(query)
+    if result["intent"] and result["confidence"] >= threshold:
+        return result
+    return None
+
+def load_labelled(path: str = LABELLED_QUERIES_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def evaluate(examples: List[dict], threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """Per-intent precision/recall of `route` on `{"query", "intent", "dish"}` examples.
+
+    An example labelled with intent None should fall back to the LLM; recall
+    counts a tool query routed elsewhere (or not at all) as a miss.
+    """
+    per_intent = {intent: {"tp": 0, "fp": 0, "fn": 0} for intent in INTENTS}
+    routed = dish_correct = 0
+    for example in examples:
+        result = route(example["query"], threshold)
+        predicted = result["intent"] if result else None
+        expected = example.get("intent")
+        if predicted:
+            routed += 1
+            if predicted == expected:
+                per_intent[predicted]["tp"] += 1
+                if (result["dish"] or None) == example.get("dish"):
+                    dish_correct += 1
+            else:
+                per_intent[predicted]["fp"] += 1
+        if expected and predicted != expected:
+            per_intent[expected]["fn"] += 1
+
+    report = {}
+    for intent, counts in per_intent.items():
+        tp, fp, fn = counts["tp"], counts["fp"], counts["fn"]
+        report[intent] = {
+            "precision": round(tp / (tp + fp), 3) if tp + fp else None,
+            "recall": round(tp / (tp + fn), 3) if tp + fn else None,
+            **counts,
+        }
+    correct = sum(counts["tp"] for counts in per_intent.values())
+    return {
+        "threshold": threshold,
+        "examples": len(examples),
+        "routed_locally": routed,
+        "coverage": round(routed / len(examples), 3) if examples else 0.0,
+        "precision": round(correct / routed, 3) if routed else None,
+        "dish_accuracy": round(dish_correct / correct, 3) if correct else None,
+        "intents": report,
+    }
+
+if __name__ == "__main__":
+    # python -m src.intent [labelled.json] [threshold ...]
+    path = sys.argv[1] if len(sys.argv) > 1 else LABELLED_QUERIES_PATH
+    thresholds = [float(t) for t in sys.argv[2:]] or [0.5, 0.6, 0.8, 0.9, 0.95]
+    examples = load_labelled(path)
+    for threshold in thresholds:
+        print(json.dumps(evaluate(examples, threshold), indent=2))
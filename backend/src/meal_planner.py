@@ -0,0 +1,276 @@
+import json
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.compliance import categorize
+
+MEALS_PATH = os.path.join(os.path.dirname(__file__), "data", "meals.json")
+
+SLOTS = ["breakfast", "lunch", "dinner", "snack"]
+# Share of the daily calorie target assigned to each slot.
+SLOT_SPLIT = {"breakfast": 0.25, "lunch": 0.35, "dinner": 0.30, "snack": 0.10}
+MIN_PORTION = 0.5
+# Large enough that four meals reach high targets (the largest meals are ~700 kcal).
+MAX_PORTION = 3.0
+# A day more than this share under its target reports the shortfall.
+CALORIE_TOLERANCE = 0.05
+# How many of the best-fitting candidates `variant` rotates through.
+VARIETY_POOL = 3
+# A meal appears at most this often in a multi-day plan, and never on consecutive days.
+MAX_WEEKLY_REPEATS = 2
+
+def _load_meals(path: str = MEALS_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+MEALS = _load_meals()
+
+# slot -> meal indices, and (slot, tag) -> meal indices, built once at import.
+_BY_SLOT: Dict[str, List[int]] = defaultdict(list)
+_BY_SLOT_TAG: Dict[tuple, Set[int]] = defaultdict(set)
+for _i, _meal in enumerate(MEALS):
+    _BY_SLOT[_meal["slot"]].append(_i)
+    for _tag in _meal["tags"]:
+        _BY_SLOT_TAG[(_meal["slot"], _tag)].add(_i)
+# meal index -> compliance categories it contains: the meal's curated
+# `contains` list plus anything the matcher finds in its name and description.
+_CATEGORIES: List[Set[str]] = [
+    set(m.get("contains", ())) | set(categorize(f"{m['name']} {m['description']}")) for m in MEALS
+]
+
+def required_tags(vegetarian: bool = False, dairy_free: bool = False, vegan: bool = False) -> List[str]:
+    tags = []
+    if vegan:
+        tags.append("vegan")
+    if vegetarian:
+        tags.append("vegetarian")
+    if dairy_free:
+        tags.append("dairy_free")
+    return tags
+
+def plan_constraints(profile: dict, goal: str) -> dict:
+    """`compose_meal_plan` keyword arguments for a parsed dietary profile
+    (see `src.compliance.parse_profile`) and goal."""
+    return {
+        "vegetarian": profile["diet"] in ("vegetarian", "vegan"),
+        "dairy_free": "dairy" in profile["forbidden"],
+        "non_veg": profile["require_animal"],
+        "high_protein": goal == "muscle_gain",
+        "vegan": profile["diet"] == "vegan",
+        "forbidden": sorted(profile["forbidden"]),
+    }
+
+def candidates(
+    slot: str,
+    tags: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    forbidden: Iterable[str] = (),
+) -> List[int]:
+    """Indices of meals for `slot` carrying every tag in `tags`, minus `exclude`
+    names and meals containing any `forbidden` compliance category."""
+    matches = set(_BY_SLOT[slot])
+    for tag in tags:
+        matches &= _BY_SLOT_TAG[(slot, tag)]
+    excluded = set(exclude)
+    forbidden = set(forbidden)
+    return sorted(
+        i for i in matches
+        if MEALS[i]["name"] not in excluded and not forbidden & _CATEGORIES[i]
+    )
+
+def _fit_score(meal: dict, slot_target: float, high_protein: bool) -> float:
+    # Distance of the portion multiplier from 1.0 on a log scale, so 0.5x and 2x are equally bad.
+    score = abs(math.log(slot_target / meal["calories"]))
+    if high_protein:
+        score -= 4 * meal["protein_g"] * 4 / meal["calories"]
+    return score
+
+def _plan_meal(index: int, slot: str, slot_target: float) -> dict:
+    meal = MEALS[index]
+    portion = min(MAX_PORTION, max(MIN_PORTION, slot_target / meal["calories"]))
+    portion = round(portion, 1)
+    return {
+        "slot": slot,
+        "name": meal["name"],
+        "description": meal["description"],
+        "portion": portion,
+        "calories": round(meal["calories"] * portion),
+        "protein_g": round(meal["protein_g"] * portion),
+        "carbs_g": round(meal["carbs_g"] * portion),
+        "fat_g": round(meal["fat_g"] * portion),
+        "tags": list(meal["tags"]),
+        "index": index,
+    }
+
+def pick_meal(
+    slot: str,
+    slot_target: float,
+    tags: Iterable[str] = (),
+    high_protein: bool = False,
+    exclude: Iterable[str] = (),
+    variant: int = 0,
+    forbidden: Iterable[str] = (),
+) -> Optional[dict]:
+    """Choose and portion one meal for `slot`; `variant` rotates among the best fits."""
+    pool = candidates(slot, tags, exclude, forbidden) or candidates(slot, tags, forbidden=forbidden)
+    if not pool:
+        return None
+    ranked = sorted(pool, key=lambda i: (_fit_score(MEALS[i], slot_target, high_protein), MEALS[i]["name"]))
+    choice = ranked[variant % min(VARIETY_POOL, len(ranked))]
+    return _plan_meal(choice, slot, slot_target)
+
+def compose_meal_plan(
+    target_calories: float,
+    vegetarian: bool = False,
+    dairy_free: bool = False,
+    non_veg: bool = False,
+    high_protein: bool = False,
+    vegan: bool = False,
+    exclude: Iterable[str] = (),
+    variant: int = 0,
+    forbidden: Iterable[str] = (),
+) -> dict:
+    """Assemble a four-meal day that lands near `target_calories`.
+
+    `forbidden` holds compliance categories (see `src.compliance`) that no
+    chosen meal may contain. Purely local and deterministic for a given set
+    of arguments.
+    """
+    tags = required_tags(vegetarian, dairy_free, vegan)
+    exclude = list(exclude)
+    meals = []
+    for slot in SLOTS:
+        meal = pick_meal(slot, target_calories * SLOT_SPLIT[slot], tags, high_protein, exclude, variant, forbidden)
+        if meal is None:
+            raise ValueError(f"No {slot} options satisfy the requested constraints")
+        meals.append(meal)
+
+    if non_veg and not any("non_veg" in meal["tags"] for meal in meals):
+        # Swap the main meal whose non-veg alternative fits its slot best.
+        for position in (2, 1):
+            slot = SLOTS[position]
+            swap = pick_meal(
+                slot, target_calories * SLOT_SPLIT[slot], tags + ["non_veg"], high_protein, exclude, variant, forbidden
+            )
+            if swap:
+                meals[position] = swap
+                break
+
+    return balance_day(meals, target_calories)
+
+def balance_day(meals: List[dict], target_calories: float) -> dict:
+    """Day summary for `meals` (one per slot, in `SLOTS` order), with lunch
+    re-portioned to absorb the rounding/clamping drift of the other slots.
+
+    `shortfall_calories` is how far the day stays under target once every
+    portion is capped, or 0 when it lands within `CALORIE_TOLERANCE`.
+    """
+    meals = list(meals)
+    others = sum(meal["calories"] for i, meal in enumerate(meals) if i != 1)
+    meals[1] = _plan_meal(meals[1]["index"], "lunch", target_calories - others)
+    total = sum(meal["calories"] for meal in meals)
+    shortfall = round(target_calories) - total
+
+    return {
+        "meals": meals,
+        "target_calories": round(target_calories),
+        "total_calories": total,
+        "shortfall_calories": shortfall if shortfall > target_calories * CALORIE_TOLERANCE else 0,
+        "protein_g": sum(meal["protein_g"] for meal in meals),
+        "carbs_g": sum(meal["carbs_g"] for meal in meals),
+        "fat_g": sum(meal["fat_g"] for meal in meals),
+    }
+
+def format_meal(number: int, meal: dict) -> str:
+    portion = f" [{meal['portion']:g}x portion]" if meal["portion"] != 1 else ""
+    return (
+        f"{number}. {meal['slot'].capitalize()}: {meal['name']}{portion} - "
+        f"{meal['description']} (~{meal['calories']} calories)"
+    )
+
+def format_meal_plan(plan: dict) -> str:
+    lines = [format_meal(i, meal) for i, meal in enumerate(plan["meals"], start=1)]
+    lines.append(
+        f"\nTotal: ~{plan['total_calories']} calories "
+        f"(protein {plan['protein_g']}g, carbs {plan['carbs_g']}g, fat {plan['fat_g']}g)"
+    )
+    if plan.get("shortfall_calories"):
+        lines.append(
+            f"This plan is ~{plan['shortfall_calories']} calories short of your "
+            f"{plan['target_calories']} calorie target; add snacks to make up the difference."
+        )
+    return "\n".join(lines)
+
+def day_satisfies(plan: dict, constraints: dict) -> bool:
+    """Whether a stored day still meets `constraints` (as from `plan_constraints`)."""
+    tags = set(required_tags(constraints["vegetarian"], constraints["dairy_free"], constraints["vegan"]))
+    forbidden = set(constraints["forbidden"])
+    for meal in plan["meals"]:
+        index = meal["index"]
+        if not tags <= set(MEALS[index]["tags"]) or forbidden & _CATEGORIES[index]:
+            return False
+    return not constraints["non_veg"] or any("non_veg" in meal["tags"] for meal in plan["meals"])
+
+def week_exclusions(week: List[Optional[dict]], day: int) -> List[str]:
+    """Meal names `day` should avoid: anything planned on a neighbouring day, and
+    anything already used `MAX_WEEKLY_REPEATS` times on the other days."""
+    counts = Counter(meal["name"] for i, plan in enumerate(week) if plan and i != day for meal in plan["meals"])
+    neighbours = {
+        meal["name"] for i in (day - 1, day + 1) if 0 <= i < len(week) and week[i] for meal in week[i]["meals"]
+    }
+    return sorted(neighbours | {name for name, count in counts.items() if count >= MAX_WEEKLY_REPEATS})
+
+def compose_day(week: List[Optional[dict]], day: int, target_calories: float, constraints: dict) -> dict:
+    """Plan `day` of `week` around the days already planned."""
+    return compose_meal_plan(target_calories, exclude=week_exclusions(week, day), variant=day, **constraints)
+
+def compose_week(target_calories: float, days: int, constraints: dict) -> List[dict]:
+    week: List[Optional[dict]] = [None] * days
+    for day in range(days):
+        week[day] = compose_day(week, day, target_calories, constraints)
+    return week
+
+def revise_week(week: List[dict], target_calories: float, constraints: dict) -> Tuple[List[dict], List[int]]:
+    """Bring a stored week in line with new targets, touching as little as possible.
+
+    Days whose meals break the new constraints are re-planned around the
+    others; days that still comply keep their meals and are only re-portioned
+    if the calorie target moved. Returns the week and the changed day indices.
+    """
+    week = list(week)
+    changed = []
+    for day, plan in enumerate(week):
+        if not day_satisfies(plan, constraints):
+            week[day] = compose_day(week, day, target_calories, constraints)
+            changed.append(day)
+        elif plan["target_calories"] != round(target_calories):
+            meals = [_plan_meal(meal["index"], meal["slot"], target_calories * SLOT_SPLIT[meal["slot"]]) for meal in plan["meals"]]
+            week[day] = balance_day(meals, target_calories)
+            changed.append(day)
+    return week, changed
+
+def swap_meal(week: List[dict], day: int, slot: str, target_calories: float, constraints: dict) -> dict:
+    """`week[day]` with the `slot` meal replaced by the best alternative that
+    keeps the day's constraints and the week's variety rules."""
+    plan = week[day]
+    position = SLOTS.index(slot)
+    current = plan["meals"][position]
+    tags = required_tags(constraints["vegetarian"], constraints["dairy_free"], constraints["vegan"])
+    others = [meal for i, meal in enumerate(plan["meals"]) if i != position]
+    if constraints["non_veg"] and not any("non_veg" in meal["tags"] for meal in others):
+        tags.append("non_veg")
+    slot_target = target_calories * SLOT_SPLIT[slot]
+    exclude = set(week_exclusions(week, day)) | {meal["name"] for meal in plan["meals"]}
+    replacement = (
+        pick_meal(slot, slot_target, tags, constraints["high_protein"], exclude, 0, constraints["forbidden"])
+        if candidates(slot, tags, exclude, constraints["forbidden"])
+        else pick_meal(slot, slot_target, tags, constraints["high_protein"], [current["name"]], 0, constraints["forbidden"])
+    )
+    if replacement is None or replacement["name"] == current["name"]:
+        raise ValueError(f"No other {slot} options satisfy the requested constraints")
+    meals = list(plan["meals"])
+    meals[position] = replacement
+    return balance_day(meals, target_calories)
+
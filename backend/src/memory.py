@@ -0,0 +1,257 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config import (
+    CONVERSATION_BACKEND,
+    CONVERSATION_DB_PATH,
+    CONVERSATION_MEMORY_MAX_USERS,
+    CONVERSATION_MESSAGE_MAX_CHARS,
+    CONVERSATION_SUMMARY_MAX_CHARS,
+    CONVERSATION_WINDOW,
+    REDIS_URL,
+)
+
+Message = Dict[str, str]
+
+# Per-user writes serialize on one of a fixed set of locks picked by hash, so
+# the lock table stays this size however many users are seen.
+LOCK_STRIPES = 64
+
+def extractive_summary(previous: str, messages: List[Message], max_chars: int) -> str:
+    """Fold `messages` into `previous` by keeping the first sentence of each turn.
+
+    Cheap and deterministic; the oldest lines are dropped once `max_chars` is hit.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0][:160]
+        lines.append(f"{message['role']}: {first}")
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+class ConversationStore(ABC):
+    """Append-only conversation log per user with a bounded verbatim window.
+
+    Once more than `2 * window` messages are unsummarized, everything but the
+    last `window` is folded into a rolling summary, so what `load` returns
+    stays roughly constant in size no matter how long the conversation gets.
+    Subclasses provide storage.
+    """
+
+    def __init__(
+        self,
+        window: int = CONVERSATION_WINDOW,
+        summary_max_chars: int = CONVERSATION_SUMMARY_MAX_CHARS,
+        message_max_chars: int = CONVERSATION_MESSAGE_MAX_CHARS,
+        summarizer: Optional[Callable[[str, List[Message], int], str]] = None,
+    ):
+        self.window = window
+        self.summary_max_chars = summary_max_chars
+        self.message_max_chars = message_max_chars
+        self.summarizer = summarizer or extractive_summary
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock(self, user_id: str) -> threading.Lock:
+        return self._locks[hash(user_id) % LOCK_STRIPES]
+
+    # Storage primitives; indices are absolute positions in the user's log.
+    @abstractmethod
+    def _append(self, user_id: str, message: Message) -> int: ...
+
+    @abstractmethod
+    def _range(self, user_id: str, start: int, end: Optional[int]) -> List[Message]: ...
+
+    @abstractmethod
+    def _get_meta(self, user_id: str) -> Tuple[str, int]: ...
+
+    @abstractmethod
+    def _set_meta(self, user_id: str, summary: str, summarized_upto: int) -> None: ...
+
+    @abstractmethod
+    def clear(self, user_id: str) -> None: ...
+
+    def append(self, user_id: str, role: str, content: str) -> None:
+        with self._lock(user_id):
+            count = self._append(user_id, {"role": role, "content": content})
+            summary, summarized_upto = self._get_meta(user_id)
+            # Fold in batches of `window` so the summarizer is not run every turn.
+            if count - summarized_upto >= 2 * self.window:
+                fold_upto = count - self.window
+                folded = self._range(user_id, summarized_upto, fold_upto)
+                summary = self.summarizer(summary, folded, self.summary_max_chars)
+                self._set_meta(user_id, summary, fold_upto)
+
+    def append_turn(self, user_id: str, user_query: str, response: str) -> None:
+        self.append(user_id, "user", user_query)
+        if response:
+            self.append(user_id, "assistant", response)
+
+    def load(self, user_id: str) -> dict:
+        """Return `{"summary": str, "messages": [...]}`: the summary plus every
+        message it does not cover (fewer than `2 * window`)."""
+        with self._lock(user_id):
+            summary, summarized_upto = self._get_meta(user_id)
+            messages = self._range(user_id, summarized_upto, None)
+        return {
+            "summary": summary,
+            "messages": [
+                {"role": m["role"], "content": m["content"][:self.message_max_chars]}
+                for m in messages
+            ],
+        }
+
+class _MemoryLog:
+    __slots__ = ("messages", "offset", "summary")
+
+    def __init__(self):
+        self.messages: List[Message] = []
+        self.offset = 0  # absolute index of messages[0]; everything before is summarized
+        self.summary = ""
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store; already-summarised messages are discarded and only
+    the `max_users` most recently active conversations are kept."""
+
+    def __init__(self, max_users: int = CONVERSATION_MEMORY_MAX_USERS, **kwargs):
+        super().__init__(**kwargs)
+        self.max_users = max(1, max_users)
+        self._logs: "OrderedDict[str, _MemoryLog]" = OrderedDict()
+        self._logs_lock = threading.Lock()
+
+    def _log(self, user_id: str, create: bool = False) -> Optional[_MemoryLog]:
+        with self._logs_lock:
+            log = self._logs.get(user_id)
+            if log is None:
+                if not create:
+                    return None
+                log = self._logs[user_id] = _MemoryLog()
+                while len(self._logs) > self.max_users:
+                    self._logs.popitem(last=False)
+            self._logs.move_to_end(user_id)
+            return log
+
+    def _append(self, user_id, message):
+        log = self._log(user_id, create=True)
+        log.messages.append(message)
+        return log.offset + len(log.messages)
+
+    def _range(self, user_id, start, end):
+        log = self._log(user_id)
+        if log is None:
+            return []
+        return list(log.messages[start - log.offset:None if end is None else end - log.offset])
+
+    def _get_meta(self, user_id):
+        log = self._log(user_id)
+        return (log.summary, log.offset) if log is not None else ("", 0)
+
+    def _set_meta(self, user_id, summary, summarized_upto):
+        log = self._log(user_id, create=True)
+        del log.messages[:summarized_upto - log.offset]
+        log.offset = summarized_upto
+        log.summary = summary
+
+    def clear(self, user_id):
+        with self._lock(user_id), self._logs_lock:
+            self._logs.pop(user_id, None)
+
+class SQLiteConversationStore(ConversationStore):
+    """Durable single-node store; the full log is kept for auditing."""
+
+    def __init__(self, path: str = CONVERSATION_DB_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "user_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+                "content TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (user_id, seq))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "user_id TEXT PRIMARY KEY, summary TEXT NOT NULL, summarized_upto INTEGER NOT NULL)"
+            )
+
+    def _append(self, user_id, message):
+        with self._db_lock, self._conn:
+            row = self._conn.execute("SELECT COALESCE(MAX(seq), -1) FROM messages WHERE user_id = ?", (user_id,)).fetchone()
+            seq = row[0] + 1
+            self._conn.execute(
+                "INSERT INTO messages (user_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, seq, message["role"], message["content"], time.time()),
+            )
+        return seq + 1
+
+    def _range(self, user_id, start, end):
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE user_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (user_id, start, end if end is not None else 2 ** 62),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def _get_meta(self, user_id):
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT summary, summarized_upto FROM summaries WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def _set_meta(self, user_id, summary, summarized_upto):
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO summaries (user_id, summary, summarized_upto) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET summary = excluded.summary, summarized_upto = excluded.summarized_upto",
+                (user_id, summary, summarized_upto),
+            )
+
+    def clear(self, user_id):
+        with self._lock(user_id), self._db_lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM summaries WHERE user_id = ?", (user_id,))
+
+class RedisConversationStore(ConversationStore):
+    """Shared store for multi-worker deployments (any Redis-protocol server)."""
+
+    def __init__(self, url: str = REDIS_URL, **kwargs):
+        super().__init__(**kwargs)
+        import redis  # optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def _append(self, user_id, message):
+        return self._redis.rpush(f"conv:{user_id}:log", json.dumps(message))
+
+    def _range(self, user_id, start, end):
+        stop = -1 if end is None else end - 1
+        return [json.loads(m) for m in self._redis.lrange(f"conv:{user_id}:log", start, stop)]
+
+    def _get_meta(self, user_id):
+        meta = self._redis.hgetall(f"conv:{user_id}:meta")
+        return meta.get("summary", ""), int(meta.get("summarized_upto", 0))
+
+    def _set_meta(self, user_id, summary, summarized_upto):
+        self._redis.hset(f"conv:{user_id}:meta", mapping={"summary": summary, "summarized_upto": summarized_upto})
+
+    def clear(self, user_id):
+        self._redis.delete(f"conv:{user_id}:log", f"conv:{user_id}:meta")
+
+def build_conversation_store(backend: str = CONVERSATION_BACKEND) -> ConversationStore:
+    if backend == "sqlite":
+        return SQLiteConversationStore()
+    if backend == "redis":
+        return RedisConversationStore()
+    if backend == "memory":
+        return InMemoryConversationStore()
+    raise ValueError(f"Unknown conversation backend: {backend}")
+
+CONVERSATION_STORE = build_conversation_store()
@@ -1,29 +1,62 @@
 from src.state import AgentState
-from src.config import PINECONE_INDEX
+from src.profile_store import fetch_profile, get_cached_profile, load_profile
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
-def context_retrieval_node(state: AgentState) -> AgentState:
+def _has_context(state: AgentState) -> bool:
+    if state.get("user_context"):
+        logger.debug(f"user_context already populated for {state['user_id']}, skipping profile fetch")
+        return True
+    return False
+
+def _apply_profile(state: AgentState, profile: dict) -> AgentState:
+    user_id = state["user_id"]
+    state["user_context"] = profile
+    if profile:
+        logger.info(f"Successfully retrieved profile for {user_id}: {state['user_context']}")
+    else:
+        logger.warning(f"No profile found for user_id: {user_id}")
+    return state
+
+def _load_profile_into(state: AgentState) -> AgentState:
+    user_id = state["user_id"]
+    if _has_context(state):
+        return state
+    logger.debug(f"Attempting to fetch profile for user_id: {user_id}")
+
+    try:
+        _apply_profile(state, fetch_profile(user_id))
+
+    except Exception as e:
+        logger.error(f"Error fetching Pinecone profile for {user_id}: {str(e)}")
+        state["user_context"] = {}
+
+    logger.debug(f"Updated user_context: {state['user_context']}")
+    return state
+
+async def _aload_profile_into(state: AgentState) -> AgentState:
     user_id = state["user_id"]
+    if _has_context(state):
+        return state
     logger.debug(f"Attempting to fetch profile for user_id: {user_id}")
-    
+
     try:
-        response = PINECONE_INDEX.fetch(ids=[f"{user_id}_profile"])
-        logger.debug(f"Pinecone fetch result for {user_id}: {response}")
-        vectors = response.vectors
-        if vectors and f"{user_id}_profile" in vectors:
-            state["user_context"] = vectors[f"{user_id}_profile"].metadata
-            #print(state["user_context"])
-            logger.info(f"Successfully retrieved profile for {user_id}: {state['user_context']}")
-        else:
-            logger.warning(f"No profile found for user_id: {user_id} in vectors: {vectors}")
-            print(f"No profile found for user_id: {user_id}")
-            state["user_context"] = {}
-            
+        profile = get_cached_profile(user_id)
+        if profile is None:
+            profile = await asyncio.to_thread(load_profile, user_id)
+        _apply_profile(state, profile)
     except Exception as e:
         logger.error(f"Error fetching Pinecone profile for {user_id}: {str(e)}")
         state["user_context"] = {}
-    
+
     logger.debug(f"Updated user_context: {state['user_context']}")
-    return state
\ No newline at end of file
+    return state
+
+def context_retrieval_node(state: AgentState) -> AgentState:
+    return _load_profile_into(state)
+
+async def context_retrieval_node_async(state: AgentState) -> AgentState:
+    """Async variant: only a profile cache miss pays for a Pinecone fetch, off the event loop."""
+    return await _aload_profile_into(state)
@@ -0,0 +1,57 @@
+from src.state import AgentState
+from src.config import INTENT_CONFIDENCE_THRESHOLD, INTENT_ROUTER_ENABLED
+from src.intent import route
+from src.memory import CONVERSATION_STORE
+from src.nodes.llm import REQUIRED_FIELDS
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MISSING_CONTEXT_RESPONSE = "Please provide your age, gender, height, weight, preferences, restrictions, and goal."
+
+def _tool_args(intent: dict, user_context: dict) -> dict:
+    if intent["intent"] == "diet_recommendations":
+        return {field: str(user_context.get(field, "")) for field in REQUIRED_FIELDS}
+    if intent["intent"] == "recipe_fetcher":
+        return {
+            "recipe_name": intent["dish"],
+            "preferences": user_context.get("preferences", ""),
+            "restrictions": user_context.get("restrictions", ""),
+        }
+    return {"dish_name": intent["dish"]}
+
+def _classify(state: AgentState):
+    return route(state["user_query"], INTENT_CONFIDENCE_THRESHOLD) if INTENT_ROUTER_ENABLED else None
+
+def _apply_intent(state: AgentState, intent: dict, memory: dict) -> AgentState:
+    logger.debug(f"Fast-path intent {intent['intent']} ({intent['confidence']:.2f}) for: {state['user_query']}")
+    user_context = state["user_context"]
+    state["conversation_history"] = memory["messages"]
+    state["conversation_history"].append({"role": "user", "content": state["user_query"]})
+
+    if intent["intent"] == "diet_recommendations" and all(user_context.get(field, "") == "" for field in REQUIRED_FIELDS):
+        state["tool_calls"] = []
+        state["response"] = MISSING_CONTEXT_RESPONSE
+        return state
+
+    tool_args = _tool_args(intent, user_context)
+    state["tool_calls"] = [{"name": intent["intent"], "args": tool_args}]
+    state["tool_outputs"] = [{"tool": intent["intent"], "args": tool_args}]
+    return state
+
+def intent_router_node(state: AgentState) -> AgentState:
+    """Send confidently classified queries straight to their tool, skipping the
+    tool-selection LLM call; anything else is left for llm_node."""
+    intent = _classify(state)
+    if intent is None:
+        return state
+    return _apply_intent(state, intent, CONVERSATION_STORE.load(state["user_id"]))
+
+async def intent_router_node_async(state: AgentState) -> AgentState:
+    """Async variant: classification is CPU-only, but the history load may hit
+    SQLite or Redis, so it runs in a worker thread."""
+    intent = _classify(state)
+    if intent is None:
+        return state
+    return _apply_intent(state, intent, await asyncio.to_thread(CONVERSATION_STORE.load, state["user_id"]))
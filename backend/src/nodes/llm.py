@@ -1,51 +1,74 @@
-import json
 from src.state import AgentState
-from src.config import LLM
-from langchain_core.prompts import ChatPromptTemplate
+from src.config import get_llm
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from src.memory import CONVERSATION_STORE
 from src.tools import TOOLS
+from src.streaming import STREAM_TAG
+import asyncio
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-def llm_node(state: AgentState) -> AgentState:
-    llm_with_tools = LLM.bind_tools(TOOLS)
-    
+# Static instructions: identical for every user and turn, so they are not templated.
+SYSTEM_PROMPT = """
+    You are a diet assistant with access to user context.
+    Based on the query, select the appropriate action:
+    - For meal plans or diet advice (e.g., "meal plan", "diet for weight loss"), call 'diet_recommendations' with the age, gender, height, weight, preferences, restrictions and goal from the user profile.
+    - For recipe requests (e.g., "recipe for lasagna"), call 'recipe_fetcher' with the dish name and the preferences and restrictions from the user profile.
+    - For nutritional info (e.g., "calories in pizza"), call 'nut_content_fetcher' with the dish name.
+    - If any profile field is empty for 'diet_recommendations', respond: "Please provide your age, gender, height, weight, preferences, restrictions, and goal."
+    - For general questions, respond conversationally without tools.
+    Do NOT bundle the context into a single 'input_data' string; use individual key-value pairs as arguments.
+"""
+
+# Compiled once; only the per-user variables below are filled in each turn.
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    ("system", "User profile: Age: {age}, Gender: {gender}, Height: {height}, Weight: {weight}, "
+               "Preferences: {preferences}, Restrictions: {restrictions}, Goal: {goal}."),
+    ("system", "Summary of earlier conversation (may be empty):\n{conversation_summary}"),
+    ("system", "Earlier results for this user related to the query (may be empty). If one already answers "
+               "the query, reuse it instead of calling a tool again:\n{retrieved_context}"),
+    MessagesPlaceholder("history"),
+    ("user", "{user_query}")
+])
+
+REQUIRED_FIELDS = ["age", "gender", "height", "weight", "preferences", "restrictions", "goal"]
+
+_model_with_tools = None
+_model_lock = threading.Lock()
+
+def get_model_with_tools():
+    """The chat model with the tool schemas bound, built on first use and shared by every turn."""
+    global _model_with_tools
+    if _model_with_tools is None:
+        with _model_lock:
+            if _model_with_tools is None:
+                _model_with_tools = get_llm().bind_tools(TOOLS)
+    return _model_with_tools
+
+def _prepare(state: AgentState, memory: dict):
     user_context = state["user_context"].copy()
-    required_fields = ["age", "gender", "height", "weight", "preferences", "restrictions", "goal"]
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in user_context:
             user_context[field] = ""
     
-    context_missing = all(user_context[field] == "" for field in required_fields)
+    context_missing = all(user_context[field] == "" for field in REQUIRED_FIELDS)
+
+    state["conversation_history"] = memory["messages"]
+
+    formatted_prompt = PROMPT.format_messages(
+        **{field: str(user_context[field]) for field in REQUIRED_FIELDS},
+        user_query=state["user_query"],
+        conversation_summary=memory["summary"],
+        retrieved_context=state.get("retrieved_context", ""),
+        history=[(msg["role"], msg["content"]) for msg in state["conversation_history"]]
+    )
+    return get_model_with_tools(), formatted_prompt, user_context, context_missing
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-            You are a diet assistant with access to user context.
-            User profile: Age: {age}, Gender: {gender}, Height: {height}, Weight: {weight}, Preferences: {preferences}, Restrictions: {restrictions}, Goal: {goal}.
-            Based on the query, select the appropriate action:
-            - For meal plans or diet advice (e.g., "meal plan", "diet for weight loss"), call 'diet_recommendations' with arguments: {{"age": {age}, "gender": "{gender}", "height": "{height}", "weight": {weight}, "preferences": "{preferences}", "restrictions": "{restrictions}", "goal": "{goal}"}}.
-            - For recipe requests (e.g., "recipe for lasagna"), call 'recipe_fetcher' with the dish name and include preferences: "{preferences}", restrictions: "{restrictions}".
-            - For nutritional info (e.g., "calories in pizza"), call 'nut_content_fetcher' with the dish name.
-            - If any context field is empty for 'diet_recommendations', respond: "Please provide your age, gender, height, weight, preferences, restrictions, and goal."
-            - For general questions, respond conversationally without tools.
-            Do NOT bundle the context into a single 'input_data' string; use individual key-value pairs as arguments.
-        """),
-        *[(msg["role"], msg["content"]) for msg in state["conversation_history"]],
-        ("user", "{user_query}")
-    ])
-    print("I am being executed blud")
-    formatted_prompt = prompt.format_messages(
-    age=str(state["user_context"]["age"]),  # Convert float to string
-    gender=state["user_context"]["gender"],
-    height=state["user_context"]["height"],
-    weight=str(state["user_context"]["weight"]),
-    preferences=state["user_context"]["preferences"],
-    restrictions=state["user_context"]["restrictions"],
-    goal=state["user_context"]["goal"],
-    user_query=state["user_query"]
-)
-    response = llm_with_tools.invoke(formatted_prompt)
-    logger.debug(f"LLM response: {response}")
+def _apply_response(state: AgentState, response, user_context: dict, context_missing: bool) -> AgentState:
+    logger.debug("LLM response: %s", response)
     
     state["tool_calls"] = []  # Initialize tool_calls to an empty list
 
@@ -77,3 +100,16 @@ def llm_node(state: AgentState) -> AgentState:
         state["conversation_history"].append({"role": "assistant", "content": state["response"]})
     
     return state
+
+def llm_node(state: AgentState) -> AgentState:
+    memory = CONVERSATION_STORE.load(state["user_id"])
+    llm_with_tools, formatted_prompt, user_context, context_missing = _prepare(state, memory)
+    response = llm_with_tools.invoke(formatted_prompt, config={"tags": [STREAM_TAG]})
+    return _apply_response(state, response, user_context, context_missing)
+
+async def llm_node_async(state: AgentState) -> AgentState:
+    # The store may hit SQLite or Redis; keep that off the event loop.
+    memory = await asyncio.to_thread(CONVERSATION_STORE.load, state["user_id"])
+    llm_with_tools, formatted_prompt, user_context, context_missing = _prepare(state, memory)
+    response = await llm_with_tools.ainvoke(formatted_prompt, config={"tags": [STREAM_TAG]})
+    return _apply_response(state, response, user_context, context_missing)
@@ -1,37 +1,61 @@
 from src.state import AgentState
-from src.config import PINECONE_INDEX, EMBEDDER
+from src.persistence import TOOL_RESULT_QUEUE
 import logging
 import json
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def pinecone_storage_node(state: AgentState) -> AgentState:
+def _failed(result) -> bool:
+    """Errors are not worth recalling: tool_router and nut_content_fetcher report
+    them as "Error ..." strings, recipe_fetcher with status "error"."""
+    if isinstance(result, str):
+        return result.lstrip().startswith("Error")
+    return isinstance(result, dict) and result.get("status") == "error"
+
+def _build_records(user_id: str, tool_outputs: list) -> list:
+    """Return `(vector_id, text_to_embed, metadata)` tuples for the successful tool outputs."""
+    timestamp = int(datetime.now().timestamp())
+    records = []
+    for position, output in enumerate(tool_outputs):
+        tool_name = output["tool"]
+        result = output["result"]
+        if _failed(result):
+            continue
+        # The position keeps ids unique when one turn calls the same tool twice.
+        vector_id = f"{user_id}_{tool_name}_{timestamp}_{position}"
+
+        result_text = json.dumps(result) if isinstance(result, dict) else str(result)
+
+        metadata = {
+            "user_id": user_id,
+            "type": f"{tool_name}_result",
+            "timestamp": timestamp,
+            "result": result_text
+        }
+        records.append((vector_id, result_text, metadata))
+    return records
+
+def _enqueue(state: AgentState, block: bool) -> AgentState:
     user_id = state["user_id"]
     tool_outputs = state["tool_outputs"]
-    
+
     if tool_outputs:
         try:
-            for output in tool_outputs:
-                tool_name = output["tool"]
-                result = output["result"]
-                timestamp = int(datetime.now().timestamp())
-                vector_id = f"{user_id}_{tool_name}_{timestamp}"
-                
-                result_text = json.dumps(result) if isinstance(result, dict) else str(result)
-                embedding = EMBEDDER.embed_query(result_text)
-                
-                metadata = {
-                    "user_id": user_id,
-                    "type": f"{tool_name}_result",
-                    "timestamp": timestamp,
-                    "result": result_text
-                }
-                
-                PINECONE_INDEX.upsert(vectors=[(vector_id, embedding, metadata)])
-                logger.debug(f"Stored {tool_name} result for user {user_id}: {vector_id}")
-                
+            records = _build_records(user_id, tool_outputs)
+            queued = sum(TOOL_RESULT_QUEUE.enqueue(record, block=block) for record in records)
+            logger.debug(f"Queued {queued}/{len(records)} tool results for user {user_id}")
+
         except Exception as e:
-            logger.error(f"Error storing tool outputs for {user_id}: {str(e)}")
-    
-    return state
\ No newline at end of file
+            logger.error(f"Error queueing tool outputs for {user_id}: {str(e)}")
+
+    return state
+
+def pinecone_storage_node(state: AgentState) -> AgentState:
+    """Hand tool outputs to the write-behind queue; embedding and upsert happen
+    in the background so the response never waits on the vector store."""
+    return _enqueue(state, block=True)
+
+async def pinecone_storage_node_async(state: AgentState) -> AgentState:
+    # Never block the event loop on a full queue; overflow is dropped and counted.
+    return _enqueue(state, block=False)
@@ -1,78 +1,116 @@
 from src.state import AgentState
+from src.memory import CONVERSATION_STORE
+from langchain_core.callbacks.manager import adispatch_custom_event
+from typing import Iterator
+import asyncio
+import logging
 
-def response_formatter_node(state: AgentState) -> AgentState:
-    print(f"DEBUG: Entering response_formatter with tool_outputs: {state['tool_outputs']}")
-    
-    if state.get("response"):
-        print(f"DEBUG: Response already set: {state['response']}")
-        return state
-    
-    if state["tool_outputs"]:
-        response_parts = []
-        for output in state["tool_outputs"]:
-            print("OUTPUT:", output)
-            tool_name = output["tool"]
-            result = output["result"]
-            print(f"DEBUG: Processing output for tool: {tool_name}, result: {result}")
-            
-            if tool_name == "diet_recommendations":
-                if isinstance(result, dict) and "daily_calories" in result and "meal_plan" in result:
-                    meal_plan = result["meal_plan"].strip()
-                    if meal_plan and not meal_plan.lower().startswith(("error", "unable")):
-                        response_parts.append(
-                            f"### Meal Plan\n\n"
-                            f"Recommended daily calories: {result['daily_calories']}\n\n"
-                            f"{meal_plan}"
-                        )
-                    else:
-                        print(f"DEBUG: Invalid meal plan content: {meal_plan}")
-                        response_parts.append(
-                            f"### Meal Plan\n\n"
-                            f"Recommended daily calories: N/A\n\n"
-                            f"Unable to generate a valid meal plan."
-                        )
+logger = logging.getLogger(__name__)
+
+SECTION_EVENT = "response_section"
+
+def format_sections(tool_outputs: list) -> Iterator[str]:
+    """Yield one formatted markdown section per tool output, in order."""
+    for output in tool_outputs:
+        tool_name = output["tool"]
+        result = output["result"]
+        logger.debug("Processing output for tool: %s, result: %s", tool_name, result)
+        
+        if tool_name == "diet_recommendations":
+            if isinstance(result, dict) and "daily_calories" in result and "meal_plan" in result:
+                meal_plan = result["meal_plan"].strip()
+                if meal_plan and not meal_plan.lower().startswith(("error", "unable")):
+                    yield (
+                        f"### Meal Plan\n\n"
+                        f"Recommended daily calories: {result['daily_calories']}\n\n"
+                        f"{meal_plan}"
+                    )
                 else:
-                    print(f"DEBUG: Invalid diet tool result format: {result}")
-                    response_parts.append(
+                    logger.warning(f"Invalid meal plan content: {meal_plan}")
+                    yield (
                         f"### Meal Plan\n\n"
                         f"Recommended daily calories: N/A\n\n"
-                        f"No valid plan found."
+                        f"Unable to generate a valid meal plan."
+                    )
+            else:
+                logger.warning(f"Invalid diet tool result format: {result}")
+                yield (
+                    f"### Meal Plan\n\n"
+                    f"Recommended daily calories: N/A\n\n"
+                    f"No valid plan found."
+                )
+        elif tool_name == "recipe_fetcher":
+            if isinstance(result, dict) and "content" in result:
+                content = result["content"].strip()
+                if result.get("awaiting_confirmation", False):
+                    yield (
+                        f"### Recipe Confirmation\n\n"
+                        f"{content}"
+                    )
+                elif result.get("status") == "error":
+                    yield (
+                        f"### Recipe\n\n"
+                        f"Error: {content}"
                     )
-            elif tool_name == "recipe_fetcher":
-                if isinstance(result, dict) and "content" in result:
-                    content = result["content"].strip()
-                    if result.get("awaiting_confirmation", False):
-                        response_parts.append(
-                            f"### Recipe Confirmation\n\n"
-                            f"{content}"
-                        )
-                    elif result.get("status") == "error":
-                        response_parts.append(
-                            f"### Recipe\n\n"
-                            f"Error: {content}"
-                        )
-                    else:
-                        response_parts.append(
-                            f"### Recipe\n\n"
-                            f"{content}"
-                        )
                 else:
-                    print(f"DEBUG: Invalid recipe result format: {result}")
-                    response_parts.append(
+                    yield (
                         f"### Recipe\n\n"
-                        f"Error: No valid recipe found."
+                        f"{content}"
                     )
-            elif tool_name == "nut_content_fetcher":
-                response_parts.append(
-                    #f"### Nutritional Content\n\n"
-                    f"{str(result)}"
+            else:
+                logger.warning(f"Invalid recipe result format: {result}")
+                yield (
+                    f"### Recipe\n\n"
+                    f"Error: No valid recipe found."
                 )
-    
+        elif tool_name == "nut_content_fetcher":
+            yield (
+                #f"### Nutritional Content\n\n"
+                f"{str(result)}"
+            )
+
+def _remember(state: AgentState) -> None:
+    """Persist the finished turn; the next llm_node call reads it back."""
+    try:
+        CONVERSATION_STORE.append_turn(state["user_id"], state["user_query"], state["response"])
+    except Exception as e:
+        logger.error(f"Failed to persist conversation turn: {str(e)}")
+
+def _finish(state: AgentState, response_parts: list) -> AgentState:
+    if state["tool_outputs"]:
         state["response"] = "\n\n".join(response_parts)
     else:
-        print("DEBUG: No tool outputs received")
+        logger.debug("No tool outputs received")
         state["response"] = "I don't have enough information to answer. Can you clarify?"
-    
+
     state["conversation_history"].append({"role": "assistant", "content": state["response"]})
-    print(f"DEBUG: Final response: {state['response']}")
-    return state
\ No newline at end of file
+    logger.debug("Final response: %s", state["response"])
+    return state
+
+def response_formatter_node(state: AgentState) -> AgentState:
+    logger.debug("Entering response_formatter with tool_outputs: %s", state["tool_outputs"])
+
+    if state.get("response"):
+        logger.debug("Response already set: %s", state["response"])
+        _remember(state)
+        return state
+
+    state = _finish(state, list(format_sections(state["tool_outputs"])))
+    _remember(state)
+    return state
+
+async def response_formatter_node_async(state: AgentState) -> AgentState:
+    """Async variant: each section is also emitted as a custom event as soon as
+    it is formatted, so streaming clients can render incrementally."""
+    if state.get("response"):
+        await adispatch_custom_event(SECTION_EVENT, {"content": state["response"]})
+        await asyncio.to_thread(_remember, state)
+        return state
+
+    response_parts = []
+    for section in format_sections(state["tool_outputs"]):
+        response_parts.append(section)
+        await adispatch_custom_event(SECTION_EVENT, {"content": section})
+    state = _finish(state, response_parts)
+    await asyncio.to_thread(_remember, state)
+    return state
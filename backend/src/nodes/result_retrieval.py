@@ -0,0 +1,24 @@
+from src.state import AgentState
+from src.retrieval import retrieve_context
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _retrieve(state: AgentState) -> str:
+    """Earlier tool results relevant to this query; retrieval failures never fail the turn."""
+    try:
+        return retrieve_context(state["user_id"], state["user_query"])
+    except Exception as e:
+        logger.error(f"Error retrieving earlier results for {state['user_id']}: {str(e)}")
+        return ""
+
+def result_retrieval_node(state: AgentState) -> AgentState:
+    """Only on the llm branch: fast-path turns never read the retrieved context,
+    so they skip the embedding call and index query."""
+    state["retrieved_context"] = _retrieve(state)
+    return state
+
+async def result_retrieval_node_async(state: AgentState) -> AgentState:
+    state["retrieved_context"] = await asyncio.to_thread(_retrieve, state)
+    return state
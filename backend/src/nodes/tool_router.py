@@ -1,62 +1,161 @@
 from src.state import AgentState
 from src.tools import TOOLS
+from src.config import TOOL_COALESCING_ENABLED, TOOL_MAX_ABANDONED, TOOL_MAX_CONCURRENCY, TOOL_TIMEOUT_SECONDS, TOOL_TIMEOUTS
+from src.singleflight import TOOL_FLIGHTS, call_key
+from src.tool_pool import ToolPool
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import asyncio
+import contextvars
+import copy
+import time
 import traceback
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared across requests so the total number of in-flight tool threads stays
+# bounded; a call whose caller timed out gives its slot back (see ToolPool).
+_EXECUTOR = ToolPool(TOOL_MAX_CONCURRENCY, TOOL_MAX_ABANDONED, thread_name_prefix="tool")
+
+def _timeout_for(tool_name: str) -> float:
+    return TOOL_TIMEOUTS.get(tool_name, TOOL_TIMEOUT_SECONDS)
+
+def _submit(tool, args: dict):
+    """Start `tool` on the shared pool, joining an identical in-flight call if
+    coalescing is on. Returns (future, coalescing key or None, shared)."""
+    run = contextvars.copy_context().run
+    if not TOOL_COALESCING_ENABLED:
+        return _EXECUTOR.submit(run, tool.invoke, args), None, False
+    key = call_key(tool.name, args)
+    future, shared = TOOL_FLIGHTS.submit(key, _EXECUTOR, run, tool.invoke, args, label=tool.name)
+    return future, key, shared
+
+def _abandon(future, key) -> None:
+    """Stop waiting on a call; its pool slot is freed unless another request
+    still waits on the same coalesced call."""
+    if key is None or TOOL_FLIGHTS.abandon(key, future):
+        _EXECUTOR.release(future)
+
+def _to_output(tool_name: str, result) -> dict:
+    if tool_name == "diet_recommendations" and isinstance(result, dict):
+        return {
+            "tool": tool_name,
+            "result": result
+        }
+    elif tool_name == "recipe_fetcher":
+        return {
+            "tool": tool_name,
+            "result": result["result"] if isinstance(result, dict) and "result" in result else "Error: Content not found"
+        }
+    result_str = str(result) if not isinstance(result, str) else result
+    return {
+        "tool": tool_name,
+        "result": result_str
+    }
+
+def _error_output(tool_name: str, e: Exception) -> dict:
+    error_message = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+    logger.error(f"Tool error: {str(e)}, Traceback: {error_message}")
+    return {
+        "tool": tool_name,
+        "result": f"Error executing tool: {str(e)}. Details: {error_message}"
+    }
+
+def _timeout_output(tool_name: str, timeout: float) -> dict:
+    logger.error(f"Tool {tool_name} timed out after {timeout}s")
+    return {
+        "tool": tool_name,
+        "result": f"Error executing tool: {tool_name} timed out after {timeout:.0f} seconds."
+    }
+
+def _not_found_output(tool_name: str) -> dict:
+    return {
+        "tool": tool_name,
+        "result": f"Error: Tool '{tool_name}' not found."
+    }
+
 def tool_router_node(state: AgentState) -> AgentState:
-    
+    """Run all requested tools concurrently on the shared pool.
+
+    Outputs keep the order of `state["tool_calls"]`; a failing or timed-out
+    tool yields an error entry without discarding the others' results.
+    Identical calls already running for another request are joined rather
+    than repeated.
+    """
     logger.debug(f"Running tool_router with tool_calls: {state['tool_calls']}")
-    print(f"Running tool_router with tool_calls: {state['tool_calls']}")
-    tool_outputs = []
-    
     tool_map = {tool.name: tool for tool in TOOLS}
-    
+
+    pending = []
     for call in state["tool_calls"]:
         tool_name = call["name"]
         args = call["args"]
-        #print(args)
         logger.debug(f"Executing tool: {tool_name} with args: {args}")
-        
+        tool = tool_map.get(tool_name)
+        if not tool:
+            pending.append((tool_name, None, None, False, None))
+            continue
+        future, key, shared = _submit(tool, args)
+        pending.append((tool_name, future, key, shared, time.monotonic() + _timeout_for(tool_name)))
+
+    tool_outputs = []
+    for tool_name, future, key, shared, deadline in pending:
+        if future is None:
+            tool_outputs.append(_not_found_output(tool_name))
+            continue
         try:
-            tool = tool_map.get(tool_name)
-            if not tool:
-                tool_outputs.append({
-                    "tool": tool_name,
-                    "result": f"Error: Tool '{tool_name}' not found."
-                })
-                continue
-            
-            result = tool.invoke(args)
-            #print(f"Tool {tool_name} raw result: {result}")
-            logger.debug(f"Tool {tool_name} raw result: {result}")
-            
-            if tool_name == "diet_recommendations" and isinstance(result, dict):
-                tool_outputs.append({
-                    "tool": tool_name,
-                    "result": result
-                })
-            elif tool_name == "recipe_fetcher":
-                tool_outputs.append({
-                    "tool": tool_name,
-                    "result": result["result"] if isinstance(result, dict) and "result" in result else "Error: Content not found"
-                })
-            else:
-                result_str = str(result) if not isinstance(result, str) else result
-                tool_outputs.append({
-                    "tool": tool_name,
-                    "result": result_str
-                })
-                
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            logger.debug("Tool %s raw result: %s", tool_name, result)
+            # Joined callers get their own copy of the leader's result.
+            tool_outputs.append(_to_output(tool_name, copy.deepcopy(result) if shared else result))
+        except FutureTimeoutError:
+            _abandon(future, key)
+            tool_outputs.append(_timeout_output(tool_name, _timeout_for(tool_name)))
         except Exception as e:
-            error_message = traceback.format_exc()
-            tool_outputs.append({
-                "tool": tool_name,
-                "result": f"Error executing tool: {str(e)}. Details: {error_message}"
-            })
-            logger.error(f"Tool error: {str(e)}, Traceback: {error_message}")
-    
+            tool_outputs.append(_error_output(tool_name, e))
+
     state["tool_outputs"] = tool_outputs  # Update state with the new tool_outputs
-    logger.debug(f"Tool outputs: {state['tool_outputs']}")
+    logger.debug("Tool outputs: %s", state["tool_outputs"])
+    return state
+
+async def _arun_tool(tool_map: dict, call: dict, semaphore: asyncio.Semaphore) -> dict:
+    tool_name = call["name"]
+    args = call["args"]
+    tool = tool_map.get(tool_name)
+    if not tool:
+        return _not_found_output(tool_name)
+
+    logger.debug(f"Executing tool: {tool_name} with args: {args}")
+    timeout = _timeout_for(tool_name)
+    async with semaphore:
+        future, key, shared = _submit(tool, args)
+        try:
+            # shield: a timeout must not cancel a call other requests share.
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout)
+            if shared:
+                result = copy.deepcopy(result)
+        except asyncio.TimeoutError:
+            _abandon(future, key)
+            return _timeout_output(tool_name, timeout)
+        except asyncio.CancelledError:
+            _abandon(future, key)
+            raise
+        except Exception as e:
+            return _error_output(tool_name, e)
+    logger.debug("Tool %s raw result: %s", tool_name, result)
+    return _to_output(tool_name, result)
+
+async def tool_router_node_async(state: AgentState) -> AgentState:
+    """Async variant: tools run on the same shared pool and are awaited
+    concurrently, each under its own timeout. A timed-out call gives its pool
+    slot back unless another request is waiting on the same coalesced call."""
+    logger.debug(f"Running tool_router with tool_calls: {state['tool_calls']}")
+    tool_map = {tool.name: tool for tool in TOOLS}
+    semaphore = asyncio.Semaphore(TOOL_MAX_CONCURRENCY)
+
+    tool_outputs = await asyncio.gather(
+        *(_arun_tool(tool_map, call, semaphore) for call in state["tool_calls"])
+    )
+
+    state["tool_outputs"] = list(tool_outputs)
+    logger.debug("Tool outputs: %s", state["tool_outputs"])
     return state
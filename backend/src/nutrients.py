@@ -0,0 +1,370 @@
+import csv
+import difflib
+import logging
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import NUTRIENT_DB_PATH
+from src.response_cache import normalize_dish
+
+logger = logging.getLogger(__name__)
+
+NUTRIENTS_PATH = NUTRIENT_DB_PATH or os.path.join(os.path.dirname(__file__), "data", "nutrients.csv")
+NUTRIENTS = ("kcal", "protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g", "sodium_mg")
+KINDS = ("dish", "food")
+
+FUZZY_CUTOFF = 0.88
+MIN_RECIPE_COVERAGE = 0.8
+MIN_RECIPE_NAME_SCORE = 0.85
+RECIPE_SERVINGS = 4
+DEFAULT_CUP_G = 240.0
+
+# Preparation words that don't change what the food is.
+_PREP = {
+    "diced", "minced", "sliced", "grated", "crushed", "cubed", "shredded", "halved", "peeled",
+    "finely", "roughly", "thinly", "large", "small", "medium", "boneless", "skinless", "organic", "raw",
+}
+_QUERY_FILLER = re.compile(r"\b(how many|how much|calories|calorie|kcal|macros|macro|nutrients|nutrient|facts|info|(protein|carbs|fat) in|in)\b")
+
+_FRACTIONS = {"½": " 1/2", "¼": " 1/4", "¾": " 3/4", "⅓": " 1/3", "⅔": " 2/3", "⅛": " 1/8"}
+_QUANTITY = re.compile(r"^\s*(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?(?:\s*-\s*\d+(?:\.\d+)?)?)\s*(.*)$")
+_MASS_G = {"g": 1, "gram": 1, "gr": 1, "kg": 1000, "kilogram": 1000, "mg": 0.001, "oz": 28.35, "ounce": 28.35, "lb": 453.6, "pound": 453.6}
+_VOLUME_ML = {
+    "ml": 1, "millilitre": 1, "milliliter": 1, "cl": 10, "dl": 100, "l": 1000, "litre": 1000, "liter": 1000,
+    "tsp": 5, "teaspoon": 5, "tbsp": 15, "tbs": 15, "tblsp": 15, "tablespoon": 15, "cup": DEFAULT_CUP_G,
+    "pinch": 0.4, "dash": 0.6, "splash": 5,
+}
+_FIXED_G = {"can": 400, "tin": 400, "handful": 30, "knob": 15, "bunch": 30, "sprig": 1, "packet": 200}
+_PIECES = {"clove", "slice", "piece", "fillet", "breast", "thigh", "leg", "rasher", "whole", "stalk", "head", "ball", "cube"}
+_SIZES = {"small": 0.7, "medium": 1.0, "large": 1.3, "big": 1.3}
+_UNQUANTIFIED = re.compile(r"^(to taste|to serve|to garnish|for garnish|garnish|as needed|as required|for frying|to fry|drizzle|sprinkling|dusting)?$")
+_ITEM_SPLIT = re.compile(r",|\+|&|\band\b|\bwith\b")
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("ves"):
+        return word[:-3] + "f"
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def normalize_food(name: str) -> str:
+    """Lookup key for a food or dish: `normalize_dish`, without preparation words, singular."""
+    return " ".join(_singular(word) for word in normalize_dish(name).split() if word not in _PREP)
+
+def _quantity(text: str) -> float:
+    text = text.strip()
+    if "-" in text:
+        low, high = (float(part) for part in text.split("-"))
+        return (low + high) / 2
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+def _unit(word: str) -> str:
+    word = word.strip(".").lower()
+    return word if word in _MASS_G or word in _VOLUME_ML else _singular(word)
+
+class NutrientTable:
+    """Per-100 g nutrient values for foods and prepared dishes, held column-wise
+    in NumPy arrays (`values` has one column per name in `NUTRIENTS`).
+
+    Loads from the bundled CSV or from a compiled `.npz` (see `save`). Names
+    and aliases are looked up exactly, then by their trailing words (so
+    "red kidney beans" finds "kidney beans"), then by close spelling.
+    """
+
+    def __init__(self, names: List[str], aliases: List[List[str]], kinds: List[str], values: np.ndarray,
+                 serving_g: np.ndarray, piece_g: np.ndarray, cup_g: np.ndarray):
+        self.names = names
+        self.aliases = aliases
+        self.kinds = kinds
+        self.values = values
+        self.serving_g = serving_g
+        self.piece_g = piece_g
+        self.cup_g = cup_g
+        self._index: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        for row, (name, extra, kind) in enumerate(zip(names, aliases, kinds)):
+            for alias in (name, *extra):
+                self._index[kind].setdefault(normalize_food(alias), row)
+        self._keys = {kind: list(index) for kind, index in self._index.items()}
+
+    @classmethod
+    def load(cls, path: str) -> "NutrientTable":
+        if path.endswith(".npz"):
+            data = np.load(path, allow_pickle=False)
+            return cls(
+                data["names"].tolist(),
+                [aliases.split(";") if aliases else [] for aliases in data["aliases"].tolist()],
+                data["kinds"].tolist(),
+                data["values"],
+                data["serving_g"],
+                data["piece_g"],
+                data["cup_g"],
+            )
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+
+        def column(name: str) -> np.ndarray:
+            return np.array([float(row[name]) if row[name] else np.nan for row in rows], dtype=np.float32)
+
+        return cls(
+            [row["name"] for row in rows],
+            [[alias for alias in row["aliases"].split(";") if alias] for row in rows],
+            [row["kind"] for row in rows],
+            np.stack([column(name) for name in NUTRIENTS], axis=1),
+            column("serving_g"),
+            column("piece_g"),
+            column("cup_g"),
+        )
+
+    def save(self, path: str) -> None:
+        """Write the compact columnar form loaded by `load(path)` for `.npz` paths."""
+        np.savez_compressed(
+            path,
+            names=np.array(self.names),
+            aliases=np.array([";".join(aliases) for aliases in self.aliases]),
+            kinds=np.array(self.kinds),
+            values=self.values,
+            serving_g=self.serving_g,
+            piece_g=self.piece_g,
+            cup_g=self.cup_g,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str, kinds: Sequence[str] = KINDS, partial: bool = False) -> Optional[int]:
+        """Row for `name`, preferring earlier `kinds`. `partial` also tries the
+        trailing words, which suits recipe ingredients but not dish names
+        ("chocolate milk" is not milk)."""
+        key = normalize_food(name)
+        if not key:
+            return None
+        for kind in kinds:
+            if key in self._index[kind]:
+                return self._index[kind][key]
+        if partial:
+            words = key.split()
+            for start in range(1, len(words)):
+                suffix = " ".join(words[start:])
+                for kind in kinds:
+                    if suffix in self._index[kind]:
+                        return self._index[kind][suffix]
+        for kind in kinds:
+            match = difflib.get_close_matches(key, self._keys[kind], n=1, cutoff=FUZZY_CUTOFF)
+            if match:
+                return self._index[kind][match[0]]
+        return None
+
+    def grams(self, row: int, measure: str) -> Optional[float]:
+        """Weight in grams of `measure` (e.g. "2 cups", "500g", "3 large") of food `row`,
+        0 for unquantified seasoning ("to taste"), None if it can't be worked out."""
+        text = (measure or "").lower()
+        for symbol, fraction in _FRACTIONS.items():
+            text = text.replace(symbol, fraction)
+        text = text.strip()
+        if _UNQUANTIFIED.match(text):
+            # Seasoning "to taste" adds nothing measurable; an unmeasured main ingredient is unknown.
+            return 0.0 if self.serving_g[row] <= 5 else None
+
+        match = _QUANTITY.match(text)
+        quantity, rest = (_quantity(match.group(1)), match.group(2)) if match else (1.0, text)
+        words = rest.split()
+        unit = _unit(words[0]) if words else ""
+        size = _SIZES.get(unit, 1.0)
+
+        if unit in _MASS_G:
+            return quantity * _MASS_G[unit]
+        if unit in _VOLUME_ML:
+            # Volumes convert through the food's cup weight where known (a cup of flour is ~125 g).
+            grams_per_ml = 1.0 if np.isnan(self.cup_g[row]) else float(self.cup_g[row]) / DEFAULT_CUP_G
+            return quantity * _VOLUME_ML[unit] * grams_per_ml
+        if unit in _FIXED_G:
+            return quantity * _FIXED_G[unit]
+        if np.isnan(self.piece_g[row]):
+            return None
+        if match or unit in _PIECES or unit in _SIZES:
+            return quantity * size * float(self.piece_g[row])
+        return None
+
+    def aggregate(self, rows: Sequence[int], grams: Sequence[float], groups: Optional[Sequence[int]] = None,
+                  n_groups: Optional[int] = None) -> np.ndarray:
+        """Nutrient totals for `grams[i]` of food `rows[i]`, in one matrix product.
+
+        With `groups`, returns one row of totals per group (e.g. per recipe or
+        per day of a plan) instead of a single total.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        weights = np.asarray(grams, dtype=np.float64) / 100.0
+        contributions = self.values[rows].astype(np.float64) * weights[:, None]
+        if groups is None:
+            return contributions.sum(axis=0)
+        groups = np.asarray(groups, dtype=np.intp)
+        totals = np.zeros((n_groups if n_groups is not None else int(groups.max(initial=-1)) + 1, len(NUTRIENTS)))
+        np.add.at(totals, groups, contributions)
+        return totals
+
+_table: Optional[NutrientTable] = None
+_table_lock = threading.Lock()
+
+def get_table() -> NutrientTable:
+    """The nutrient table, loaded on first use."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = NutrientTable.load(NUTRIENTS_PATH)
+                logger.info(f"Loaded {len(_table)} foods from {NUTRIENTS_PATH}")
+    return _table
+
+@dataclass
+class Estimate:
+    """Nutrients of one portion (`totals`, aligned with `NUTRIENTS`) and how they were worked out."""
+    label: str
+    portion: str
+    grams: float
+    totals: np.ndarray
+    source: str
+    items: List[Tuple[str, float]] = field(default_factory=list)
+
+    def per_100g(self) -> Optional[np.ndarray]:
+        return self.totals * 100.0 / self.grams if self.grams > 0 else None
+
+def _split_measure(text: str) -> Tuple[str, str]:
+    """("2 cups", "rice") from "2 cups rice"; ("", "banana") when there is no quantity."""
+    match = _QUANTITY.match(text)
+    if not match:
+        return "", text.strip()
+    words = match.group(2).split()
+    if words and (_unit(words[0]) in _MASS_G or _unit(words[0]) in _VOLUME_ML or _unit(words[0]) in _FIXED_G
+                  or _unit(words[0]) in _PIECES or _unit(words[0]) in _SIZES):
+        return f"{match.group(1)} {words[0]}", " ".join(words[1:])
+    return match.group(1), match.group(2)
+
+def estimate(query: str, table: Optional[NutrientTable] = None) -> Optional[Estimate]:
+    """Nutrients for a dish or food name ("biryani"), or for a list of measured
+    items ("2 eggs and 1 cup rice"). None when anything in it is unknown."""
+    table = table or get_table()
+    query = _QUERY_FILLER.sub(" ", (query or "").lower())
+    if not query.strip():
+        return None
+
+    row = table.lookup(query)
+    if row is not None:
+        grams = float(table.serving_g[row])
+        return Estimate(table.names[row], f"typical serving ({grams:g} g)", grams,
+                        table.values[row].astype(np.float64) * grams / 100.0, "table")
+
+    rows, weights, items = [], [], []
+    for part in (part.strip() for part in _ITEM_SPLIT.split(query)):
+        if not part:
+            continue
+        measure, name = _split_measure(part)
+        row = table.lookup(name)
+        if row is None:
+            return None
+        grams = table.grams(row, measure) if measure else float(table.serving_g[row])
+        if grams is None:
+            return None
+        rows.append(row)
+        weights.append(grams)
+        items.append((part, grams))
+    if not rows:
+        return None
+    total = float(sum(weights))
+    return Estimate(query.strip(), f"total ({total:g} g)", total,
+                    table.aggregate(rows, weights), "items", items)
+
+def estimate_meal(meal: dict, servings: int = RECIPE_SERVINGS, table: Optional[NutrientTable] = None) -> Optional[Estimate]:
+    """Per-serving nutrients of a TheMealDB meal from its ingredients and measures.
+
+    None unless at least `MIN_RECIPE_COVERAGE` of the ingredients are matched.
+    """
+    table = table or get_table()
+    pairs = [
+        (meal[f"strIngredient{i}"].strip(), (meal.get(f"strMeasure{i}") or "").strip())
+        for i in range(1, 21)
+        if (meal.get(f"strIngredient{i}") or "").strip()
+    ]
+    if not pairs:
+        return None
+    rows, weights = [], []
+    for ingredient, measure in pairs:
+        row = table.lookup(ingredient, kinds=("food", "dish"), partial=True)
+        grams = table.grams(row, measure) if row is not None else None
+        if grams is None:
+            logger.debug(f"Nutrients: no estimate for '{measure} {ingredient}' in {meal.get('strMeal')}")
+            continue
+        rows.append(row)
+        weights.append(grams)
+    coverage = len(rows) / len(pairs)
+    if coverage < MIN_RECIPE_COVERAGE:
+        return None
+    grams = float(sum(weights)) / servings
+    return Estimate(
+        meal.get("strMeal", ""),
+        f"per serving (recipe serves about {servings}, {len(rows)} of {len(pairs)} ingredients matched)",
+        grams,
+        table.aggregate(rows, weights) / servings,
+        "recipe",
+    )
+
+def _line(values: np.ndarray) -> str:
+    kcal, protein, carbs, fat = values[:4]
+    return f"{kcal:.0f} kcal, {protein:.1f} g protein, {carbs:.1f} g carbohydrates, {fat:.1f} g fat"
+
+def format_estimate(dish_name: str, result: Estimate) -> str:
+    kcal, protein, carbs, fat, fiber, sugar, sodium = result.totals
+    lines = [
+        f"### Nutritional Content of {dish_name}",
+        "",
+        f"**{result.label}**, {result.portion}:",
+        f"- Calories: {kcal:.0f} kcal",
+        f"- Protein: {protein:.1f} g",
+        f"- Carbohydrates: {carbs:.1f} g (fibre {fiber:.1f} g, sugars {sugar:.1f} g)",
+        f"- Fat: {fat:.1f} g",
+        f"- Sodium: {sodium:.0f} mg",
+    ]
+    if result.items:
+        lines += ["", "Made up of: " + ", ".join(f"{name} (~{grams:.0f} g)" for name, grams in result.items)]
+    per_100g = result.per_100g()
+    if per_100g is not None:
+        lines += ["", f"Per 100 g: {_line(per_100g)}."]
+    lines += [
+        "",
+        "_Typical values from the local nutrient table (USDA FoodData Central style); "
+        "actual values vary with recipe and portion size. Vitamins and minerals are not covered; "
+        "see USDA FoodData Central for those._",
+    ]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # python -m src.nutrients lookup "2 eggs and a banana"
+    # python -m src.nutrients compile nutrients.npz
+    logging.basicConfig(level=logging.INFO)
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "lookup":
+        result = estimate(" ".join(args))
+        print(format_estimate(" ".join(args), result) if result else "Not in the local table.")
+    elif command == "compile":
+        get_table().save(args[0])
+        print(f"Wrote {len(get_table())} foods to {args[0]}")
+    else:
+        sys.exit(f"Unknown command: {command}")
@@ -0,0 +1,163 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from src.config import (
+    PERSISTENCE_BATCH_SIZE,
+    PERSISTENCE_ENQUEUE_TIMEOUT_SECONDS,
+    PERSISTENCE_FLUSH_INTERVAL_SECONDS,
+    PERSISTENCE_QUEUE_MAX_SIZE,
+    get_embedder,
+    get_vector_index,
+)
+from src.scheduler import gemini_lane
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Bounded in-process queue drained by one background worker thread.
+
+    Items are handed to `writer` in batches of up to `batch_size`, or whatever
+    has accumulated after `flush_interval` seconds. When the queue is full,
+    `enqueue` waits at most `enqueue_timeout` seconds and then drops the item,
+    so callers on the request path are never held up by the store.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Any]], None],
+        max_size: int = 1000,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+        enqueue_timeout: float = 0.0,
+        name: str = "write-behind",
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_seconds = 0.0
+
+    def start(self) -> None:
+        # Started lazily so the worker thread is created in the serving process, after any fork.
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def enqueue(self, item: Any, block: bool = True) -> bool:
+        """Queue `item` for writing; returns False if it was dropped."""
+        if self._stopping.is_set():
+            self._count("dropped")
+            return False
+        self.start()
+        try:
+            if block and self.enqueue_timeout > 0:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"{self.name} queue full, dropped item ({self.dropped} dropped so far)")
+            return False
+        self._count("enqueued")
+        return True
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        """Stop the worker, by default after flushing everything still queued."""
+        if not drain:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self._count("dropped")
+                except queue.Empty:
+                    break
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"{self.name} did not drain within {timeout}s; {self._queue.qsize()} items left")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_flush_seconds": round(self.last_flush_seconds, 4),
+            }
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def _collect(self) -> List[Any]:
+        stopping = self._stopping.is_set()
+        try:
+            first = self._queue.get_nowait() if stopping else self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if stopping or remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                self.writer(batch)
+                self._count("written", len(batch))
+            except Exception as e:
+                self._count("failed", len(batch))
+                logger.error(f"{self.name} failed to write batch of {len(batch)}: {str(e)}")
+            with self._stats_lock:
+                self.batches += 1
+                self.last_flush_seconds = time.perf_counter() - started
+
+def write_tool_results(records: List[tuple]) -> None:
+    """Embed and upsert `(vector_id, text, metadata)` records in one round trip each."""
+    ids, texts, metadatas = zip(*records)
+    # Write-behind work: chat requests waiting on Gemini go first.
+    with gemini_lane("background"):
+        embeddings = get_embedder().embed_documents(list(texts))
+    get_vector_index().upsert(vectors=list(zip(ids, embeddings, metadatas)))
+    logger.debug(f"Stored {len(ids)} tool results: {list(ids)}")
+
+TOOL_RESULT_QUEUE = WriteBehindQueue(
+    write_tool_results,
+    max_size=PERSISTENCE_QUEUE_MAX_SIZE,
+    batch_size=PERSISTENCE_BATCH_SIZE,
+    flush_interval=PERSISTENCE_FLUSH_INTERVAL_SECONDS,
+    enqueue_timeout=PERSISTENCE_ENQUEUE_TIMEOUT_SECONDS,
+    name="tool-result-writer",
+)
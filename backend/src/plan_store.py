@@ -0,0 +1,63 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from src.config import MEAL_PLAN_DB_PATH
+
+class PlanStore:
+    """Multi-day meal plans per user in SQLite.
+
+    Each day is its own row holding the structured plan and its rendered text,
+    so an edit rewrites only the days it changed. `inputs` records the
+    calorie target and constraints the plans were built for.
+    """
+
+    def __init__(self, path: str = MEAL_PLAN_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "user_id TEXT PRIMARY KEY, inputs TEXT NOT NULL, days INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_days ("
+                "user_id TEXT NOT NULL, day INTEGER NOT NULL, plan TEXT NOT NULL, text TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, day))"
+            )
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """`{"inputs", "days": [{"plan", "text"}, ...]}`, or None if the user has no plan."""
+        with self._lock:
+            row = self._conn.execute("SELECT inputs, days FROM plans WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            days = self._conn.execute(
+                "SELECT day, plan, text FROM plan_days WHERE user_id = ? AND day < ? ORDER BY day", (user_id, row[1])
+            ).fetchall()
+        return {
+            "inputs": json.loads(row[0]),
+            "days": [{"plan": json.loads(plan), "text": text} for _, plan, text in days],
+        }
+
+    def save(self, user_id: str, inputs: dict, total_days: int, days: Dict[int, dict]) -> None:
+        """Record `inputs` and write only the given `{day: {"plan", "text"}}` rows."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (user_id, inputs, days, updated_at) VALUES (?, ?, ?, ?)",
+                (user_id, json.dumps(inputs), total_days, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO plan_days (user_id, day, plan, text) VALUES (?, ?, ?, ?)",
+                [(user_id, day, json.dumps(entry["plan"]), entry["text"]) for day, entry in days.items()],
+            )
+            self._conn.execute("DELETE FROM plan_days WHERE user_id = ? AND day >= ?", (user_id, total_days))
+
+    def delete(self, user_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM plans WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM plan_days WHERE user_id = ?", (user_id,))
+
+PLAN_STORE = PlanStore()
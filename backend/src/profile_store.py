@@ -0,0 +1,47 @@
+from src.cache import TTLCache
+from src.config import PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS, get_vector_index
+from src.telemetry import record_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE = TTLCache(max_entries=PROFILE_CACHE_MAX_ENTRIES, ttl_seconds=PROFILE_CACHE_TTL_SECONDS)
+
+def profile_vector_id(user_id: str) -> str:
+    return f"{user_id}_profile"
+
+def get_cached_profile(user_id: str):
+    """Return a copy of the cached profile, or None on a miss. Never touches Pinecone."""
+    profile = PROFILE_CACHE.get(user_id)
+    record_cache("profile", "hit" if profile is not None else "miss")
+    return dict(profile) if profile is not None else None
+
+def load_profile(user_id: str) -> dict:
+    """Fetch a profile from Pinecone and populate the cache.
+
+    Missing profiles are not cached so a fresh submission is picked up at once.
+    """
+    vector_id = profile_vector_id(user_id)
+    response = get_vector_index().fetch(ids=[vector_id])
+    logger.debug(f"Pinecone fetch for {user_id}: {response}")
+    vectors = response.vectors
+    if vectors and vector_id in vectors:
+        profile = dict(vectors[vector_id].metadata)
+        PROFILE_CACHE.set(user_id, profile)
+        return dict(profile)
+    logger.warning(f"No profile found for user_id: {user_id}")
+    return {}
+
+def fetch_profile(user_id: str) -> dict:
+    """Fetch a user profile, going to Pinecone only on a cache miss."""
+    profile = get_cached_profile(user_id)
+    if profile is not None:
+        return profile
+    return load_profile(user_id)
+
+def cache_profile(user_id: str, profile: dict) -> None:
+    """Write-through after a successful upsert; replaces any stale entry."""
+    PROFILE_CACHE.set(user_id, dict(profile))
+
+def invalidate_profile(user_id: str) -> None:
+    PROFILE_CACHE.invalidate(user_id)
@@ -0,0 +1,201 @@
+import json
+import logging
+import sqlite3
+import string
+import sys
+import threading
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import RECIPE_DB_PATH
+from src.response_cache import normalize_dish
+
+logger = logging.getLogger(__name__)
+
+MEALDB_BASE_URL = "https://www.themealdb.com/api/json/v1/1"
+MIN_NAME_SCORE = 0.6
+
+def meal_ingredients(meal: dict) -> List[str]:
+    return [
+        meal[f"strIngredient{i}"].strip().lower()
+        for i in range(1, 21)
+        if (meal.get(f"strIngredient{i}") or "").strip()
+    ]
+
+def meal_tags(meal: dict) -> List[str]:
+    return [tag.strip().lower() for tag in (meal.get("strTags") or "").split(",") if tag.strip()]
+
+def name_score(query: str, name: str) -> float:
+    """Similarity of two normalized dish names in [0, 1]: the better of the
+    character-level ratio and word overlap, so "lasagne" ~ "lasagna" and
+    "chicken curry" ~ "spicy chicken curry" both score well."""
+    if not query or not name:
+        return 0.0
+    if query == name:
+        return 1.0
+    ratio = SequenceMatcher(None, query, name).ratio()
+    q_words, n_words = set(query.split()), set(name.split())
+    overlap = len(q_words & n_words) / len(q_words) if q_words else 0.0
+    return max(ratio, 0.95 * overlap)
+
+class RecipeStore:
+    """Local, bulk-importable mirror of TheMealDB.
+
+    Meals are stored as their original JSON in SQLite next to an inverted index
+    (`postings`) over ingredients, category, tags and name words. Names are
+    also held in memory for fuzzy matching, so a lookup never leaves the
+    process.
+    """
+
+    def __init__(self, path: str = RECIPE_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._names: Optional[Dict[str, List[str]]] = None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meals ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, norm_name TEXT NOT NULL, "
+                "category TEXT, area TEXT, tags TEXT, data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term TEXT NOT NULL, field TEXT NOT NULL, meal_id TEXT NOT NULL, "
+                "PRIMARY KEY (field, term, meal_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_meal ON postings (meal_id)")
+
+    def import_meals(self, meals: Iterable[dict]) -> int:
+        """Insert or replace TheMealDB-shaped meal dicts; returns how many were stored."""
+        count = 0
+        with self._lock, self._conn:
+            for meal in meals:
+                meal_id = str(meal.get("idMeal") or "")
+                name = (meal.get("strMeal") or "").strip()
+                if not meal_id or not name:
+                    continue
+                norm_name = normalize_dish(name)
+                category = (meal.get("strCategory") or "").strip().lower()
+                tags = meal_tags(meal)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meals (id, name, norm_name, category, area, tags, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (meal_id, name, norm_name, category, (meal.get("strArea") or "").lower(), ",".join(tags), json.dumps(meal)),
+                )
+                self._conn.execute("DELETE FROM postings WHERE meal_id = ?", (meal_id,))
+                postings = {("name", word) for word in norm_name.split()}
+                postings |= {("ingredient", ingredient) for ingredient in meal_ingredients(meal)}
+                postings |= {("tag", tag) for tag in tags}
+                if category:
+                    postings.add(("category", category))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO postings (term, field, meal_id) VALUES (?, ?, ?)",
+                    [(term, field, meal_id) for field, term in postings],
+                )
+                count += 1
+            self._names = None
+        return count
+
+    def import_snapshot(self, path: str) -> int:
+        """Import a JSON file holding either `{"meals": [...]}` or a bare list of meals."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        meals = (data.get("meals") or []) if isinstance(data, dict) else data
+        count = self.import_meals(meals)
+        logger.info(f"Imported {count} meals from {path}")
+        return count
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0]
+
+    def _name_index(self) -> Tuple[Dict[str, List[str]], Dict[str, set]]:
+        """normalized name -> meal ids, and name word -> normalized names."""
+        if self._names is None:
+            with self._lock:
+                names: Dict[str, List[str]] = {}
+                words: Dict[str, set] = {}
+                for meal_id, norm_name in self._conn.execute("SELECT id, norm_name FROM meals"):
+                    names.setdefault(norm_name, []).append(meal_id)
+                    for word in norm_name.split():
+                        words.setdefault(word, set()).add(norm_name)
+                self._names = (names, words)
+        return self._names
+
+    def _load_map(self, meal_ids: List[str]) -> Dict[str, dict]:
+        if not meal_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM meals WHERE id IN ({','.join('?' * len(meal_ids))})", meal_ids
+            ).fetchall()
+        return {meal_id: json.loads(data) for meal_id, data in rows}
+
+    def _load(self, meal_ids: Iterable[str]) -> List[dict]:
+        meal_ids = list(meal_ids)
+        by_id = self._load_map(meal_ids)
+        return [by_id[meal_id] for meal_id in meal_ids if meal_id in by_id]
+
+    def _lookup(self, field: str, term: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT meal_id FROM postings WHERE field = ? AND term = ?", (field, term.strip().lower())
+            )]
+
+    def search(self, query: str, limit: int = 5, min_score: float = MIN_NAME_SCORE) -> List[Tuple[float, dict]]:
+        """Fuzzy name search returning `(score, meal)` pairs, best first."""
+        normalized = normalize_dish(query)
+        if not normalized:
+            return []
+        names, words = self._name_index()
+        if normalized in names:
+            scored = [(1.0, meal_id) for meal_id in names[normalized]]
+        else:
+            # Score names sharing a word with the query; fall back to a full scan for typos.
+            pool = set().union(*(words.get(word, set()) for word in normalized.split())) or names.keys()
+            scored = []
+            for norm_name in pool:
+                score = name_score(normalized, norm_name)
+                if score >= min_score:
+                    scored.extend((score, meal_id) for meal_id in names[norm_name])
+        scored.sort(key=lambda pair: -pair[0])
+        scored = scored[:limit]
+        meals = self._load_map([meal_id for _, meal_id in scored])
+        return [(score, meals[meal_id]) for score, meal_id in scored if meal_id in meals]
+
+    def by_ingredient(self, ingredient: str) -> List[dict]:
+        return self._load(self._lookup("ingredient", ingredient))
+
+    def by_category(self, category: str) -> List[dict]:
+        return self._load(self._lookup("category", category))
+
+    def by_tag(self, tag: str) -> List[dict]:
+        return self._load(self._lookup("tag", tag))
+
+def download_snapshot(out_path: str) -> int:
+    """Fetch every TheMealDB meal (search by first letter) into a snapshot file."""
+    from src.tools.http_client import HTTP_CLIENT
+
+    meals = []
+    for letter in string.ascii_lowercase:
+        response = HTTP_CLIENT.get(f"{MEALDB_BASE_URL}/search.php", params={"f": letter})
+        response.raise_for_status()
+        meals.extend(response.json().get("meals") or [])
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"meals": meals}, f)
+    return len(meals)
+
+RECIPE_STORE = RecipeStore()
+
+if __name__ == "__main__":
+    # python -m src.recipe_store download snapshot.json
+    # python -m src.recipe_store import snapshot.json [more.json ...]
+    logging.basicConfig(level=logging.INFO)
+    command, paths = sys.argv[1], sys.argv[2:]
+    if command == "download":
+        print(f"Downloaded {download_snapshot(paths[0])} meals to {paths[0]}")
+    elif command == "import":
+        total = sum(RECIPE_STORE.import_snapshot(path) for path in paths)
+        print(f"Imported {total} meals; store now holds {RECIPE_STORE.count()}")
+    else:
+        sys.exit(f"Unknown command: {command}")
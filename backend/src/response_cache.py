@@ -0,0 +1,173 @@
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from src.cache import TTLCache
+from src.config import (
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_SECONDS,
+    get_embedder,
+)
+from src.telemetry import record_cache
+
+logger = logging.getLogger(__name__)
+
+_FILLER = re.compile(r"\b(a|an|the|recipe|recipes|for|of|how to make|calories in|nutrition|nutritional content)\b")
+
+def normalize_dish(name: str) -> str:
+    """Canonical form used as the exact-match key: lowercase, no punctuation or filler words."""
+    text = re.sub(r"[^a-z0-9\s]", " ", (name or "").lower())
+    text = _FILLER.sub(" ", text)
+    return " ".join(text.split())
+
+class _VectorTier:
+    """Fixed-capacity matrix of unit vectors searched by cosine similarity.
+
+    Entries only match within the same `scope` (e.g. the preference and
+    restriction tuple); the least recently used slot is overwritten when full.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._scopes: list = [None] * max_entries
+        self._values: list = [None] * max_entries
+        self._expires = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._used = np.zeros(max_entries, dtype=bool)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def search(self, scope: Hashable, vector: np.ndarray, threshold: float) -> Tuple[Any, float]:
+        with self._lock:
+            if self._vectors is None:
+                return None, 0.0
+            now = time.monotonic()
+            live = self._used & (self._expires > now)
+            live &= np.fromiter((s == scope for s in self._scopes), dtype=bool, count=self.max_entries)
+            if not live.any():
+                return None, 0.0
+            scores = np.where(live, self._vectors @ vector, -1.0)
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None, float(scores[best])
+            self._last_used[best] = now
+            return self._values[best], float(scores[best])
+
+    def add(self, scope: Hashable, vector: np.ndarray, value: Any) -> None:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            now = time.monotonic()
+            free = np.flatnonzero(~self._used | (self._expires <= now))
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._scopes[slot] = scope
+            self._values[slot] = value
+            self._expires[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._used[slot] = True
+
+    def __len__(self) -> int:
+        return int((self._used & (self._expires > time.monotonic())).sum())
+
+class SemanticCache:
+    """Two-tier cache for tool answers keyed by dish name within a scope.
+
+    Tier 1 is an exact match on the normalized dish name. Tier 2 embeds the
+    normalized name (with `get_embedder()` unless `embedder` is given) and
+    reuses an answer for a near-identical dish in the same scope when cosine
+    similarity reaches `similarity`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+        embedder=None,
+    ):
+        self.name = name
+        self.similarity = similarity
+        self.embedder = embedder
+        self._exact = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._semantic = _VectorTier(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._stats_lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray((self.embedder or get_embedder()).embed_query(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"{self.name} cache: embedding failed, skipping semantic tier: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+        record_cache(self.name, field)
+
+    def get_or_compute(
+        self,
+        dish: str,
+        scope: Hashable,
+        compute: Callable[[], Any],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        key = normalize_dish(dish)
+        if not key:
+            return compute()
+
+        value = self._exact.get((scope, key))
+        if value is not None:
+            self._count("exact_hits")
+            return value
+
+        vector = self._embed(key)
+        if vector is not None:
+            value, score = self._semantic.search(scope, vector, self.similarity)
+            if value is not None:
+                logger.debug(f"{self.name} cache: semantic hit for '{key}' (similarity {score:.3f})")
+                self._count("semantic_hits")
+                self._exact.set((scope, key), value)
+                return value
+
+        self._count("misses")
+        value = compute()
+        if should_cache(value):
+            self._exact.set((scope, key), value)
+            if vector is not None:
+                self._semantic.add(scope, vector, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+                "exact_entries": len(self._exact),
+                "semantic_entries": len(self._semantic),
+                "exact_evictions": self._exact.evictions,
+                "semantic_evictions": self._semantic.evictions,
+            }
+
+NUTRITION_CACHE = SemanticCache("nutrition")
+RECIPE_CACHE = SemanticCache("recipe")
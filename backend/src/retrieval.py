@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import time
+from typing import List, Optional
+
+from src.config import (
+    RETRIEVAL_HALF_LIFE_SECONDS,
+    RETRIEVAL_MIN_SIMILARITY,
+    RETRIEVAL_RECENCY_WEIGHT,
+    RETRIEVAL_TOKEN_BUDGET,
+    RETRIEVAL_TOP_K,
+    get_embedder,
+    get_vector_index,
+)
+
+logger = logging.getLogger(__name__)
+
+RESULT_TYPES = ["diet_recommendations_result", "recipe_fetcher_result", "nut_content_fetcher_result"]
+# Rough chars-per-token ratio; good enough to keep the block inside its budget.
+CHARS_PER_TOKEN = 4
+
+def _result_text(raw: str) -> Optional[str]:
+    """The user-facing part of a stored tool result, or None for errors and
+    recipes that were only offered pending the user's confirmation."""
+    try:
+        result = json.loads(raw)
+    except (TypeError, ValueError):
+        text = raw.strip()
+        # Failed calls are stored as plain "Error ..." strings (tool_router, nut_content_fetcher).
+        return None if text.startswith("Error") else text or None
+    if not isinstance(result, dict):
+        return str(result).strip() or None
+    if result.get("status") in ("error", "pending"):
+        return None
+    if "meal_plan" in result:
+        return f"Daily calories: {result.get('daily_calories', 'N/A')}\n{result['meal_plan']}".strip()
+    return str(result.get("content") or "").strip() or None
+
+def _age(seconds: float) -> str:
+    if seconds < 3600:
+        return "just now"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
+def rank_matches(matches: list, now: Optional[float] = None) -> List[dict]:
+    """Turn Pinecone matches into deduplicated entries, best first.
+
+    Each entry's score is its similarity, discounted by age with an
+    exponential half-life weighted by `RETRIEVAL_RECENCY_WEIGHT`.
+    """
+    now = now or time.time()
+    best = {}
+    for match in matches:
+        if match.score < RETRIEVAL_MIN_SIMILARITY:
+            continue
+        metadata = match.metadata or {}
+        text = _result_text(metadata.get("result", ""))
+        if not text:
+            continue
+        age = max(0.0, now - float(metadata.get("timestamp", now)))
+        decay = 0.5 ** (age / RETRIEVAL_HALF_LIFE_SECONDS)
+        score = match.score * (1 - RETRIEVAL_RECENCY_WEIGHT + RETRIEVAL_RECENCY_WEIGHT * decay)
+        # The same recipe or plan is often stored once per turn that produced it.
+        key = hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+        if key not in best or score > best[key]["score"]:
+            best[key] = {
+                "tool": metadata.get("type", "").replace("_result", ""),
+                "text": text,
+                "age": age,
+                "score": score,
+            }
+    return sorted(best.values(), key=lambda entry: -entry["score"])
+
+def format_context(entries: List[dict], token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> str:
+    """Render entries into one block, truncating the last one to fit `token_budget`."""
+    remaining = token_budget * CHARS_PER_TOKEN
+    blocks = []
+    for entry in entries:
+        header = f"[{entry['tool']}, {_age(entry['age'])}]\n"
+        room = remaining - len(header)
+        if room < 200:
+            break
+        text = entry["text"] if len(entry["text"]) <= room else entry["text"][:room - 3].rstrip() + "..."
+        blocks.append(header + text)
+        remaining -= len(header) + len(text) + 2
+    return "\n\n".join(blocks)
+
+def retrieve_context(user_id: str, query: str, top_k: int = RETRIEVAL_TOP_K) -> str:
+    """Earlier tool results for `user_id` most relevant to `query`, as a prompt-ready block."""
+    if not query or top_k <= 0:
+        return ""
+    vector = get_embedder().embed_query(query)
+    response = get_vector_index().query(
+        vector=vector,
+        top_k=top_k,
+        filter={"user_id": {"$eq": user_id}, "type": {"$in": RESULT_TYPES}},
+        include_metadata=True,
+    )
+    entries = rank_matches(response.matches or [])
+    logger.debug(f"Retrieved {len(entries)} earlier results for {user_id}")
+    return format_context(entries)
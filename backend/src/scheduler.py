@@ -0,0 +1,440 @@
+import asyncio
+import bisect
+import contextvars
+import itertools
+import logging
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+try:
+    from langchain_core.exceptions import ModelRateLimitError
+    _RATE_LIMIT_ERRORS: tuple = (ModelRateLimitError,)
+except ImportError:  # older langchain_core
+    _RATE_LIMIT_ERRORS = ()
+
+from src.config import (
+    GEMINI_BACKOFF_BASE_SECONDS,
+    GEMINI_BACKOFF_CAP_SECONDS,
+    GEMINI_CHAT_RPM,
+    GEMINI_CHAT_TPM,
+    GEMINI_EMBED_RPM,
+    GEMINI_EMBED_TPM,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_RETRIES,
+    GEMINI_SCHEDULER_ENABLED,
+)
+from src.telemetry import GEMINI_IN_FLIGHT, GEMINI_QUEUE_DEPTH, GEMINI_THROTTLED, GEMINI_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Lanes in priority order: a waiting call in an earlier lane always starts first.
+LANES = ("interactive", "batch", "background")
+CHARS_PER_TOKEN = 4
+CHAT_OUTPUT_TOKEN_ESTIMATE = 256  # charged up front, corrected from usage_metadata afterwards
+EMBED_BATCH_SIZE = 100  # texts per embedding request, as batched by the Gemini client
+
+_lane: contextvars.ContextVar = contextvars.ContextVar("gemini_lane", default="interactive")
+
+@contextmanager
+def gemini_lane(lane: str) -> Iterator[None]:
+    """Run the Gemini calls made inside the block (and in threads or tasks
+    started from it) in `lane`. Calls default to the interactive lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane {lane!r}; expected one of {LANES}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+def current_lane() -> str:
+    return _lane.get()
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for Gemini 429s: LangChain's ModelRateLimitError, google.api_core
+    ResourceExhausted, or any error with a 429 `code`/`status_code` (google-genai,
+    httpx). Wrappers such as GoogleGenerativeAIError are looked through to
+    their cause."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, _RATE_LIMIT_ERRORS) or type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+            return True
+        if 429 in (getattr(error, "code", None), getattr(error, "status_code", None)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+_RETRY_HINT = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+def _retry_hint(error: BaseException) -> Optional[float]:
+    """The server's suggested delay ("Please retry in 12.3s"), if any."""
+    match = _RETRY_HINT.search(str(error))
+    return float(match.group(1)) if match else None
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a prompt (string, messages or prompt value)."""
+    if hasattr(value, "to_messages"):
+        value = value.to_messages()
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (list, tuple)):
+        text = "".join(str(getattr(item, "content", item)) for item in value)
+    else:
+        text = str(value)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+class TokenBucket:
+    """Refills `limit` units evenly over `window` seconds (a minute), holding at
+    most one window's worth. A limit of 0 means unlimited. Not thread-safe on
+    its own: the scheduler calls it with its lock held."""
+
+    def __init__(self, limit: float, window: float = 60.0):
+        self.capacity = float(limit)
+        self.rate = self.capacity / window
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)  # a single oversized call must still fit eventually
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go below zero when actual usage exceeds the estimate; the debt
+        # is paid back by refill before the next call gets through.
+        if self.capacity:
+            self.level = max(-self.capacity, self.level - min(amount, self.capacity))
+
+    def settle(self, estimate: float, actual: float) -> None:
+        """Charge (or refund) the difference between an estimate taken up front and real usage."""
+        if self.capacity:
+            self.level = max(-self.capacity, min(self.capacity, self.level - (actual - estimate)))
+
+class _Ticket:
+    __slots__ = ("order", "kind", "lane", "requests", "tokens", "enqueued", "granted", "wake")
+
+    def __init__(self, order: tuple, kind: str, lane: str, requests: int, tokens: int, wake: Optional[Callable] = None):
+        self.order = order
+        self.kind = kind
+        self.lane = lane
+        self.requests = requests
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.wake = wake
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return self.order < other.order
+
+class GeminiScheduler:
+    """Process-wide admission control for Gemini chat and embedding calls.
+
+    Calls queue by lane (interactive before batch before background, then
+    first come first served) and start when a concurrency slot is free and
+    their kind's requests/minute and tokens/minute buckets allow. A 429 pauses
+    that kind for a jittered exponential backoff (or the server's retry hint)
+    and the call re-queues in its original place, so callers only see a
+    rate-limit error once `max_retries` is exhausted.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, float]],
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        max_retries: int = GEMINI_MAX_RETRIES,
+        backoff_base: float = GEMINI_BACKOFF_BASE_SECONDS,
+        backoff_cap: float = GEMINI_BACKOFF_CAP_SECONDS,
+        window: float = 60.0,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._buckets = {kind: (TokenBucket(rpm, window), TokenBucket(tpm, window)) for kind, (rpm, tpm) in limits.items()}
+        self._paused_until = {kind: 0.0 for kind in limits}
+        self._cond = threading.Condition()
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._next_check = 0.0
+        self._counts = {kind: {"calls": 0, "throttled": 0, "gave_up": 0} for kind in limits}
+        self._waits = {lane: {"count": 0, "total": 0.0, "max": 0.0} for lane in LANES}
+
+    # The underscored methods below run with self._cond held.
+
+    def _enqueue(self, kind: str, requests: int, tokens: int, order: Optional[tuple], wake: Optional[Callable]) -> _Ticket:
+        if kind not in self._buckets:
+            raise ValueError(f"Unknown call kind {kind!r}")
+        lane = current_lane()
+        ticket = _Ticket(order or (LANES.index(lane), next(self._seq)), kind, lane, requests, tokens, wake)
+        bisect.insort(self._queue, ticket)
+        GEMINI_QUEUE_DEPTH.inc(kind=kind, lane=lane)
+        return ticket
+
+    def _dequeue(self, ticket: _Ticket) -> None:
+        self._queue.remove(ticket)
+        GEMINI_QUEUE_DEPTH.dec(kind=ticket.kind, lane=ticket.lane)
+
+    def _dispatch(self) -> None:
+        """Start every queued call that may run now, in queue order.
+
+        A call that is waiting on quota holds back later calls of the same
+        kind (so the lane order holds within a kind) but not calls of the
+        other kind. `_next_check` is when the earliest held-back call could go.
+        """
+        now = time.monotonic()
+        blocked = set()
+        next_check = math.inf
+        for ticket in list(self._queue):
+            if self._in_flight >= self.max_concurrency:
+                break
+            if ticket.kind in blocked:
+                continue
+            requests, tokens = self._buckets[ticket.kind]
+            delay = max(
+                self._paused_until[ticket.kind] - now,
+                requests.wait_time(ticket.requests, now),
+                tokens.wait_time(ticket.tokens, now),
+            )
+            if delay > 0:
+                blocked.add(ticket.kind)
+                next_check = min(next_check, now + delay)
+                continue
+            requests.take(ticket.requests)
+            tokens.take(ticket.tokens)
+            self._dequeue(ticket)
+            self._in_flight += 1
+            ticket.granted = True
+            waited = now - ticket.enqueued
+            waits = self._waits[ticket.lane]
+            waits["count"] += 1
+            waits["total"] += waited
+            waits["max"] = max(waits["max"], waited)
+            GEMINI_WAIT_SECONDS.observe(waited, kind=ticket.kind, lane=ticket.lane)
+            GEMINI_IN_FLIGHT.inc(kind=ticket.kind)
+            if ticket.wake is not None:
+                ticket.wake()
+        self._next_check = next_check
+        # Waiters re-check with the new deadline: sync ones via the condition,
+        # async ones via their event.
+        self._cond.notify_all()
+        for ticket in self._queue:
+            if ticket.wake is not None:
+                ticket.wake()
+
+    def _timeout(self) -> Optional[float]:
+        return None if self._next_check == math.inf else max(0.001, self._next_check - time.monotonic())
+
+    def _finish(self, kind: str) -> None:
+        self._in_flight -= 1
+        GEMINI_IN_FLIGHT.dec(kind=kind)
+        self._dispatch()
+
+    def _throttled(self, kind: str, attempt: int, error: BaseException) -> bool:
+        """Record a 429 and pause `kind`; False once retries are used up."""
+        if attempt >= self.max_retries:
+            self._counts[kind]["gave_up"] += 1
+            GEMINI_THROTTLED.inc(kind=kind, outcome="gave_up")
+            return False
+        delay = _retry_hint(error) or random.uniform(self.backoff_base, min(self.backoff_cap, self.backoff_base * 2 ** (attempt + 1)))
+        self._paused_until[kind] = max(self._paused_until[kind], time.monotonic() + delay)
+        self._counts[kind]["throttled"] += 1
+        GEMINI_THROTTLED.inc(kind=kind, outcome="retried")
+        logger.warning(f"Gemini {kind} call rate limited ({str(error)[:120]}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return True
+
+    def _failed(self, kind: str, attempt: int, error: BaseException) -> bool:
+        """Free a failed call's slot; True if it was a 429 to retry. The pause
+        is set before the slot is handed on, so no queued call of `kind`
+        starts into the same rate limit."""
+        retry = is_rate_limited(error) and self._throttled(kind, attempt, error)
+        self._finish(kind)
+        return retry
+
+    def acquire(self, kind: str, requests: int = 1, tokens: int = 0, order: Optional[tuple] = None) -> tuple:
+        """Block until a `kind` call may start; returns its queue position for retries."""
+        with self._cond:
+            ticket = self._enqueue(kind, requests, tokens, order, None)
+            self._dispatch()
+            while not ticket.granted:
+                self._cond.wait(self._timeout())
+                if not ticket.granted:
+                    self._dispatch()
+            return ticket.order
+
+    async def aacquire(self, kind: str, requests: int = 1, tokens: int = 0, order: Optional[tuple] = None) -> tuple:
+        """Async `acquire`: waits on an event instead of blocking the loop."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        wake = lambda: loop.call_soon_threadsafe(event.set)
+        with self._cond:
+            ticket = self._enqueue(kind, requests, tokens, order, wake)
+            self._dispatch()
+        try:
+            while not ticket.granted:
+                with self._cond:
+                    event.clear()
+                    if ticket.granted:
+                        break
+                    timeout = self._timeout()
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    with self._cond:
+                        self._dispatch()
+        except BaseException:
+            with self._cond:
+                if ticket.granted:
+                    self._finish(kind)
+                else:
+                    self._dequeue(ticket)
+            raise
+        return ticket.order
+
+    def release(self, kind: str, tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        with self._cond:
+            if actual_tokens is not None:
+                self._buckets[kind][1].settle(tokens, actual_tokens)
+            self._finish(kind)
+
+    def call(self, kind: str, fn: Callable[[], Any], requests: int = 1, tokens: int = 0,
+             usage: Callable[[Any], Optional[int]] = lambda result: None) -> Any:
+        """Run `fn()` once admitted, retrying 429s. `usage(result)` may return
+        the actual token count to settle the tokens/minute bucket."""
+        order = None
+        for attempt in range(self.max_retries + 1):
+            order = self.acquire(kind, requests, tokens, order)
+            with self._cond:
+                self._counts[kind]["calls"] += 1
+            try:
+                result = fn()
+            except Exception as e:
+                with self._cond:
+                    if not self._failed(kind, attempt, e):
+                        raise
+                continue
+            except BaseException:
+                self.release(kind)
+                raise
+            self.release(kind, tokens, usage(result))
+            return result
+
+    async def acall(self, kind: str, factory: Callable[[], Any], requests: int = 1, tokens: int = 0,
+                    usage: Callable[[Any], Optional[int]] = lambda result: None) -> Any:
+        """Async `call`; `factory()` returns a fresh awaitable per attempt."""
+        order = None
+        for attempt in range(self.max_retries + 1):
+            order = await self.aacquire(kind, requests, tokens, order)
+            with self._cond:
+                self._counts[kind]["calls"] += 1
+            try:
+                result = await factory()
+            except Exception as e:
+                with self._cond:
+                    if not self._failed(kind, attempt, e):
+                        raise
+                continue
+            except BaseException:
+                self.release(kind)
+                raise
+            self.release(kind, tokens, usage(result))
+            return result
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = {lane: sum(1 for ticket in self._queue if ticket.lane == lane) for lane in LANES}
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": depth,
+                "calls": {kind: dict(counts) for kind, counts in self._counts.items()},
+                "wait_seconds": {
+                    lane: {
+                        "count": waits["count"],
+                        "mean": round(waits["total"] / waits["count"], 4) if waits["count"] else 0.0,
+                        "max": round(waits["max"], 4),
+                    }
+                    for lane, waits in self._waits.items()
+                },
+            }
+
+GEMINI_SCHEDULER = GeminiScheduler({
+    "chat": (GEMINI_CHAT_RPM, GEMINI_CHAT_TPM),
+    "embedding": (GEMINI_EMBED_RPM, GEMINI_EMBED_TPM),
+})
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+class ScheduledChatModel:
+    """Chat model wrapper whose `invoke`/`ainvoke` go through the scheduler.
+
+    `config` and keyword arguments pass straight through, so callbacks, tags
+    and streaming events behave as with the bare model. `bind_tools` returns
+    a scheduled wrapper of the bound model; other attributes are the model's.
+    """
+
+    def __init__(self, model: Any, scheduler: GeminiScheduler = GEMINI_SCHEDULER):
+        self.model = model
+        self.scheduler = scheduler
+
+    def bind_tools(self, tools: Any, **kwargs) -> "ScheduledChatModel":
+        return ScheduledChatModel(self.model.bind_tools(tools, **kwargs), self.scheduler)
+
+    def invoke(self, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        tokens = estimate_tokens(input) + CHAT_OUTPUT_TOKEN_ESTIMATE
+        return self.scheduler.call(
+            "chat", lambda: self.model.invoke(input, config, **kwargs), tokens=tokens, usage=_usage_tokens
+        )
+
+    async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        tokens = estimate_tokens(input) + CHAT_OUTPUT_TOKEN_ESTIMATE
+        return await self.scheduler.acall(
+            "chat", lambda: self.model.ainvoke(input, config, **kwargs), tokens=tokens, usage=_usage_tokens
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings wrapper that admits each request through the scheduler.
+    Wrap the client inside `CachedEmbeddings` so cache hits use no quota."""
+
+    def __init__(self, embedder: Embeddings, scheduler: GeminiScheduler = GEMINI_SCHEDULER):
+        self.embedder = embedder
+        self.scheduler = scheduler
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.scheduler.call(
+            "embedding",
+            lambda: self.embedder.embed_documents(texts),
+            requests=math.ceil(len(texts) / EMBED_BATCH_SIZE),
+            tokens=sum(estimate_tokens(text) for text in texts),
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.scheduler.call("embedding", lambda: self.embedder.embed_query(text), tokens=estimate_tokens(text))
+
+def scheduled_llm(model: Any) -> Any:
+    return ScheduledChatModel(model) if GEMINI_SCHEDULER_ENABLED else model
+
+def scheduled_embeddings(embedder: Embeddings) -> Embeddings:
+    return ScheduledEmbeddings(embedder) if GEMINI_SCHEDULER_ENABLED else embedder
@@ -0,0 +1,112 @@
+import json
+import logging
+import re
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from src.telemetry import COALESCED_CALLS
+
+logger = logging.getLogger(__name__)
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().casefold()
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+def call_key(tool_name: str, args: Any) -> str:
+    """Key under which calls coalesce: the tool name plus its arguments with
+    whitespace collapsed and case folded, so "Biryani " and "biryani" match."""
+    return f"{tool_name}:{json.dumps(_normalize(args), sort_keys=True, default=str)}"
+
+class _Flight:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 1
+
+class SingleFlight:
+    """Coalesces identical in-flight calls into one execution.
+
+    The first caller for a key (the leader) starts the work; callers arriving
+    while it runs share its future and get the same result or exception.
+    A key is forgotten as soon as its call finishes, so nothing is cached:
+    later calls run again. Only when every waiter has given up (timeout or
+    cancellation) is the shared work cancelled.
+    """
+
+    def __init__(self):
+        # Reentrant: cancelling a future under the lock runs `_forget` inline.
+        self._lock = threading.RLock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def _count(self, label: str, shared: bool) -> None:
+        # Called with the lock held.
+        if shared:
+            self.shared += 1
+        else:
+            self.leaders += 1
+        COALESCED_CALLS.inc(tool=label, role="shared" if shared else "leader")
+
+    def submit(self, key: Hashable, executor: Executor, fn: Callable, *args, label: str = "") -> Tuple[Future, bool]:
+        """Run `fn(*args)` on `executor` unless the same key is already running.
+
+        Returns the (possibly shared) future and whether it was shared. Callers
+        that stop waiting should call `abandon(key, future)`.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not flight.future.done():
+                flight.waiters += 1
+                self._count(label, True)
+                return flight.future, True
+            future = executor.submit(fn, *args)
+            self._flights[key] = _Flight(future)
+            self._count(label, False)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, False
+
+    def abandon(self, key: Hashable, future: Future) -> bool:
+        """A waiter gave up; cancel the shared future once nobody is left waiting.
+        Returns True when this was the last waiter (or the call already ended).
+
+        The key is dropped and the future cancelled under the lock, so a caller
+        arriving meanwhile starts a fresh call instead of joining a cancelled one.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight.future is not future:
+                return True
+            flight.waiters -= 1
+            if flight.waiters > 0:
+                return False
+            del self._flights[key]
+            # A running thread cannot be interrupted; cancel() only drops it if still queued.
+            future.cancel()
+        return True
+
+    def _forget(self, key: Hashable, done) -> None:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.future is done:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.leaders + self.shared
+            return {
+                "calls": calls,
+                "executions": self.leaders,
+                "shared": self.shared,
+                "coalescing_ratio": round(self.shared / calls, 4) if calls else 0.0,
+                "in_flight": len(self._flights),
+            }
+
+TOOL_FLIGHTS = SingleFlight()
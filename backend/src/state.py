@@ -7,4 +7,5 @@ class AgentState(TypedDict):
     tool_outputs: List[Dict[str, Any]]
     response: str
     user_id: str
-    tool_calls: List[Dict[str, Any]]
\ No newline at end of file
+    tool_calls: List[Dict[str, Any]]
+    retrieved_context: str
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+import logging
+from typing import Any, AsyncIterator
+
+from src.nodes.response_formatter import SECTION_EVENT
+from src.state import AgentState
+
+logger = logging.getLogger(__name__)
+
+# LLM calls whose text is shown to the user carry this tag; everything else
+# (tool selection JSON, recipe validation) is filtered out of the stream.
+STREAM_TAG = "stream_to_client"
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+async def stream_chat(graph, initial_state: AgentState) -> AsyncIterator[str]:
+    """Drive the async graph and translate its events into SSE frames.
+
+    Emits `token` frames for tagged LLM output, `section` frames as the
+    formatter produces them, then a single `done` frame with the final
+    response (or an `error` frame).
+    """
+    final_state = None
+    try:
+        async for event in graph.astream_events(initial_state, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream" and STREAM_TAG in event.get("tags", []):
+                text = _chunk_text(event["data"]["chunk"])
+                if text:
+                    yield sse_event("token", {"text": text, "source": event.get("metadata", {}).get("langgraph_node")})
+            elif kind == "on_custom_event" and event["name"] == SECTION_EVENT:
+                yield sse_event("section", event["data"])
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final_state = event["data"].get("output")
+    except Exception as e:
+        logger.error(f"Error streaming chat for user_id {initial_state['user_id']}: {str(e)}")
+        yield sse_event("error", {"detail": "Error processing chat request"})
+        return
+
+    response = final_state.get("response", "") if isinstance(final_state, dict) else ""
+    yield sse_event("done", {"response": response})
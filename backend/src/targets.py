@@ -0,0 +1,78 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+GOALS = ("weight_loss", "muscle_gain", "maintenance")
+# goal -> (activity multiplier on BMR, calorie adjustment)
+GOAL_ADJUSTMENTS = {"weight_loss": (1.2, -500.0), "muscle_gain": (1.6, 300.0), "maintenance": (1.4, 0.0)}
+MIN_DAILY_CALORIES = 1800
+_MULTIPLIERS = np.array([GOAL_ADJUSTMENTS[goal][0] for goal in GOALS])
+_ADJUSTMENTS = np.array([GOAL_ADJUSTMENTS[goal][1] for goal in GOALS])
+
+DEFAULT_AGE = 30
+DEFAULT_HEIGHT_INCHES = 67  # 5'7"
+DEFAULT_WEIGHT_KG = 154
+
+def parse_age(age) -> int:
+    try:
+        age = int(float(age))
+    except (TypeError, ValueError):
+        return DEFAULT_AGE
+    return age if age > 0 else DEFAULT_AGE
+
+def parse_gender(gender) -> str:
+    gender = str(gender or "").lower().strip()
+    return gender if gender in ("male", "female") else "male"
+
+def parse_height_cm(height) -> float:
+    """Height in cm from 5'7", 170cm or plain inches; 5'7" when unreadable."""
+    height = str(height or "").strip()
+    try:
+        if "'" in height:
+            feet, inches = height.split("'")
+            inches = inches.strip('"')
+            height_inches = int(feet) * 12 + float(inches)
+        elif "cm" in height.lower():
+            height_inches = float(height.lower().replace("cm", "").strip()) / 2.54
+        else:
+            height_inches = float(height)
+        if height_inches <= 0:
+            height_inches = DEFAULT_HEIGHT_INCHES
+    except (ValueError, TypeError):
+        height_inches = DEFAULT_HEIGHT_INCHES
+    return height_inches * 2.54
+
+def parse_weight_kg(weight) -> float:
+    try:
+        weight = float(weight)
+    except (TypeError, ValueError):
+        return DEFAULT_WEIGHT_KG
+    return weight if weight > 0 else DEFAULT_WEIGHT_KG
+
+def parse_goal(goal) -> str:
+    goal = str(goal or "").lower().strip() or "maintenance"
+    return goal if goal in GOALS else "maintenance"
+
+def parse_profiles(profiles: Sequence[dict]) -> Dict[str, np.ndarray]:
+    """Columns (`age`, `male`, `height_cm`, `weight_kg`, and `goal` as an index
+    into `GOALS`) for profiles holding the raw age, gender, height, weight and
+    goal strings."""
+    return {
+        "age": np.array([parse_age(p.get("age")) for p in profiles], dtype=np.float64),
+        "male": np.array([parse_gender(p.get("gender")) == "male" for p in profiles], dtype=bool),
+        "height_cm": np.array([parse_height_cm(p.get("height")) for p in profiles], dtype=np.float64),
+        "weight_kg": np.array([parse_weight_kg(p.get("weight")) for p in profiles], dtype=np.float64),
+        "goal": np.array([GOALS.index(parse_goal(p.get("goal"))) for p in profiles], dtype=np.intp),
+    }
+
+def daily_calories(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Mifflin-St Jeor BMR, scaled and adjusted for each profile's goal, with a
+    floor of `MIN_DAILY_CALORIES`. One array operation for any number of profiles."""
+    bmr = (
+        10 * columns["weight_kg"]
+        + 6.25 * columns["height_cm"]
+        - 5 * columns["age"]
+        + np.where(columns["male"], 5.0, -161.0)
+    )
+    goal = columns["goal"]
+    return np.maximum(bmr * _MULTIPLIERS[goal] + _ADJUSTMENTS[goal], MIN_DAILY_CALORIES)
@@ -0,0 +1,295 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels, in Prometheus text format."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+class Gauge(_Metric):
+    """Value that goes up and down, with optional labels, in Prometheus text format."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels, in Prometheus text format."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """Count and sum per label tuple."""
+        with self._lock:
+            return {key: {"count": total, "sum": value_sum} for key, (_, total, value_sum) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, value_sum) in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, counts):
+                    le = 'le="%g"' % bound
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {total}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {value_sum:.6f}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+REQUEST_SECONDS = Histogram("dietbot_request_seconds", "End-to-end chat request latency.", ["endpoint"])
+NODE_SECONDS = Histogram("dietbot_node_seconds", "Wall time per LangGraph node.", ["node"])
+TOOL_SECONDS = Histogram("dietbot_tool_seconds", "Wall time per tool call.", ["tool", "status"])
+LLM_CALLS = Counter("dietbot_llm_calls_total", "Chat model calls.", ["outcome"])
+LLM_TOKENS = Counter("dietbot_llm_tokens_total", "Chat model tokens.", ["kind"])
+REQUEST_TOKENS = Histogram("dietbot_request_llm_tokens", "Chat model tokens per request.", ["endpoint"], TOKEN_BUCKETS)
+EXTERNAL_CALLS = Counter("dietbot_external_calls_total", "Calls leaving the process.", ["target", "outcome"])
+CACHE_LOOKUPS = Counter("dietbot_cache_lookups_total", "Cache lookups by result.", ["cache", "result"])
+GEMINI_QUEUE_DEPTH = Gauge("dietbot_gemini_queue_depth", "Gemini calls waiting in the scheduler.", ["kind", "lane"])
+GEMINI_IN_FLIGHT = Gauge("dietbot_gemini_in_flight", "Gemini calls running.", ["kind"])
+GEMINI_WAIT_SECONDS = Histogram("dietbot_gemini_wait_seconds", "Time Gemini calls spent queued in the scheduler.", ["kind", "lane"])
+GEMINI_THROTTLED = Counter("dietbot_gemini_throttled_total", "Gemini calls rejected with 429 / quota errors.", ["kind", "outcome"])
+COALESCED_CALLS = Counter("dietbot_coalesced_calls_total", "Tool calls that ran (leader) or joined an identical in-flight call (shared).", ["tool", "role"])
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+@dataclass
+class RequestTrace:
+    """What one request spent: node and tool time, tokens, outbound calls, cache results."""
+    endpoint: str
+    started: float = field(default_factory=time.perf_counter)
+    nodes: Dict[str, float] = field(default_factory=dict)
+    tools: Dict[str, float] = field(default_factory=dict)
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    external_calls: TallyCounter = field(default_factory=TallyCounter)
+    cache: TallyCounter = field(default_factory=TallyCounter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def summary(self) -> str:
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        nodes = ",".join(f"{name}:{seconds * 1000:.0f}" for name, seconds in self.nodes.items())
+        tools = ",".join(f"{name}:{seconds * 1000:.0f}" for name, seconds in self.tools.items())
+        external = ",".join(f"{name}:{count}" for name, count in sorted(self.external_calls.items()))
+        cache = ",".join(f"{name}:{count}" for name, count in sorted(self.cache.items()))
+        return (
+            f"endpoint={self.endpoint} total_ms={elapsed_ms:.0f} nodes_ms=[{nodes}] tools_ms=[{tools}] "
+            f"llm_calls={self.llm_calls} input_tokens={self.input_tokens} output_tokens={self.output_tokens} "
+            f"external=[{external}] cache=[{cache}]"
+        )
+
+# Copied into asyncio tasks and to_thread calls, so nested work lands on the same trace.
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+@contextmanager
+def trace_request(endpoint: str) -> Iterator[RequestTrace]:
+    """Collect a `RequestTrace` for the enclosed work and log its summary at INFO."""
+    trace = RequestTrace(endpoint)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        REQUEST_SECONDS.observe(time.perf_counter() - trace.started, endpoint=endpoint)
+        REQUEST_TOKENS.observe(trace.input_tokens + trace.output_tokens, endpoint=endpoint)
+        logger.info(f"request_summary {trace.summary()}")
+
+def _add_time(bucket: str, name: str, seconds: float) -> None:
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            timings = getattr(trace, bucket)
+            timings[name] = timings.get(name, 0.0) + seconds
+
+def record_llm_call(outcome: str, input_tokens: int = 0, output_tokens: int = 0) -> None:
+    LLM_CALLS.inc(outcome=outcome)
+    LLM_TOKENS.inc(input_tokens, kind="input")
+    LLM_TOKENS.inc(output_tokens, kind="output")
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            trace.llm_calls += 1
+            trace.input_tokens += input_tokens
+            trace.output_tokens += output_tokens
+
+def record_external_call(target: str, outcome: str = "ok") -> None:
+    EXTERNAL_CALLS.inc(target=target, outcome=outcome)
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            trace.external_calls[target] += 1
+
+def record_cache(cache: str, result: str, count: int = 1) -> None:
+    if count <= 0:
+        return
+    CACHE_LOOKUPS.inc(count, cache=cache, result=result)
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            trace.cache[f"{cache}_{result}"] += count
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """Wrap a LangGraph node (sync or async) to record its wall time."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            started = time.perf_counter()
+            try:
+                return await fn(state)
+            finally:
+                elapsed = time.perf_counter() - started
+                NODE_SECONDS.observe(elapsed, node=name)
+                _add_time("nodes", name, elapsed)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        started = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            elapsed = time.perf_counter() - started
+            NODE_SECONDS.observe(elapsed, node=name)
+            _add_time("nodes", name, elapsed)
+    return wrapper
+
+def _tool_status(result: Any) -> str:
+    if isinstance(result, dict):
+        inner = result.get("result", result)
+        if isinstance(inner, dict) and inner.get("status") == "error":
+            return "error"
+    elif isinstance(result, str) and result.startswith("Error"):
+        return "error"
+    return "ok"
+
+def instrument_tool(tool):
+    """Time every call of a LangChain tool's function, labelled by tool and outcome.
+
+    The schema was already derived from the original function, so only the
+    callable is swapped.
+    """
+    func = tool.func
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        status = "exception"
+        try:
+            result = func(*args, **kwargs)
+            status = _tool_status(result)
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            TOOL_SECONDS.observe(elapsed, tool=tool.name, status=status)
+            _add_time("tools", tool.name, elapsed)
+
+    tool.func = timed
+    return tool
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Counts chat model calls and their token usage from `usage_metadata`."""
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        record_llm_call("ok", input_tokens, output_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs) -> None:
+        record_llm_call("error")
+
+TOKEN_USAGE_HANDLER = TokenUsageHandler()
@@ -0,0 +1,83 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ToolPool(Executor):
+    """Bounded thread pool for tool calls whose slots survive hung calls.
+
+    At most `max_workers` calls run for callers that are still waiting; the
+    rest queue. A running thread cannot be interrupted, so when its caller
+    times out `release` moves the call to a separate allowance of
+    `max_abandoned` threads and hands its slot to the next queued call.
+    Once that allowance is used up, timed-out calls keep their slots until
+    they finish, as in a plain pool, so there are never more than
+    `max_workers + max_abandoned` tool threads.
+    """
+
+    def __init__(self, max_workers: int, max_abandoned: int, thread_name_prefix: str = "tool"):
+        self.max_workers = max(1, max_workers)
+        self.max_abandoned = max(0, max_abandoned)
+        self.thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._queue: Deque[Tuple[Future, Callable, tuple, Dict[str, Any]]] = deque()
+        self._holding: Set[Future] = set()  # running calls that hold a slot
+        self._abandoned = 0
+        self._started = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            self._queue.append((future, fn, args, kwargs))
+            self._start_ready()
+        return future
+
+    def _start_ready(self) -> None:
+        # Called with the lock held.
+        while self._queue and len(self._holding) < self.max_workers:
+            future, fn, args, kwargs = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue  # its caller gave up while it was queued
+            self._holding.add(future)
+            self._started += 1
+            threading.Thread(
+                target=self._work, args=(future, fn, args, kwargs),
+                name=f"{self.thread_name_prefix}_{self._started}", daemon=True,
+            ).start()
+
+    def _work(self, future: Future, fn: Callable, args: tuple, kwargs: Dict[str, Any]) -> None:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                if future in self._holding:
+                    self._holding.discard(future)
+                else:
+                    self._abandoned -= 1
+                self._start_ready()
+
+    def release(self, future: Future) -> None:
+        """The caller stopped waiting: drop the call if it is still queued,
+        otherwise free its slot if the abandoned allowance has room."""
+        if future.cancel():
+            return
+        with self._lock:
+            if future not in self._holding:
+                return
+            if self._abandoned >= self.max_abandoned:
+                logger.warning("Tool pool: abandoned allowance used up; a timed-out call keeps its slot")
+                return
+            self._holding.discard(future)
+            self._abandoned += 1
+            self._start_ready()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"running": len(self._holding), "queued": len(self._queue), "abandoned": self._abandoned}
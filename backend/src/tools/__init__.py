@@ -1,11 +1,21 @@
 from langchain_core.tools import StructuredTool
-from src.config import LLM
+from src.compliance import check_ingredients, check_text, describe, parse_profile
+from src.config import MEAL_PLAN_LLM_POLISH, get_llm
+from src.meal_planner import compose_meal_plan, format_meal_plan, plan_constraints
+from src.nutrients import MIN_RECIPE_NAME_SCORE, estimate, estimate_meal, format_estimate
+from src.targets import daily_calories, parse_goal, parse_profiles
+from src.response_cache import NUTRITION_CACHE, RECIPE_CACHE, normalize_dish
+from src.recipe_store import MEALDB_BASE_URL, RECIPE_STORE, meal_ingredients, name_score
+from src.streaming import STREAM_TAG
+from src.telemetry import instrument_tool, record_cache
 import requests
-from langchain_community.tools import DuckDuckGoSearchRun
+import logging
+from src.tools.http_client import HTTP_CLIENT, web_search
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel
-import json
-import re
+from typing import Optional
+
+logger = logging.getLogger(__name__)
 
 class DietRecommendationsInput(BaseModel):
     age: str  # Accepts "60.0"; will convert to float/int
@@ -36,149 +46,61 @@ def diet_recommendations(
         "restrictions": restrictions,
         "goal": goal
     }
-    print(input_data)
-    try:
-        age = int(float(input_data["age"]))
-        if age <= 0:
-            age = 30
-    except (TypeError, ValueError):
-        age = 30
-    
-    gender = input_data["gender"].lower().strip()
-    if gender not in ["male", "female"]:
-        gender = "male"
-    
-    # Process height with better validation
-    height = input_data["height"].strip()
-    try:
-        if "'" in height:
-            feet, inches = height.split("'")
-            inches = inches.strip('"')
-            height_inches = int(feet) * 12 + float(inches)
-        elif "cm" in height.lower():
-            height_cm = float(height.lower().replace("cm", "").strip())
-            height_inches = height_cm / 2.54
-        else:
-            height_inches = float(height)
-        if height_inches <= 0:
-            height_inches = 67  # More average default (5'7")
-    except (ValueError, TypeError):
-        height_inches = 67
-    height_cm = height_inches * 2.54
-    
-    # Process weight with better validation
+    logger.debug(f"diet_recommendations input: {input_data}")
+    calories = float(daily_calories(parse_profiles([input_data]))[0])
+    preferences = preferences.strip() or "none"
+    restrictions = restrictions.strip() or "none"
+    return meal_plan_for(calories, parse_profile(preferences, restrictions), parse_goal(goal))
+
+def meal_plan_for(calories: float, profile: dict, goal: str) -> dict:
+    """The `diet_recommendations` result for a daily calorie target and a parsed
+    dietary profile (see `src.compliance.parse_profile`)."""
     try:
-        weight = float(input_data["weight"])
-        if weight <= 0:
-            weight = 154  # More average default
-    except (TypeError, ValueError):
-        weight = 154
+        plan = compose_meal_plan(calories, **plan_constraints(profile, goal))
+    except ValueError as e:
+        return {
+            "daily_calories": round(calories),
+            "meal_plan": f"Unable to generate a meal plan that meets all your dietary requirements: {str(e)}"
+        }
 
-    weight_kg = weight 
-    
-    preferences = input_data["preferences"].strip() or "none"
-    restrictions = input_data["restrictions"].strip() or "none"
-    goal = input_data["goal"].lower().strip() or "maintenance"
-    if goal not in ["weight_loss", "muscle_gain", "maintenance"]:
-        goal = "maintenance"
-    
-    # BMR calculation
-    if gender == "male":
-        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + 5
-    else:
-        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
-    
-    # Calorie adjustment
-    if goal == "weight_loss":
-        calories = bmr * 1.2 - 500
-    elif goal == "muscle_gain":
-        calories = bmr * 1.6 + 300 
-    else:
-        calories = bmr * 1.4
-    calories = max(calories, 1800)
-    
-    is_vegetarian = "vegetarian" in preferences.lower() or "veg" in preferences.lower()
-    no_dairy = "no dairy" in restrictions.lower() or "dairy-free" in restrictions.lower()
-    is_non_veg = "non-veg" in preferences.lower() or "meat" in preferences.lower() or "non-vegetarian" in preferences.lower()
-    
-    # Build comprehensive prompt with all constraints upfront to avoid regeneration
+    return {
+        "daily_calories": round(calories),
+        "planned_calories": plan["total_calories"],
+        "shortfall_calories": plan["shortfall_calories"],
+        "meal_plan": render_meal_plan(plan, profile),
+        "meals": plan["meals"]
+    }
+
+def render_meal_plan(plan: dict, profile: dict) -> str:
+    """Text for one day's plan, reworded by the LLM when MEAL_PLAN_LLM_POLISH is on."""
+    meal_plan = format_meal_plan(plan)
+    if MEAL_PLAN_LLM_POLISH:
+        meal_plan = _polish_meal_plan(meal_plan, plan, profile)
+    return meal_plan
+
+def _polish_meal_plan(meal_plan: str, plan: dict, profile: dict) -> str:
+    """Optional LLM pass that only rewrites wording; falls back to the local text
+    if the model drops a meal or breaks a dietary constraint."""
     prompt = f"""
-    Create a daily meal plan for a user with these exact requirements:
-    - Age: {age}
-    - Gender: {gender}
-    - Height: {height_cm}cm
-    - Weight: {weight_kg}kg
-    - Preferences: {preferences}
-    - Restrictions: {restrictions}
-    - Goal: {goal}
-    - Target calories: {round(calories)}
-    
-    Requirements (you MUST follow ALL these guidelines):
-    - Generate exactly 4 meals (breakfast, lunch, dinner, snack)
-    - Each meal should have a calorie estimate, with total ~{round(calories)} calories
-    - Brief descriptions (1-2 sentences per meal)
-    - Format as a numbered list (1. Meal: description (~calories calories))
-    {f'- This is a VEGETARIAN plan: NO meat, fish, poultry, or animal products allowed' if is_vegetarian else ''}
-    {f'- This is a NON-VEGETARIAN plan: MUST include at least one meal with chicken, beef, fish, or poultry' if is_non_veg else ''}
-    {f'- NO DAIRY allowed: No milk, cheese, yogurt, or butter (use plant-based alternatives instead)' if no_dairy else ''}
-    {f'- For muscle gain goal: Include high-protein foods in each meal' if goal == "muscle_gain" else ''}
-    
-    Review your meal plan carefully before finalizing to ensure it follows ALL requirements precisely.
-    Return only the meal plan text with no explanations or comments.
+    Rewrite the following meal plan so the descriptions read warmly and naturally.
+    Keep exactly the same numbered meals, meal names, portions and calorie numbers, in the same order.
+    Do not add or remove foods. Return only the meal plan text.
+
+    {meal_plan}
     """
-    
-    print(prompt)
     try:
-        response = LLM.invoke(prompt)
-        meal_plan = response.content.strip() or "Unable to generate compliant meal plan."
-        
-        # Validate the result against critical requirements
-        validation_failed = False
-        error_reason = ""
-        
-        if no_dairy and any(x in meal_plan.lower() for x in ["yogurt", "cheese", "milk", "butter"]):
-            validation_failed = True
-            error_reason = "dairy restriction violation"
-        
-        if is_vegetarian and any(x in meal_plan.lower() for x in ["chicken", "salmon", "beef", "fish", "poultry", "meat"]):
-            validation_failed = True
-            error_reason = "vegetarian restriction violation"
-        
-        if is_non_veg and not any(x in meal_plan.lower() for x in ["chicken", "salmon", "beef", "fish", "poultry", "meat"]):
-            validation_failed = True
-            error_reason = "non-vegetarian requirement not met"
-        
-        # If validation failed, make one more attempt with a stronger prompt
-        if validation_failed:
-            correction_prompt = f"""
-            The previous meal plan failed validation due to: {error_reason}.
-            
-            Create a NEW daily meal plan that strictly follows these requirements:
-            - Target calories: {round(calories)}
-            {f'- VEGETARIAN ONLY: NO meat, fish, poultry, or animal products' if is_vegetarian else ''}
-            {f'- NON-VEGETARIAN: MUST include at least one meal with chicken, beef, fish, or poultry' if is_non_veg else ''}
-            {f'- NO DAIRY ALLOWED: No milk, cheese, yogurt, or butter' if no_dairy else ''}
-            
-            Generate 4 meals (breakfast, lunch, dinner, snack) with calories totaling ~{round(calories)}.
-            Format as numbered list. Focus only on meeting the dietary requirements.
-            """
-            
-            response = LLM.invoke(correction_prompt)
-            meal_plan = response.content.strip() or "Unable to generate compliant meal plan."
-            
-            # Final validation check
-            if (no_dairy and any(x in meal_plan.lower() for x in ["yogurt", "cheese", "milk", "butter"])) or \
-               (is_vegetarian and any(x in meal_plan.lower() for x in ["chicken", "salmon", "beef", "fish", "poultry", "meat"])) or \
-               (is_non_veg and not any(x in meal_plan.lower() for x in ["chicken", "salmon", "beef", "fish", "poultry", "meat"])):
-                meal_plan = "Unable to generate a meal plan that meets all your dietary requirements. Please consider adjusting your restrictions or preferences."
-
+        response = get_llm().invoke(prompt, config={"tags": [STREAM_TAG]})
+        polished = response.content.strip()
     except Exception as e:
-        meal_plan = f"Unable to generate meal plan: {str(e)}"
+        logger.warning(f"Meal plan polish failed: {str(e)}")
+        return meal_plan
 
-    return {
-        "daily_calories": round(calories),
-        "meal_plan": meal_plan
-    }
+    text = polished.lower()
+    if not polished or not all(meal["name"].lower() in text for meal in plan["meals"]):
+        return meal_plan
+    if check_text(polished, profile)["violations"]:
+        return meal_plan
+    return polished
 
 diet_recommendations_tool = StructuredTool.from_function(
     func=diet_recommendations,
@@ -191,9 +113,67 @@ def recipe_fetcher(recipe_name: str, preferences: str = "", restrictions: str =
     """
     Fetches a recipe from TheMealDB API or generates one via LLM if no match.
     Validates preferences/restrictions and prompts if mismatched.
+    Answers are cached per dish and preference/restriction pair.
+    """
+    scope = ((preferences or "").strip().lower(), (restrictions or "").strip().lower())
+    return RECIPE_CACHE.get_or_compute(
+        recipe_name,
+        scope,
+        lambda: _fetch_recipe(recipe_name, preferences, restrictions),
+        should_cache=lambda value: value.get("result", {}).get("status") != "error",
+    )
+
+def _find_meals(recipe_name: str) -> list:
+    """Candidate meals for `recipe_name`: the local TheMealDB mirror first, the live API otherwise."""
+    local = RECIPE_STORE.search(recipe_name)
+    if local:
+        logger.debug(f"Found {len(local)} local recipe candidates for '{recipe_name}'")
+        return [meal for _, meal in local]
+
+    url = f"{MEALDB_BASE_URL}/search.php?s={requests.utils.quote(recipe_name)}"
+    logger.debug(f"Sending request to {url}")
+    response = HTTP_CLIENT.get(url)
+    response.raise_for_status()
+    meals = response.json().get("meals") or []
+    if meals:
+        # Keep what we fetched so the next lookup for it stays local.
+        RECIPE_STORE.import_meals(meals)
+    return meals
+
+def _best_meal(recipe_name: str, meals: list, profile: dict) -> dict:
+    """Pick the candidate whose name is closest to the request rather than the first hit,
+    preferring candidates that already comply with the user's profile."""
+    query = normalize_dish(recipe_name)
+    return max(meals, key=lambda meal: (
+        check_ingredients(meal_ingredients(meal), profile)["compliant"],
+        name_score(query, normalize_dish(meal.get("strMeal") or "")),
+    ))
+
+def _check_ambiguous(meal_name: str, compliance: dict, preferences: str, restrictions: str) -> dict:
+    """Ask the LLM about only the ingredients the rules could not settle (e.g. "stock").
+
+    Treats any failure to get a clear answer as a conflict.
     """
-    print(f"DEBUG: Running recipe_fetcher with recipe_name='{recipe_name}', "
-          f"preferences='{preferences}', restrictions='{restrictions}'")
+    items = ", ".join(item["ingredient"] for item in compliance["ambiguous"])
+    prompt = (
+        f"A recipe for {meal_name} uses these ingredients: {items}.\n"
+        f"User preferences: {preferences or 'none'}. User restrictions: {restrictions or 'none'}.\n"
+        "As typically prepared, could any of these ingredients conflict with the preferences or restrictions? "
+        "Answer with YES or NO on the first line, then one short sentence naming the ingredient."
+    )
+    try:
+        answer = get_llm().invoke(prompt).content.strip()
+    except Exception as e:
+        logger.warning(f"Ambiguous ingredient check failed: {str(e)}")
+        return {"matches": False, "reason": f"could not confirm that {items} suit your diet"}
+    first_line, _, rest = answer.partition("\n")
+    if first_line.strip().upper().startswith("NO"):
+        return {"matches": True, "reason": "matches your preferences and restrictions"}
+    return {"matches": False, "reason": rest.strip() or f"{items} may not suit your diet"}
+
+def _fetch_recipe(recipe_name: str, preferences: str = "", restrictions: str = "") -> dict:
+    logger.debug(f"Running recipe_fetcher with recipe_name='{recipe_name}', "
+                 f"preferences='{preferences}', restrictions='{restrictions}'")
     
     recipe_name = recipe_name.strip().lower() if recipe_name else ""
     preferences = preferences.strip().lower() if preferences else ""
@@ -205,29 +185,16 @@ def recipe_fetcher(recipe_name: str, preferences: str = "", restrictions: str =
             "result": {"content": "Error: Recipe name is required.", "status": "error"}
         }
     
-    # TheMealDB API
-    base_url = "https://www.themealdb.com/api/json/v1/1"
-    url = f"{base_url}/search.php?s={requests.utils.quote(recipe_name)}"
-    print(f"DEBUG: Sending request to {url}")
-    
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        meals = data.get("meals")
+        meals = _find_meals(recipe_name)
         
         if not meals:
-            print(f"DEBUG: No recipes found for '{recipe_name}'")
+            logger.debug(f"No recipes found for '{recipe_name}'")
         else:
-            meal = meals[0]
-            ingredients = [
-                meal.get(f"strIngredient{i}", "").lower()
-                for i in range(1, 21)
-                if meal.get(f"strIngredient{i}")
-            ]
-            meal_name = meal.get("strMeal", "").lower()
-            category = meal.get("strCategory", "").lower()
-            tags = meal.get("strTags", "").lower()
+            profile = parse_profile(preferences, restrictions)
+            meal = _best_meal(recipe_name, meals, profile)
+            ingredients = meal_ingredients(meal)
+            meal_name = (meal.get("strMeal") or "").lower()
             
             ingredients_list = [
                 f"- {meal.get(f'strMeasure{i}', '')} {meal.get(f'strIngredient{i}', '')}".strip()
@@ -235,51 +202,14 @@ def recipe_fetcher(recipe_name: str, preferences: str = "", restrictions: str =
                 if meal.get(f"strIngredient{i}") and meal.get(f"strIngredient{i}").strip()
             ]
             
-            validation_prompt = ChatPromptTemplate.from_messages([
-                ("system", """
-                    You are a diet assistant. Determine if a recipe matches user preferences and restrictions with high accuracy.
-                    Recipe: {recipe_name}
-                    Category: {category}
-                    Tags: {tags}
-                    Ingredients: {ingredients}
-                    User Preferences: {preferences}
-                    User Restrictions: {restrictions}
-                    
-                    - Preferences (e.g., non-vegetarian) mean the recipe MUST include meat or animal products unless specified otherwise.
-                    - Restrictions (e.g., no dairy) mean those ingredients MUST be absent.
-                    - Return true for 'matches' only if the recipe fully aligns with preferences and has no restricted ingredients.
-                    
-                    Respond with a JSON object only:
-                    {{"matches": true/false, "reason": "Detailed explanation if it doesn't match"}}
-                """),
-                ("user", "Validate the recipe.")
-            ])
-            
             try:
-                validation_response = LLM.invoke(validation_prompt.format_messages(
-                    recipe_name=meal_name,
-                    category=category,
-                    tags=tags,
-                    ingredients=", ".join(ingredients),
-                    preferences=preferences or "none",
-                    restrictions=restrictions or "none"
-                ))
-                
-                try:
-                    validation_text = validation_response.content
-                    validation_text = re.search(r'\{.*\}', validation_text, re.DOTALL)
-                    if validation_text:
-                        validation = json.loads(validation_text.group(0))
-                    else:
-                        matches = "true" in validation_response.content.lower() and "matches: true" in validation_response.content.lower()
-                        reason = re.search(r'reason:?\s*(.*?)(?:\n|$)', validation_response.content, re.DOTALL)
-                        reason = reason.group(1) if reason else "Unknown validation issue"
-                        validation = {"matches": matches, "reason": reason}
-                except Exception as e:
-                    print(f"DEBUG: Validation parsing error: {str(e)}")
-                    validation = {"matches": False, "reason": "Could not validate recipe against preferences"}
+                compliance = check_ingredients(ingredients, profile)
+                if compliance["compliant"] and compliance["ambiguous"]:
+                    validation = _check_ambiguous(meal_name, compliance, preferences, restrictions)
+                else:
+                    validation = {"matches": compliance["compliant"], "reason": describe(compliance)}
                 
-                print(f"DEBUG: LLM validation: {validation}")
+                logger.debug(f"Compliance check: {validation}")
                 
                 if validation.get("matches", False):
                     result = (
@@ -312,7 +242,7 @@ def recipe_fetcher(recipe_name: str, preferences: str = "", restrictions: str =
                         }
                     }
             except Exception as e:
-                print(f"DEBUG: LLM validation error: {str(e)}")
+                logger.error(f"Compliance check error: {str(e)}")
         
         # Fallback to LLM generation
         fallback_prompt = ChatPromptTemplate.from_messages([
@@ -343,22 +273,22 @@ def recipe_fetcher(recipe_name: str, preferences: str = "", restrictions: str =
         ])
         
         try:
-            fallback_response = LLM.invoke(fallback_prompt.format_messages())
+            fallback_response = get_llm().invoke(fallback_prompt.format_messages(), config={"tags": [STREAM_TAG]})
             result = fallback_response.content.strip()
-            print(f"DEBUG: Fallback recipe generated: {result}")
+            logger.debug("Fallback recipe generated: %s", result)
             return {
                 "tool": "recipe_fetcher",
                 "result": {"content": result, "status": "success"}
             }
         except Exception as e:
-            print(f"DEBUG: Fallback recipe error: {str(e)}")
+            logger.error(f"Fallback recipe error: {str(e)}")
             return {
                 "tool": "recipe_fetcher",
                 "result": {"content": f"Error generating recipe: {str(e)}", "status": "error"}
             }
             
     except requests.RequestException as e:
-        print(f"DEBUG: TheMealDB API error: {str(e)}")
+        logger.error(f"TheMealDB API error: {str(e)}")
         return {
             "tool": "recipe_fetcher",
             "result": {"content": f"Error fetching recipe: {str(e)}", "status": "error"}
@@ -371,16 +301,42 @@ recipe_fetcher_tool = StructuredTool.from_function(
 )
 
 def nut_content_fetcher(dish_name: str) -> str:
-    """Fetches nutritional information for a dish using DuckDuckGo search."""
+    """Fetches nutritional information for a dish from the local nutrient table,
+    falling back to DuckDuckGo search for foods it doesn't know."""
+    local = _local_nutrition(dish_name)
+    if local is not None:
+        return local
+    return NUTRITION_CACHE.get_or_compute(
+        dish_name,
+        None,
+        lambda: _fetch_nutrition(dish_name),
+        should_cache=lambda value: not value.startswith("Error"),
+    )
+
+def _local_nutrition(dish_name: str) -> Optional[str]:
+    """Nutrients from the local table (a dish, food or list of measured items),
+    else computed from a closely matching recipe in the local TheMealDB mirror."""
+    try:
+        result = estimate(dish_name)
+        if result is None:
+            matches = RECIPE_STORE.search(dish_name, limit=1, min_score=MIN_RECIPE_NAME_SCORE)
+            if matches:
+                result = estimate_meal(matches[0][1])
+    except Exception as e:
+        logger.warning(f"Local nutrient lookup failed for '{dish_name}': {e}")
+        return None
+    record_cache("nutrient_db", "hit" if result else "miss")
+    return format_estimate(dish_name, result) if result else None
+
+def _fetch_nutrition(dish_name: str) -> str:
 
     dish_name = dish_name.strip() if dish_name else ""
     if not dish_name:
         return "Error: Dish name is required."
     
-    search = DuckDuckGoSearchRun()
     query = f"nutritional content of {dish_name} calories protein fat carbs macro-nutrients and micro-nutrients"
     try:
-        result = search.invoke(query)
+        result = web_search(query)
         good_prompt=f"""
             Instructions
 
@@ -402,7 +358,7 @@ def nut_content_fetcher(dish_name: str) -> str:
             If specific values (e.g., for vitamins or minerals) are unavailable in the context, note the absence and suggest a reliable source (e.g., USDA FoodData Central database) for further details.
                     """
                 
-        good_response = LLM.invoke(good_prompt)
+        good_response = get_llm().invoke(good_prompt, config={"tags": [STREAM_TAG]})
         return f"### Nutritional Content of {dish_name}\n\n{good_response.content}"
     except Exception as e:
         return f"Error fetching nutritional data: {str(e)}"
@@ -410,7 +366,7 @@ def nut_content_fetcher(dish_name: str) -> str:
 nut_content_fetcher_tool = StructuredTool.from_function(
     func=nut_content_fetcher,
     name="nut_content_fetcher",
-    description="Fetches nutritional information (calories, protein, fat, carbs) for a dish using DuckDuckGo."
+    description="Fetches nutritional information (calories, protein, fat, carbs) for a dish or a list of measured foods, e.g. '2 eggs and a banana'."
 )
 
-TOOLS = [diet_recommendations_tool, recipe_fetcher_tool, nut_content_fetcher_tool]
\ No newline at end of file
+TOOLS = [instrument_tool(tool) for tool in (diet_recommendations_tool, recipe_fetcher_tool, nut_content_fetcher_tool)]
\ No newline at end of file
@@ -0,0 +1,186 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import (
+    HTTP_BACKOFF_BASE_SECONDS,
+    HTTP_BACKOFF_CAP_SECONDS,
+    HTTP_BREAKER_FAILURES,
+    HTTP_BREAKER_RESET_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_MAX_RETRIES,
+    HTTP_PER_HOST_CONCURRENCY,
+    HTTP_POOL_SIZE,
+    HTTP_READ_TIMEOUT_SECONDS,
+)
+from src.telemetry import record_external_call
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while a host's breaker is open."""
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; after `reset_timeout`
+    one trial call is let through (half-open) and its outcome closes or re-opens it."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+class HttpClient:
+    """Shared outbound client for the tools.
+
+    One pooled keep-alive `requests.Session`, per-host concurrency limits,
+    connect/read timeouts, retries with full-jitter exponential backoff on
+    connection errors and retryable statuses, and a per-host circuit breaker.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        per_host_concurrency: int = HTTP_PER_HOST_CONCURRENCY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = HTTP_READ_TIMEOUT_SECONDS,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE_SECONDS,
+        backoff_cap: float = HTTP_BACKOFF_CAP_SECONDS,
+        breaker_failures: int = HTTP_BREAKER_FAILURES,
+        breaker_reset: float = HTTP_BREAKER_RESET_SECONDS,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._limits: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(per_host_concurrency)
+        )
+        self._breakers: Dict[str, CircuitBreaker] = defaultdict(
+            lambda: CircuitBreaker(breaker_failures, breaker_reset)
+        )
+        self._registry_lock = threading.Lock()
+
+    def _limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._registry_lock:
+            return self._limits[host]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._registry_lock:
+            return self._breakers[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def call(self, host: str, fn: Callable[[], Any], is_retryable: Callable[[Exception], bool] = lambda e: True) -> Any:
+        """Run `fn` under `host`'s concurrency limit, breaker and retry policy.
+
+        Used directly for clients that manage their own HTTP (e.g. search tools).
+        """
+        breaker = self.breaker(host)
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                record_external_call(host, "circuit_open")
+                raise CircuitOpenError(f"Circuit open for {host}; skipping call")
+            try:
+                with self._limit(host):
+                    result = fn()
+            except Exception as e:
+                record_external_call(host, "error")
+                breaker.record_failure()
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, getattr(e, "retry_after", None))
+                logger.warning(f"Call to {host} failed ({str(e)}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            record_external_call(host, "ok")
+            breaker.record_success()
+            return result
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self.timeout)
+
+        def send():
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code in RETRY_STATUSES:
+                error = requests.HTTPError(f"{response.status_code} from {host}", response=response)
+                error.retry_after = response.headers.get("Retry-After")
+                raise error
+            return response
+
+        def is_retryable(e: Exception) -> bool:
+            return isinstance(e, (requests.ConnectionError, requests.Timeout, requests.HTTPError))
+
+        return self.call(host, send, is_retryable)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+HTTP_CLIENT = HttpClient()
+
+_search_tool = None
+_search_lock = threading.Lock()
+
+def get_search_tool():
+    """Process-wide DuckDuckGo search tool, built on first use."""
+    global _search_tool
+    if _search_tool is None:
+        with _search_lock:
+            if _search_tool is None:
+                from langchain_community.tools import DuckDuckGoSearchRun
+                _search_tool = DuckDuckGoSearchRun()
+    return _search_tool
+
+def web_search(query: str) -> str:
+    return HTTP_CLIENT.call("duckduckgo.com", lambda: get_search_tool().invoke(query))
@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 1024
+# Metadata values longer than this (e.g. stored tool output) are not indexed for filtering.
+MAX_INDEXED_VALUE_LENGTH = 256
+
+@dataclass
+class Vector:
+    id: str
+    values: List[float]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class FetchResponse:
+    vectors: Dict[str, Vector]
+
+@dataclass
+class Match:
+    id: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
+    values: Optional[List[float]] = None
+
+@dataclass
+class QueryResponse:
+    matches: List[Match]
+
+_COMPARATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+}
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[dict]) -> bool:
+    """Evaluate a Pinecone-style metadata filter (`$eq`, `$in`, `$gt`, `$and`, ...)."""
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, target in condition.items():
+                if op not in _COMPARATORS:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                if not _COMPARATORS[op](value, target):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+def _indexable(value: Any) -> bool:
+    return isinstance(value, (bool, int, float)) or (isinstance(value, str) and len(value) <= MAX_INDEXED_VALUE_LENGTH)
+
+class LocalVectorIndex:
+    """In-process flat (exact) cosine index with the Pinecone `Index` surface
+    the app uses: `upsert`, `fetch`, `query` and `describe_index_stats`.
+
+    Unit-normalised float32 vectors live in a memory-mapped file that grows by
+    doubling; ids and metadata live in SQLite next to it. Equality and `$in`
+    filters on short metadata values are answered from an in-memory posting
+    list before scoring, so a per-user query only touches that user's rows.
+
+    Single-process only: the in-memory id/metadata mirrors are read once at
+    startup and writes take no cross-process lock, so several workers sharing
+    one `path` would diverge. Multi-worker deployments should use Pinecone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(path, "metadata.db"), check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, metadata TEXT NOT NULL)"
+            )
+        self.dimension: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        self._postings: Dict[Tuple[str, Any], Set[int]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'dimension'").fetchone()
+        if row is None:
+            return
+        self.dimension = int(row[0])
+        count = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+        self._open_matrix(max(count, INITIAL_CAPACITY))
+        self._ids = [None] * count
+        self._metadata = [{} for _ in range(count)]
+        for vector_id, row_number, metadata in self._conn.execute("SELECT id, row, metadata FROM vectors"):
+            self._set_row(vector_id, row_number, json.loads(metadata))
+        logger.info(f"Loaded {len(self._rows)} vectors ({self.dimension}d) from {self.path}")
+
+    def _open_matrix(self, capacity: int) -> None:
+        needed = capacity * self.dimension * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < needed:
+                f.truncate(needed)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _set_row(self, vector_id: str, row: int, metadata: Dict[str, Any]) -> None:
+        if row < len(self._ids) and self._ids[row] is not None:
+            for key, value in self._metadata[row].items():
+                if _indexable(value):
+                    self._postings.get((key, value), set()).discard(row)
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._metadata.append({})
+        self._ids[row] = vector_id
+        self._metadata[row] = metadata
+        self._rows[vector_id] = row
+        for key, value in metadata.items():
+            if _indexable(value):
+                self._postings.setdefault((key, value), set()).add(row)
+
+    def upsert(self, vectors: Iterable, **kwargs) -> Dict[str, int]:
+        """Insert or overwrite `(id, values, metadata)` tuples or dicts with those
+        keys; if an id repeats within the batch the last record wins."""
+        by_id = {}
+        for item in vectors:
+            if isinstance(item, dict):
+                by_id[item["id"]] = (item["id"], item["values"], item.get("metadata") or {})
+            else:
+                vector_id, values, *rest = item
+                by_id[vector_id] = (vector_id, values, rest[0] if rest else {})
+        records = list(by_id.values())
+        if not records:
+            return {"upserted_count": 0}
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = len(records[0][1])
+                with self._conn:
+                    self._conn.execute("INSERT INTO settings (key, value) VALUES ('dimension', ?)", (str(self.dimension),))
+                self._open_matrix(INITIAL_CAPACITY)
+            matrix = np.asarray([values for _, values, _ in records], dtype=np.float32)
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dimension}")
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+
+            rows = []
+            next_row = len(self._ids)
+            for vector_id, _, _ in records:
+                if vector_id in self._rows:
+                    rows.append(self._rows[vector_id])
+                else:
+                    rows.append(next_row)
+                    next_row += 1
+            if next_row > self._matrix.shape[0]:
+                capacity = self._matrix.shape[0]
+                while capacity < next_row:
+                    capacity *= 2
+                self._open_matrix(capacity)
+
+            self._matrix[rows] = matrix
+            self._matrix.flush()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)",
+                    [(vector_id, row, json.dumps(metadata)) for (vector_id, _, metadata), row in zip(records, rows)],
+                )
+            for (vector_id, _, metadata), row in zip(records, rows):
+                self._set_row(vector_id, row, dict(metadata))
+        return {"upserted_count": len(records)}
+
+    def fetch(self, ids: List[str], **kwargs) -> FetchResponse:
+        with self._lock:
+            vectors = {}
+            for vector_id in ids:
+                row = self._rows.get(vector_id)
+                if row is not None:
+                    vectors[vector_id] = Vector(vector_id, self._matrix[row].tolist(), dict(self._metadata[row]))
+            return FetchResponse(vectors=vectors)
+
+    def _candidate_rows(self, filter: Optional[dict]) -> Tuple[Optional[Set[int]], bool]:
+        """Rows allowed by the filter's top-level equality/`$in` terms (None for all
+        rows), and whether those terms were the whole filter."""
+        candidates, exact = None, True
+        for key, condition in (filter or {}).items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            if key.startswith("$") or len(condition) != 1:
+                exact = False
+                continue
+            if "$eq" in condition and _indexable(condition["$eq"]):
+                rows = set(self._postings.get((key, condition["$eq"]), ()))
+            elif "$in" in condition and all(_indexable(v) for v in condition["$in"]):
+                rows = set().union(*(self._postings.get((key, v), set()) for v in condition["$in"]))
+            else:
+                exact = False
+                continue
+            candidates = rows if candidates is None else candidates & rows
+        return candidates, exact
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[dict] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        **kwargs,
+    ) -> QueryResponse:
+        with self._lock:
+            if self.dimension is None or not self._rows:
+                return QueryResponse(matches=[])
+            candidates, exact = self._candidate_rows(filter)
+            if candidates is None and exact and len(self._rows) == len(self._ids):
+                # No filter and no unused rows: score the used prefix of the matrix in place.
+                rows = np.arange(len(self._ids))
+                vectors = self._matrix[:len(self._ids)]
+            else:
+                if candidates is None:
+                    candidates = self._rows.values()
+                if not exact:
+                    candidates = (row for row in candidates if matches_filter(self._metadata[row], filter))
+                rows = np.fromiter(candidates, dtype=np.int64)
+                vectors = self._matrix[rows]
+            if rows.size == 0:
+                return QueryResponse(matches=[])
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            scores = vectors @ (query / norm if norm else query)
+            k = min(top_k, rows.size)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return QueryResponse(matches=[
+                Match(
+                    id=self._ids[rows[i]],
+                    score=float(scores[i]),
+                    metadata=dict(self._metadata[rows[i]]) if include_metadata else None,
+                    values=self._matrix[rows[i]].tolist() if include_values else None,
+                )
+                for i in best
+            ])
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            return {"dimension": self.dimension, "total_vector_count": len(self._rows), "path": self.path}
+
+def build_vector_index(backend: str, path: str, pinecone_api_key: Optional[str] = None, index_name: str = ""):
+    """The vector index for the configured backend: "pinecone" (remote) or "local"."""
+    if backend == "local":
+        return LocalVectorIndex(path)
+    if backend == "pinecone":
+        from pinecone import Pinecone
+        return Pinecone(api_key=pinecone_api_key).Index(index_name)
+    raise ValueError(f"Unknown VECTOR_STORE backend: {backend}")
+
+def benchmark(index, dimension: int, queries: int = 200, top_k: int = 8, filter: Optional[dict] = None) -> Dict[str, float]:
+    """Query latency percentiles in milliseconds for `queries` random vectors."""
+    rng = np.random.default_rng(0)
+    latencies = []
+    for _ in range(queries):
+        vector = rng.standard_normal(dimension).tolist()
+        started = time.perf_counter()
+        index.query(vector=vector, top_k=top_k, filter=filter, include_metadata=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"queries": queries, "p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3)}
+
+if __name__ == "__main__":
+    # python -m src.vector_store bench <path> [vectors] [--remote]
+    # Fills a local index with random vectors spread over 100 users and times
+    # filtered queries; --remote also times the same queries against Pinecone.
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args or args[0] != "bench":
+        sys.exit("Usage: python -m src.vector_store bench [path] [vectors] [--remote]")
+    path = args[1] if len(args) > 1 else tempfile.mkdtemp(prefix="vector-bench-")
+    total = int(args[2]) if len(args) > 2 else 20000
+    dimension = 768
+    user_filter = {"user_id": {"$eq": "user_7"}, "type": {"$in": ["recipe_fetcher_result", "diet_recommendations_result"]}}
+
+    local = LocalVectorIndex(path)
+    if local.describe_index_stats()["total_vector_count"] < total:
+        rng = np.random.default_rng(1)
+        for start in range(0, total, 1000):
+            batch = rng.standard_normal((min(1000, total - start), dimension)).astype(np.float32)
+            local.upsert(vectors=[
+                (f"bench_{start + i}", row.tolist(), {
+                    "user_id": f"user_{(start + i) % 100}",
+                    "type": "recipe_fetcher_result" if i % 2 else "diet_recommendations_result",
+                    "timestamp": start + i,
+                })
+                for i, row in enumerate(batch)
+            ])
+    print(json.dumps({"backend": "local", "vectors": total, **benchmark(local, dimension, filter=user_filter)}))
+    print(json.dumps({"backend": "local-unfiltered", "vectors": total, **benchmark(local, dimension)}))
+    if "--remote" in sys.argv:
+        from src.config import get_vector_index
+        print(json.dumps({"backend": "pinecone", **benchmark(get_vector_index(), dimension, queries=50, filter=user_filter)}))
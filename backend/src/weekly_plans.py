@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.compliance import parse_profile
+from src.meal_planner import SLOTS, compose_week, plan_constraints, revise_week, swap_meal
+from src.plan_store import PLAN_STORE
+from src.targets import daily_calories, parse_goal, parse_profiles
+from src.tools import render_meal_plan
+
+logger = logging.getLogger(__name__)
+
+def _targets(user_profile: dict) -> Tuple[float, dict, dict]:
+    """Daily calories, parsed dietary profile and planner constraints for a stored user profile."""
+    calories = float(daily_calories(parse_profiles([user_profile]))[0])
+    dietary = parse_profile(
+        (user_profile.get("preferences") or "").strip() or "none",
+        (user_profile.get("restrictions") or "").strip() or "none",
+    )
+    return calories, dietary, plan_constraints(dietary, parse_goal(user_profile.get("goal")))
+
+def _response(user_id: str, calories: int, entries: List[dict], changed: List[int]) -> dict:
+    return {
+        "user_id": user_id,
+        "daily_calories": calories,
+        "days": [
+            {
+                "day": day + 1,
+                "meal_plan": entry["text"],
+                "meals": entry["plan"]["meals"],
+                "total_calories": entry["plan"]["total_calories"],
+                "shortfall_calories": entry["plan"].get("shortfall_calories", 0),
+            }
+            for day, entry in enumerate(entries)
+        ],
+        "regenerated_days": [day + 1 for day in sorted(changed)],
+    }
+
+def _update(user_id: str, calories: float, constraints: dict, dietary: dict,
+            stored: List[Optional[dict]], week: List[dict], changed: List[int]) -> dict:
+    """Render and store only the `changed` days of `week`; the others keep their stored text."""
+    # Rendering is the only step that may call the LLM (MEAL_PLAN_LLM_POLISH).
+    rendered: Dict[int, dict] = {day: {"plan": week[day], "text": render_meal_plan(week[day], dietary)} for day in changed}
+    PLAN_STORE.save(user_id, {"calories": round(calories), "constraints": constraints}, len(week), rendered)
+    entries = [rendered.get(day) or stored[day] for day in range(len(week))]
+    logger.info(f"Meal plan for {user_id}: regenerated {len(changed)} of {len(week)} days")
+    return _response(user_id, round(calories), entries, changed)
+
+def _stored_dietary(constraints: dict) -> dict:
+    """The parsed-profile fields `render_meal_plan` checks, rebuilt from stored constraints."""
+    diet = "vegan" if constraints["vegan"] else "vegetarian" if constraints["vegetarian"] else "none"
+    return {"diet": diet, "forbidden": set(constraints["forbidden"]), "require_animal": constraints["non_veg"]}
+
+def get_week(user_id: str) -> Optional[dict]:
+    """The stored plan, with any day that no longer meets the constraints it was
+    made for (e.g. a meal since found to contain an allergen) re-planned first.
+    Raises ValueError if such a day has no compliant replacement."""
+    stored = PLAN_STORE.get(user_id)
+    if stored is None:
+        return None
+    inputs = stored["inputs"]
+    week, changed = revise_week([entry["plan"] for entry in stored["days"]], inputs["calories"], inputs["constraints"])
+    if changed:
+        return _update(user_id, inputs["calories"], inputs["constraints"], _stored_dietary(inputs["constraints"]), stored["days"], week, changed)
+    return _response(user_id, inputs["calories"], stored["days"], [])
+
+def create_week(user_id: str, user_profile: dict, days: int) -> dict:
+    """Plan `days` days from scratch, replacing any stored plan."""
+    calories, dietary, constraints = _targets(user_profile)
+    week = compose_week(calories, days, constraints)
+    return _update(user_id, calories, constraints, dietary, [None] * days, week, list(range(days)))
+
+def refresh_week(user_id: str, user_profile: dict) -> Optional[dict]:
+    """Bring a stored plan in line with a changed profile, regenerating only the
+    days that no longer fit (see `revise_week`). None if there is no plan."""
+    stored = PLAN_STORE.get(user_id)
+    if stored is None:
+        return None
+    calories, dietary, constraints = _targets(user_profile)
+    week, changed = revise_week([entry["plan"] for entry in stored["days"]], calories, constraints)
+    return _update(user_id, calories, constraints, dietary, stored["days"], week, changed)
+
+def swap_week_meal(user_id: str, user_profile: dict, day: int, slot: str) -> dict:
+    """Replace one meal (`day` counts from 1) and re-portion that day only.
+
+    Raises LookupError without a stored plan and ValueError for an unknown
+    day or slot, or when no alternative fits.
+    """
+    stored = PLAN_STORE.get(user_id)
+    if stored is None:
+        raise LookupError(f"No meal plan stored for {user_id}")
+    if not 1 <= day <= len(stored["days"]):
+        raise ValueError(f"Day must be between 1 and {len(stored['days'])}")
+    slot = slot.lower().strip()
+    if slot not in SLOTS:
+        raise ValueError(f"Slot must be one of {', '.join(SLOTS)}")
+    calories, dietary, constraints = _targets(user_profile)
+    # Pick up any profile change first so the swap is made against current constraints.
+    week, changed = revise_week([entry["plan"] for entry in stored["days"]], calories, constraints)
+    week[day - 1] = swap_meal(week, day - 1, slot, calories, constraints)
+    return _update(user_id, calories, constraints, dietary, stored["days"], week, sorted(set(changed) | {day - 1}))
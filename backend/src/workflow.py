@@ -2,28 +2,67 @@ import sys
 import os
 from langgraph.graph import StateGraph, END
 from src.state import AgentState
-from src.nodes.context_retrieval import context_retrieval_node
-from src.nodes.llm import llm_node
-from src.nodes.tool_router import tool_router_node
-from src.nodes.pinecone_storage import pinecone_storage_node
-from src.nodes.response_formatter import response_formatter_node
+from src.telemetry import instrument_node
+from src.nodes.context_retrieval import context_retrieval_node, context_retrieval_node_async
+from src.nodes.intent_router import intent_router_node, intent_router_node_async
+from src.nodes.result_retrieval import result_retrieval_node, result_retrieval_node_async
+from src.nodes.llm import llm_node, llm_node_async
+from src.nodes.tool_router import tool_router_node, tool_router_node_async
+from src.nodes.pinecone_storage import pinecone_storage_node, pinecone_storage_node_async
+from src.nodes.response_formatter import response_formatter_node, response_formatter_node_async
+
+def route_after_intent(state: AgentState) -> str:
+    if state.get("tool_calls"):
+        return "tool_router"
+    if state.get("response"):
+        return "response_formatter"
+    return "result_retrieval"
 
 def route_after_llm(state: AgentState) -> str:
     if state.get("tool_calls"):
         return "tool_router"
-    return "response_formatter" 
+    return "response_formatter"
 
-def build_workflow():
+def build_workflow(async_mode: bool = False):
+    """Compile the agent graph.
+
+    With `async_mode=True` the I/O-bound nodes are registered as coroutines and
+    the compiled graph should be driven with `graph.ainvoke`.
+    """
     workflow = StateGraph(AgentState)
-    workflow.add_node("context_retrieval", context_retrieval_node)
-    workflow.add_node("llm", llm_node)
-    workflow.add_node("tool_router", tool_router_node)
-    workflow.add_node("pinecone_storage", pinecone_storage_node)
-    workflow.add_node("response_formatter", response_formatter_node)
+    if async_mode:
+        nodes = {
+            "context_retrieval": context_retrieval_node_async,
+            "intent_router": intent_router_node_async,
+            "result_retrieval": result_retrieval_node_async,
+            "llm": llm_node_async,
+            "tool_router": tool_router_node_async,
+            "pinecone_storage": pinecone_storage_node_async,
+            "response_formatter": response_formatter_node_async,
+        }
+    else:
+        nodes = {
+            "context_retrieval": context_retrieval_node,
+            "intent_router": intent_router_node,
+            "result_retrieval": result_retrieval_node,
+            "llm": llm_node,
+            "tool_router": tool_router_node,
+            "pinecone_storage": pinecone_storage_node,
+            "response_formatter": response_formatter_node,
+        }
+    for name, node in nodes.items():
+        workflow.add_node(name, instrument_node(name, node))
 
     workflow.set_entry_point("context_retrieval")
-    workflow.add_edge("context_retrieval", "llm")
-    
+    workflow.add_edge("context_retrieval", "intent_router")
+
+    workflow.add_conditional_edges("intent_router", route_after_intent, {
+        "result_retrieval": "result_retrieval",
+        "tool_router": "tool_router",
+        "response_formatter": "response_formatter"
+    })
+    workflow.add_edge("result_retrieval", "llm")
+
     workflow.add_conditional_edges("llm", route_after_llm, {
         "tool_router": "tool_router",
         "response_formatter": "response_formatter"
@@ -34,4 +73,4 @@ def build_workflow():
     workflow.add_edge("response_formatter", END)
     workflow.set_entry_point("context_retrieval")
 
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile()
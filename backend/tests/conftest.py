@@ -0,0 +1,54 @@
+"""Shared test setup: temporary storage and recorded stand-ins for Gemini,
+the vector index, TheMealDB and DuckDuckGo (see bench/fakes.py)."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp(prefix="dietbot-tests-")
+# src.config reads these at import, so they must be set before any test imports src.
+os.environ.update({
+    "VECTOR_STORE": "local",
+    "VECTOR_STORE_PATH": os.path.join(WORKDIR, "vectors"),
+    "RECIPE_DB_PATH": os.path.join(WORKDIR, "recipes.db"),
+    "MEAL_PLAN_DB_PATH": os.path.join(WORKDIR, "meal_plans.db"),
+    "EMBEDDING_CACHE_DB_PATH": "",
+    "CONVERSATION_BACKEND": "memory",
+    "GEM_API_KEY": "test",
+})
+
+@pytest.fixture(scope="session")
+def fake_clients():
+    """Install the recorded clients once per session and return their
+    `Latency` objects by name (llm, embed, index). A test that raises a
+    latency must put it back to 0."""
+    pytest.importorskip("langchain_core")
+    from bench.fakes import (
+        DelayedIndex,
+        HashEmbeddings,
+        Latency,
+        RecordedChatModel,
+        RecordedMealDBSession,
+        RecordedSearch,
+        load_fixtures,
+    )
+    from src import config
+    from src.embedding_cache import CachedEmbeddings
+    from src.tools import http_client
+    from src.vector_store import LocalVectorIndex
+
+    fixtures = load_fixtures(os.path.join(BACKEND_DIR, "bench", "fixtures", "recorded.json"))
+    latency = {name: Latency() for name in ("llm", "embed", "index")}
+    config.override_clients(
+        llm=RecordedChatModel(fixtures["llm"], latency["llm"]),
+        embedder=CachedEmbeddings(HashEmbeddings(latency["embed"]), config.EMBEDDING_MODEL),
+        vector_index=DelayedIndex(LocalVectorIndex(os.path.join(WORKDIR, "vectors")), latency["index"]),
+    )
+    http_client.HTTP_CLIENT.session = RecordedMealDBSession(fixtures["mealdb"]["meals"], Latency())
+    http_client._search_tool = RecordedSearch(fixtures["search"], Latency())
+    yield latency
+    config.reset_clients()
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("langchain_core")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_module(*args: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", *args], cwd=BACKEND_DIR, env=dict(os.environ),
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout)
+
+def test_end_to_end_bench_runs_against_the_fakes(tmp_path):
+    out = tmp_path / "report.json"
+    report = run_module(
+        "bench.run", "--users", "3", "--requests", "12", "--concurrency", "4",
+        "--llm-latency", "0.01", "--embed-latency", "0", "--index-latency", "0",
+        "--http-latency", "0", "--search-latency", "0", "--out", str(out),
+    )
+    assert json.loads(out.read_text()) == report
+    assert report["endpoints"]["submit_details"]["errors"] == 0
+    assert report["endpoints"]["chat"]["requests"] == 12
+    assert report["endpoints"]["chat"]["errors"] == 0
+    assert report["persistence"]["dropped"] == 0 and report["persistence"]["queue_depth"] == 0
+    assert report["nodes"]["intent_router"]["calls"] == 12
+
+def test_llm_node_bench_runs():
+    report = run_module("bench.llm_node", "--turns", "20")
+    assert report["turns"] == 20
+    assert report["compiled_once"]["mean_us"] > 0
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from src.profile_store import invalidate_profile
+
+PROFILE = dict(
+    age=34, gender="female", height="165cm", weight=62,
+    preferences="vegetarian", restrictions="none", goal="weight_loss",
+)
+
+def store_profile(user_id: str) -> None:
+    """Store a profile as /submit-details/ would, then drop it from the profile
+    cache, as after a restart."""
+    main.store_user_details(user_id, main.UserDetails(**PROFILE))
+    invalidate_profile(user_id)
+
+def test_chat_with_cold_profile_cache(fake_clients):
+    store_profile("cold_user")
+    response = TestClient(main.app).post("/chat/", json={"user_id": "cold_user", "query": "hello, how are you?"})
+    assert response.status_code == 200
+    assert "No profile found" not in response.json()["response"]
+
+def test_cold_profile_lookup_counts_one_miss(fake_clients):
+    store_profile("cold_counted")
+    before = main.PROFILE_CACHE.stats()
+    response = TestClient(main.app).post("/chat/", json={"user_id": "cold_counted", "query": "hello, how are you?"})
+    assert response.status_code == 200
+    after = main.PROFILE_CACHE.stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 0)
+
+def test_chat_without_profile(fake_clients):
+    response = TestClient(main.app).post("/chat/", json={"user_id": "nobody", "query": "hello"})
+    assert response.status_code == 200
+    assert "No profile found" in response.json()["response"]
+
+def test_week_plan_with_cold_profile_cache(fake_clients):
+    store_profile("cold_planner")
+    response = TestClient(main.app).post("/meal-plans/week/", json={"user_id": "cold_planner", "days": 2})
+    assert response.status_code == 200
+    assert len(response.json()["days"]) == 2
+
+def test_concurrent_chats_overlap(fake_clients):
+    users = [f"concurrent_{i}" for i in range(8)]
+    for user_id in users:
+        store_profile(user_id)
+    llm_seconds = 0.3
+
+    async def send_all():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            return await asyncio.gather(*(
+                client.post("/chat/", json={"user_id": user_id, "query": "hello, how are you?"}) for user_id in users
+            ))
+
+    fake_clients["llm"].seconds = llm_seconds
+    try:
+        started = time.perf_counter()
+        responses = asyncio.run(send_all())
+        elapsed = time.perf_counter() - started
+    finally:
+        fake_clients["llm"].seconds = 0
+    assert all(response.status_code == 200 for response in responses)
+    # Serialized, eight chats would take at least 8 * 0.3s on the model alone.
+    assert llm_seconds <= elapsed < len(users) * llm_seconds / 2
+
+@pytest.mark.parametrize("query, retrievals", [("calories in a chicken biryani", 0), ("hello, how are you?", 1)])
+def test_only_llm_turns_retrieve_earlier_results(fake_clients, monkeypatch, query, retrievals):
+    from src.nodes import result_retrieval
+    calls = []
+    monkeypatch.setattr(result_retrieval, "retrieve_context", lambda user_id, text: calls.append(text) or "")
+    store_profile("retrieval_user")
+    response = TestClient(main.app).post("/chat/", json={"user_id": "retrieval_user", "query": query})
+    assert response.status_code == 200
+    assert len(calls) == retrievals
@@ -0,0 +1,78 @@
+import pytest
+
+from src.compliance import categorize, check_ingredients, parse_profile
+
+def violations(ingredient: str, preferences: str = "", restrictions: str = "") -> set:
+    result = check_ingredients([ingredient], parse_profile(preferences, restrictions))
+    return {violation["category"] for violation in result["violations"]}
+
+@pytest.mark.parametrize("ingredient, restrictions, category", [
+    ("Peanut Butter", "peanut allergy", "peanuts"),
+    ("almond milk", "tree nut allergy", "nuts"),
+    ("almond butter", "tree nut allergy", "nuts"),
+    ("cashew milk", "tree nut allergy", "nuts"),
+    ("nut butter", "tree nut allergy", "nuts"),
+    ("soy milk", "soy allergy", "soy"),
+    ("soya milk", "soy allergy", "soy"),
+    ("bean curd", "soy allergy", "soy"),
+])
+def test_exception_phrases_keep_their_allergen(ingredient, restrictions, category):
+    assert category in violations(ingredient, restrictions=restrictions)
+
+@pytest.mark.parametrize("ingredient", [
+    "peanut butter", "almond milk", "coconut milk", "soy milk", "bean curd", "cocoa butter", "butter beans",
+])
+def test_exception_phrases_are_not_dairy(ingredient):
+    assert "dairy" not in violations(ingredient, restrictions="dairy")
+
+def test_goat_cheese_is_dairy_not_meat():
+    assert violations("goat cheese", preferences="vegetarian") == set()
+    assert violations("goat's cheese", preferences="vegan") == {"dairy"}
+    assert violations("goat curry", preferences="vegetarian") == {"meat"}
+
+@pytest.mark.parametrize("ingredient", ["gluten-free pasta", "gluten free spaghetti", "rice noodles", "buckwheat flour"])
+def test_gluten_free_items(ingredient):
+    assert violations(ingredient, restrictions="gluten") == set()
+
+def test_free_from_label_covers_only_its_item():
+    assert violations("gluten-free pasta with garlic bread", restrictions="gluten") == {"gluten"}
+    assert violations("pasta", restrictions="gluten") == {"gluten"}
+
+def test_lactose_free_milk_is_still_dairy():
+    assert violations("lactose-free milk", restrictions="dairy") == {"dairy"}
+
+def test_vegetable_stock_is_not_ambiguous_for_vegetarians():
+    profile = parse_profile("vegetarian", "")
+    assert check_ingredients(["vegetable stock"], profile)["ambiguous"] == []
+    assert check_ingredients(["stock cube"], profile)["ambiguous"] != []
+
+def test_categorize_ignores_lookalikes():
+    assert categorize("nutmeg, eggplant and butternut squash") == {}
+
+def test_hyphenated_exceptions_and_mayo():
+    assert violations("kidney-bean curry", preferences="vegetarian") == set()
+    assert violations("zucchini noodles", restrictions="gluten") == set()
+    assert violations("olive-oil mayo", restrictions="egg") == {"egg"}
+
+@pytest.mark.parametrize("preferences, diet, forbidden", [
+    ("vegetarian, no meat", "vegetarian", {"meat", "fish", "shellfish"}),
+    ("no meat", "none", {"meat"}),
+    ("I don't eat meat", "none", {"meat"}),
+    ("without meat please", "none", {"meat"}),
+    ("avoid meat and dairy", "none", {"meat", "dairy"}),
+    ("vegan, I never eat meat", "vegan", {"meat", "fish", "shellfish", "dairy", "egg", "honey"}),
+    ("mostly vegetarian but I eat meat sometimes", "vegetarian", {"meat", "fish", "shellfish"}),
+    ("non-vegetarian", "non_veg", set()),
+    ("everything except pork", "non_veg", {"pork"}),
+])
+def test_negated_preferences_are_exclusions(preferences, diet, forbidden):
+    profile = parse_profile(preferences)
+    assert (profile["diet"], profile["forbidden"]) == (diet, forbidden)
+    assert profile["require_animal"] == (diet == "non_veg")
+
+def test_no_red_meat_still_allows_poultry():
+    assert parse_profile("", "no red meat")["forbidden"] == {"beef", "pork", "lamb"}
+    assert violations("grilled chicken", restrictions="no red meat") == set()
+    assert violations("lamb chops", restrictions="no red meat") == {"lamb"}
+    assert violations("beef stew", restrictions="no red meat") == {"beef"}
+    assert violations("chicken", restrictions="no meat") == {"meat"}
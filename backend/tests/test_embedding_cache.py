@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from bench.fakes import HashEmbeddings, Latency
+from src.embedding_cache import CachedEmbeddings
+
+def counts(cache):
+    stats = cache.stats()
+    return stats["memory_hits"], stats["disk_hits"], stats["misses"], stats["api_calls"]
+
+def test_repeated_texts_count_once_per_batch(tmp_path):
+    cache = CachedEmbeddings(HashEmbeddings(Latency()), "test-model", db_path=str(tmp_path / "embeddings.db"))
+    first = cache.embed_documents(["a", "b", "a", "a"])
+    assert first[0] == first[2] == first[3]
+    assert counts(cache) == (0, 0, 2, 1)
+
+    cache.embed_documents(["b", "b", "c", "c"])
+    assert counts(cache) == (1, 0, 3, 2)
+
+    cold = CachedEmbeddings(HashEmbeddings(Latency()), "test-model", db_path=str(tmp_path / "embeddings.db"))
+    cold.embed_documents(["a", "a", "c"])
+    assert counts(cold) == (0, 2, 0, 0)
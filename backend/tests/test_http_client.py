@@ -0,0 +1,107 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.tools.http_client import CircuitOpenError, HttpClient
+
+class StubServer(ThreadingHTTPServer):
+    """Answers GETs from a script of `(status, delay)` steps, then 200s."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.script = []
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def next_step(self):
+        with self.lock:
+            self.hits += 1
+            return self.script.pop(0) if self.script else (200, 0)
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, delay = self.server.next_step()
+        time.sleep(delay)
+        body = f"status {status}".encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and went away
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def client(**kwargs) -> HttpClient:
+    options = {"max_retries": 2, "backoff_base": 0.01, "backoff_cap": 0.01, "read_timeout": 2.0}
+    return HttpClient(**{**options, **kwargs})
+
+def test_server_errors_are_retried(server):
+    server.script = [(503, 0), (500, 0)]
+    response = client().get(server.url)
+    assert response.status_code == 200 and server.hits == 3
+
+def test_server_errors_surface_once_retries_are_used_up(server):
+    server.script = [(502, 0)] * 3
+    with pytest.raises(requests.HTTPError):
+        client().get(server.url)
+    assert server.hits == 3
+
+def test_client_errors_are_not_retried(server):
+    server.script = [(404, 0)]
+    response = client().get(server.url)
+    assert response.status_code == 404 and server.hits == 1
+
+def test_slow_responses_time_out_and_retry(server):
+    server.script = [(200, 0.5), (200, 0.5)]
+    http = client(max_retries=1, read_timeout=0.1)
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        http.get(server.url)
+    assert server.hits == 2
+    assert time.monotonic() - started < 0.5
+
+def test_breaker_opens_then_lets_one_trial_through(server):
+    http = client(max_retries=0, breaker_failures=2, breaker_reset=0.2)
+    host = server.url.split("/")[2]
+    server.script = [(500, 0), (500, 0)]
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            http.get(server.url)
+    assert http.breaker(host).state == "open"
+    with pytest.raises(CircuitOpenError):
+        http.get(server.url)
+    assert server.hits == 2
+
+    time.sleep(0.25)
+    assert http.breaker(host).state == "half_open"
+    server.script = [(503, 0)]
+    with pytest.raises(requests.HTTPError):
+        http.get(server.url)  # the trial fails: open again
+    assert http.breaker(host).state == "open"
+
+    time.sleep(0.25)
+    assert http.get(server.url).status_code == 200
+    assert http.breaker(host).state == "closed"
+    assert server.hits == 4
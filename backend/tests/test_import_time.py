@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langchain_core")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Heavy SDKs that must only load when the first request needs them.
+LAZY = ("langchain", "langchain_community", "langchain_google_genai", "pinecone", "google.genai", "google.generativeai")
+
+# Records every attempt to import a LAZY module, so the check also holds where
+# those packages are not installed (and importtime would list nothing).
+_PROBE = """
+import json, sys
+LAZY = %r
+attempted = set()
+class Probe:
+    def find_spec(self, name, path=None, target=None):
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY):
+            attempted.add(name)
+        return None
+sys.meta_path.insert(0, Probe())
+import main
+print(json.dumps(sorted(attempted)))
+""" % (LAZY,)
+
+def _lazy(name: str) -> bool:
+    return any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY)
+
+def test_importing_main_does_not_load_sdks():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR, env=dict(os.environ), capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    imported = [
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines() if line.startswith("import time:") and "|" in line
+    ]
+    assert imported, "no -X importtime output"
+    assert [name for name in imported if _lazy(name)] == []
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,28 @@
+import pytest
+
+from src.intent import evaluate, load_labelled, route
+
+@pytest.mark.parametrize("query", [
+    "I don't want a meal plan, just general tips",
+    "why does my meal plan have so much rice?",
+    "is a keto diet for weight loss safe?",
+    "my diet plan says no sugar, what can I snack on",
+    "should I follow a meal plan or count calories?",
+])
+def test_diet_plan_mentions_are_left_to_the_llm(query):
+    assert route(query) is None
+
+@pytest.mark.parametrize("query", [
+    "Make me a meal plan",
+    "can you give me a vegetarian meal plan?",
+    "I need a diet plan for weight loss",
+    "plan my meals for today",
+    "suggest a diet to lose weight",
+])
+def test_diet_plan_requests_route_locally(query):
+    assert route(query)["intent"] == "diet_recommendations"
+
+def test_labelled_queries_never_misroute():
+    report = evaluate(load_labelled())
+    assert report["precision"] == 1.0
+    assert report["coverage"] >= 0.5
@@ -0,0 +1,62 @@
+import itertools
+
+import pytest
+
+from src.compliance import ANIMAL, categorize, parse_profile
+from src.meal_planner import MEALS, SLOTS, compose_meal_plan, compose_week, format_meal_plan, plan_constraints, swap_meal
+
+DIETS = ["none", "non-veg", "vegetarian", "vegan", "pescatarian"]
+RESTRICTIONS = ["none", "peanut allergy", "tree nut allergy", "soy allergy", "dairy", "gluten", "egg", "peanut and soy allergy"]
+
+@pytest.mark.parametrize("meal", MEALS, ids=lambda meal: meal["name"])
+def test_contains_covers_the_description_and_tags(meal):
+    contains = set(meal["contains"])
+    assert set(categorize(f"{meal['name']} {meal['description']}")) <= contains
+    tags = set(meal["tags"])
+    if "vegan" in tags:
+        assert not contains & (ANIMAL | {"dairy", "egg", "honey"})
+    if "vegetarian" in tags:
+        assert not contains & ANIMAL
+    if "dairy_free" in tags:
+        assert "dairy" not in contains
+    if "gluten_free" in tags:
+        assert "gluten" not in contains
+
+@pytest.mark.parametrize("diet, restrictions", itertools.product(DIETS, RESTRICTIONS))
+def test_planned_meals_never_contain_a_declared_allergen(diet, restrictions):
+    profile = parse_profile(diet, restrictions)
+    constraints = plan_constraints(profile, "maintenance")
+    try:
+        week = compose_week(2000, 7, constraints)
+    except ValueError:
+        return  # no safe plan exists; refusing is the correct outcome
+    for plan in week:
+        for meal in plan["meals"]:
+            assert not profile["forbidden"] & set(MEALS[meal["index"]]["contains"]), meal["name"]
+    for slot in SLOTS:
+        try:
+            day = swap_meal(week, 0, slot, 2000, constraints)
+        except ValueError:
+            continue
+        for meal in day["meals"]:
+            assert not profile["forbidden"] & set(MEALS[meal["index"]]["contains"]), meal["name"]
+
+def planned_names(diet: str, restrictions: str) -> set:
+    constraints = plan_constraints(parse_profile(diet, restrictions), "maintenance")
+    return {meal["name"] for plan in compose_week(2000, 7, constraints) for meal in plan["meals"]}
+
+def test_peanut_butter_meals_respect_peanut_and_soy_allergies():
+    assert not {"Apple with peanut butter", "Peanut butter banana smoothie", "Poha with peanuts"} & planned_names("vegan", "peanut allergy")
+    assert "Peanut butter banana smoothie" not in planned_names("vegan", "soy allergy")
+
+@pytest.mark.parametrize("target", [4000, 4500, 5000])
+@pytest.mark.parametrize("vegan", [False, True])
+def test_high_calorie_targets_are_reached(target, vegan):
+    plan = compose_meal_plan(target, vegan=vegan)
+    assert abs(plan["total_calories"] - target) <= target * 0.05
+    assert plan["shortfall_calories"] == 0
+
+def test_unreachable_target_reports_the_shortfall():
+    plan = compose_meal_plan(9000, vegan=True)
+    assert plan["shortfall_calories"] == 9000 - plan["total_calories"] > 0
+    assert f"~{plan['shortfall_calories']} calories short" in format_meal_plan(plan)
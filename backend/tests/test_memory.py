@@ -0,0 +1,44 @@
+import pytest
+
+from src.memory import LOCK_STRIPES, ConversationStore, InMemoryConversationStore, SQLiteConversationStore
+
+def stores(tmp_path, **kwargs):
+    return [
+        InMemoryConversationStore(**kwargs),
+        SQLiteConversationStore(path=str(tmp_path / "conversations.db"), **kwargs),
+    ]
+
+def recording_summary(previous, messages, max_chars):
+    return "\n".join(filter(None, [previous] + [m["content"] for m in messages]))
+
+@pytest.mark.parametrize("count", range(1, 25))
+def test_every_message_is_summarized_or_returned(tmp_path, count):
+    for store in stores(tmp_path, window=4, summarizer=recording_summary):
+        for i in range(count):
+            store.append("u", "user", f"m{i}")
+        memory = store.load("u")
+        summarized = memory["summary"].splitlines() if memory["summary"] else []
+        verbatim = [m["content"] for m in memory["messages"]]
+        assert summarized + verbatim == [f"m{i}" for i in range(count)]
+        assert len(verbatim) < 2 * store.window
+        assert len(verbatim) >= min(count, store.window)
+        store.clear("u")
+
+def test_in_memory_store_keeps_only_recent_users():
+    store = InMemoryConversationStore(max_users=2, window=4)
+    for user in ("a", "b", "a", "c"):
+        store.append(user, "user", f"hi from {user}")
+    assert store.load("b")["messages"] == []
+    assert [m["content"] for m in store.load("a")["messages"]] == ["hi from a", "hi from a"]
+    assert len(store._logs) == 2
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        ConversationStore()
+
+def test_lock_table_does_not_grow_with_users(tmp_path):
+    for store in stores(tmp_path, window=4):
+        for i in range(500):
+            store.load(f"reader-{i}")
+            store.append(f"writer-{i}", "user", "hi")
+        assert len(store._locks) == LOCK_STRIPES
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.nodes import pinecone_storage
+from src.persistence import WriteBehindQueue
+
+class SlowWriter:
+    """Takes `delay` per batch and fails the first `failures` batches."""
+
+    def __init__(self, delay: float, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        with self.lock:
+            self.batches.append(list(batch))
+            if len(self.batches) <= self.failures:
+                raise ConnectionError("vector store unavailable")
+
+def state(user_id, count):
+    return {"user_id": user_id, "tool_outputs": [{"tool": "recipe_fetcher", "result": f"result {i}"} for i in range(count)]}
+
+@pytest.mark.parametrize("node", [pinecone_storage.pinecone_storage_node, pinecone_storage.pinecone_storage_node_async])
+def test_storage_node_returns_before_a_slow_failing_write(monkeypatch, node):
+    writer = SlowWriter(delay=0.3, failures=1)
+    queue = WriteBehindQueue(writer, batch_size=2, flush_interval=0.05, name="test-writer")
+    monkeypatch.setattr(pinecone_storage, "TOOL_RESULT_QUEUE", queue)
+
+    started = time.monotonic()
+    for turn in range(3):
+        result = node(state(f"user_{turn}", 2))
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+        assert result["user_id"] == f"user_{turn}"
+    assert time.monotonic() - started < 0.2
+
+    queue.stop(drain=True)
+    written = [record[0] for batch in writer.batches for record in batch]
+    assert len(written) == 6 and len(set(written)) == 6
+    stats = queue.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["written"] + stats["failed"] == 6
+    assert stats["failed"] == len(writer.batches[0])
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    queue = WriteBehindQueue(lambda batch: release.wait(5), max_size=2, batch_size=1, flush_interval=0.01)
+    queue.enqueue("first")
+    deadline = time.monotonic() + 2
+    while queue.stats()["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.005)  # the worker holds "first" in its blocked write
+    started = time.monotonic()
+    accepted = [queue.enqueue(item, block=False) for item in ("a", "b", "c")]
+    assert time.monotonic() - started < 0.1
+    assert accepted == [True, True, False]
+    release.set()
+    queue.stop(drain=True)
+    assert queue.stats()["written"] == 3 and queue.stats()["dropped"] == 1
+    assert not queue.enqueue("late")
@@ -0,0 +1,34 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.nodes.pinecone_storage import _build_records
+from src.retrieval import rank_matches
+
+FAILURES = [
+    {"tool": "nut_content_fetcher", "result": "Error fetching nutritional data for 'xyz': timeout"},
+    {"tool": "recipe_fetcher", "result": "Error executing tool: boom. Details: Traceback (most recent call last): ..."},
+    {"tool": "recipe_fetcher", "result": {"content": "Error fetching recipe: 503", "status": "error"}},
+]
+SUCCESSES = [
+    {"tool": "nut_content_fetcher", "result": "Chicken biryani: about 290 kcal per 100 g."},
+    {"tool": "recipe_fetcher", "result": {"content": "Lasagna: layer the sheets...", "status": "success"}},
+]
+
+def test_failed_tool_outputs_are_not_stored():
+    records = _build_records("user", FAILURES + SUCCESSES)
+    assert [metadata["result"] for _, _, metadata in records] == [
+        SUCCESSES[0]["result"], json.dumps(SUCCESSES[1]["result"]),
+    ]
+
+def test_stored_errors_are_never_retrieved():
+    matches = [
+        SimpleNamespace(score=0.9, metadata={"type": f"{output['tool']}_result", "timestamp": 0, "result": result})
+        for output in FAILURES + SUCCESSES
+        for result in [json.dumps(output["result"]) if isinstance(output["result"], dict) else output["result"]]
+    ]
+    texts = [entry["text"] for entry in rank_matches(matches, now=1)]
+    assert sorted(texts) == sorted(["Chicken biryani: about 290 kcal per 100 g.", "Lasagna: layer the sheets..."])
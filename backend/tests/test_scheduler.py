@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.scheduler import GeminiScheduler, gemini_lane, is_rate_limited
+
+class RateLimited(Exception):
+    code = 429
+
+class WrappedError(Exception):
+    pass
+
+def scheduler(**kwargs) -> GeminiScheduler:
+    options = {"max_concurrency": 1, "max_retries": 3, "backoff_base": 0.2, "backoff_cap": 0.2}
+    return GeminiScheduler({"chat": (0, 0), "embedding": (0, 0)}, **{**options, **kwargs})
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def queued(sched: GeminiScheduler, lane: str) -> int:
+    return sched.stats()["queue_depth"][lane]
+
+def test_rate_limits_are_recognised_by_type_and_status():
+    assert is_rate_limited(RateLimited())
+    try:
+        try:
+            raise RateLimited()
+        except RateLimited as e:
+            raise WrappedError("Error embedding content") from e
+    except WrappedError as e:
+        assert is_rate_limited(e)
+    assert not is_rate_limited(ValueError("daily quota of 429 recipes reached"))
+    assert not is_rate_limited(WrappedError("bad request"))
+
+def test_interactive_calls_start_before_queued_background_calls():
+    sched = scheduler()
+    started = []
+    sched.acquire("chat")  # hold the only slot while the others queue
+
+    def caller(lane: str) -> None:
+        with gemini_lane(lane):
+            sched.call("chat", lambda: started.append(lane))
+
+    threads = []
+    for lane in ("background", "batch", "interactive"):
+        threads.append(threading.Thread(target=caller, args=(lane,)))
+        threads[-1].start()
+        wait_for(lambda: queued(sched, lane) == 1)
+    sched.release("chat")
+    for thread in threads:
+        thread.join(2)
+    assert started == ["interactive", "batch", "background"]
+
+def test_rate_limit_pauses_the_kind_before_the_slot_is_handed_on():
+    sched = scheduler()
+    attempts, times = [], {}
+
+    def limited():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            wait_for(lambda: queued(sched, "interactive") == 1)  # the next call is waiting for the slot
+            times["failed"] = time.monotonic()
+            raise RateLimited()
+        return "ok"
+
+    def waiting():
+        times["waiting"] = time.monotonic()
+        return "ok"
+
+    first = threading.Thread(target=lambda: times.setdefault("result", sched.call("chat", limited)))
+    first.start()
+    wait_for(lambda: attempts)
+    second = threading.Thread(target=sched.call, args=("chat", waiting))
+    second.start()
+    first.join(2)
+    second.join(2)
+    assert times["result"] == "ok"
+    assert times["waiting"] - times["failed"] >= 0.19
+    assert attempts[1] - times["failed"] >= 0.19
+    assert sched.stats()["calls"]["chat"]["throttled"] == 1
+
+def test_rate_limit_gives_up_after_max_retries():
+    sched = scheduler(max_retries=1, backoff_base=0.01, backoff_cap=0.01)
+
+    async def limited():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        asyncio.run(sched.acall("chat", limited))
+    assert sched.stats()["calls"]["chat"] == {"calls": 2, "throttled": 1, "gave_up": 1}
+    assert sched.stats()["in_flight"] == 0
+
+def test_other_errors_are_not_retried():
+    sched = scheduler()
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        sched.call("embedding", broken)
+    assert len(calls) == 1
+    assert sched.stats()["in_flight"] == 0
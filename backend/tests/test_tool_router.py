@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.nodes import tool_router
+from src.singleflight import SingleFlight
+from src.tool_pool import ToolPool
+
+class FakeTool:
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+    def invoke(self, args):
+        return self.fn(**args)
+
+@pytest.fixture
+def tools(monkeypatch):
+    """A slow tool that hangs until released and a fast one, on a two-slot pool."""
+    release = threading.Event()
+    slow = FakeTool("slow", lambda n: release.wait(10) and f"slow {n}")
+    fast = FakeTool("fast", lambda n: f"fast {n}")
+    monkeypatch.setattr(tool_router, "TOOLS", [slow, fast])
+    monkeypatch.setattr(tool_router, "_EXECUTOR", ToolPool(2, 8))
+    # Fresh flights, so no test joins a call another test abandoned.
+    monkeypatch.setattr(tool_router, "TOOL_FLIGHTS", SingleFlight())
+    monkeypatch.setitem(tool_router.TOOL_TIMEOUTS, "slow", 0.2)
+    monkeypatch.setitem(tool_router.TOOL_TIMEOUTS, "fast", 2.0)
+    yield
+    release.set()
+
+def state(*calls):
+    return {"tool_calls": [{"name": name, "args": {"n": n}} for name, n in calls]}
+
+def test_hung_tools_do_not_block_later_calls(tools):
+    slow = tool_router.tool_router_node(state(("slow", 1), ("slow", 2), ("slow", 3)))
+    assert all("timed out" in output["result"] for output in slow["tool_outputs"])
+
+    started = time.monotonic()
+    fast = tool_router.tool_router_node(state(("fast", 1)))
+    assert fast["tool_outputs"] == [{"tool": "fast", "result": "fast 1"}]
+    assert time.monotonic() - started < 1.0
+
+def test_hung_tools_do_not_block_later_calls_async(tools):
+    async def run():
+        slow = await tool_router.tool_router_node_async(state(("slow", 1), ("slow", 2)))
+        started = time.monotonic()
+        fast = await tool_router.tool_router_node_async(state(("fast", 1), ("fast", 2)))
+        return slow, fast, time.monotonic() - started
+
+    slow, fast, elapsed = asyncio.run(run())
+    assert all("timed out" in output["result"] for output in slow["tool_outputs"])
+    assert [output["result"] for output in fast["tool_outputs"]] == ["fast 1", "fast 2"]
+    assert elapsed < 1.0
+
+def test_pool_keeps_slots_once_abandoned_allowance_is_used():
+    release = threading.Event()
+    pool = ToolPool(1, 1)
+    first = pool.submit(release.wait, 10)
+    second = pool.submit(release.wait, 10)
+    pool.release(first)  # moves to the abandoned allowance; `second` starts
+    pool.release(second)  # allowance full: keeps its slot
+    third = pool.submit(lambda: "done")
+    time.sleep(0.05)
+    assert pool.stats() == {"running": 1, "queued": 1, "abandoned": 1}
+    release.set()
+    assert third.result(timeout=2) == "done"
+    deadline = time.monotonic() + 2
+    while pool.stats() != {"running": 0, "queued": 0, "abandoned": 0} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats() == {"running": 0, "queued": 0, "abandoned": 0}
+
+def test_released_queued_call_never_runs():
+    release = threading.Event()
+    pool = ToolPool(1, 0)
+    pool.submit(release.wait, 10)
+    ran = []
+    queued = pool.submit(ran.append, 1)
+    pool.release(queued)
+    release.set()
+    pool.submit(lambda: None).result(timeout=2)
+    assert queued.cancelled() and ran == []
+
+@pytest.fixture
+def coalesced(monkeypatch):
+    """A diet tool gated on an event, with coalescing on and fresh flights."""
+    gate = threading.Event()
+    runs = []
+
+    def recommend(n):
+        runs.append(n)
+        gate.wait(10)
+        if n < 0:
+            raise ValueError("boom")
+        return {"plan": {"n": n}, "foods": ["oats"]}
+
+    flights = SingleFlight()
+    monkeypatch.setattr(tool_router, "TOOLS", [FakeTool("diet_recommendations", recommend)])
+    monkeypatch.setattr(tool_router, "_EXECUTOR", ToolPool(2, 8))
+    monkeypatch.setattr(tool_router, "TOOL_FLIGHTS", flights)
+    monkeypatch.setattr(tool_router, "TOOL_COALESCING_ENABLED", True)
+    monkeypatch.setitem(tool_router.TOOL_TIMEOUTS, "diet_recommendations", 5.0)
+    yield gate, runs, flights
+    gate.set()
+
+def _run_concurrently(flights, gate, n, callers):
+    """Start `callers` identical async calls, open the gate once all joined."""
+    async def run():
+        calls = [
+            asyncio.create_task(tool_router.tool_router_node_async(state(("diet_recommendations", n))))
+            for _ in range(callers)
+        ]
+        while flights.stats()["calls"] < callers:
+            await asyncio.sleep(0.01)
+        gate.set()
+        return [result["tool_outputs"][0]["result"] for result in await asyncio.gather(*calls)]
+
+    return asyncio.run(run())
+
+def test_identical_concurrent_calls_run_once(coalesced):
+    gate, runs, flights = coalesced
+    results = _run_concurrently(flights, gate, 1, 5)
+
+    assert runs == [1]
+    assert all(result == {"plan": {"n": 1}, "foods": ["oats"]} for result in results)
+    # Every caller owns its copy: mutating one leaves the others intact.
+    assert len({id(result) for result in results}) == 5
+    results[0]["plan"]["n"] = 99
+    assert all(result["plan"]["n"] == 1 for result in results[1:])
+    assert flights.stats() == {
+        "calls": 5, "executions": 1, "shared": 4, "coalescing_ratio": 0.8, "in_flight": 0,
+    }
+
+def test_coalesced_exception_reaches_every_waiter(coalesced):
+    gate, runs, flights = coalesced
+    results = _run_concurrently(flights, gate, -1, 3)
+
+    assert runs == [-1]
+    assert all(result.startswith("Error executing tool: boom") for result in results)
+
+def test_caller_after_last_abandon_starts_fresh_call():
+    release = threading.Event()
+    pool = ToolPool(1, 0)
+    flights = SingleFlight()
+    pool.submit(release.wait, 10)
+    queued, _ = flights.submit("key", pool, lambda: "first")
+    assert flights.abandon("key", queued)
+    assert queued.cancelled()
+
+    fresh, shared = flights.submit("key", pool, lambda: "second")
+    release.set()
+    assert not shared and fresh.result(timeout=2) == "second"
@@ -0,0 +1,32 @@
+import sqlite3
+
+from src.vector_store import LocalVectorIndex
+
+def test_duplicate_ids_in_one_batch_keep_the_last_record(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    index.upsert(vectors=[
+        ("a", [1.0, 0.0], {"user_id": "u", "version": 1}),
+        ("b", [0.0, 1.0], {"user_id": "u"}),
+        ("a", [0.0, 1.0], {"user_id": "u", "version": 2}),
+    ])
+    assert index.describe_index_stats()["total_vector_count"] == 2
+    for filter in (None, {"user_id": "u"}, {"version": {"$gte": 0}}):
+        matches = index.query(vector=[1.0, 0.0], top_k=5, filter=filter, include_metadata=True).matches
+        ids = [m.id for m in matches]
+        assert sorted(set(ids)) == sorted(ids)
+        assert all(m.metadata.get("version") in (None, 2) for m in matches)
+    assert index.fetch(["a"]).vectors["a"].metadata["version"] == 2
+
+    reopened = LocalVectorIndex(str(tmp_path))
+    assert [m.id for m in reopened.query(vector=[1.0, 0.0], top_k=5).matches].count("a") == 1
+
+def test_query_skips_unused_rows(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    index.upsert(vectors=[(name, [1.0, float(i)], {"user_id": "u"}) for i, name in enumerate("abc")])
+    # A row left unused on disk, as older versions did for ids repeated in one batch.
+    with sqlite3.connect(str(tmp_path / "metadata.db")) as conn:
+        conn.execute("DELETE FROM vectors WHERE id = 'a'")
+    reopened = LocalVectorIndex(str(tmp_path))
+    for filter in (None, {"$or": [{"user_id": "u"}, {"user_id": {"$ne": "u"}}]}):
+        ids = [m.id for m in reopened.query(vector=[1.0, 0.0], top_k=5, filter=filter).matches]
+        assert sorted(ids) == ["b", "c"]
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.compliance import parse_profile
+from src.meal_planner import MEALS, SLOTS
+from src.plan_store import PLAN_STORE
+from src.weekly_plans import create_week, get_week, refresh_week, swap_week_meal
+
+def profile(restrictions: str = "none", preferences: str = "vegan") -> dict:
+    return {
+        "age": 30, "gender": "female", "height": "165cm", "weight": 60,
+        "preferences": preferences, "restrictions": restrictions, "goal": "maintenance",
+    }
+
+def allergen_meals(plan: dict, restrictions: str) -> list:
+    forbidden = parse_profile("", restrictions)["forbidden"]
+    return [
+        meal["name"] for day in plan["days"] for meal in day["meals"]
+        if forbidden & set(MEALS[meal["index"]]["contains"])
+    ]
+
+def test_create_week_avoids_allergens():
+    plan = create_week("week_peanut", profile("peanut allergy"), 7)
+    assert len(plan["days"]) == 7
+    assert allergen_meals(plan, "peanut allergy") == []
+
+def test_refresh_week_replaces_days_with_new_allergens():
+    before = create_week("week_refresh", profile(), 7)
+    unsafe = {day["day"] for day in before["days"] if any(
+        "peanuts" in MEALS[meal["index"]]["contains"] for meal in day["meals"]
+    )}
+    assert unsafe, "fixture should start with peanut meals"
+    after = refresh_week("week_refresh", profile("peanut allergy"))
+    assert allergen_meals(after, "peanut allergy") == []
+    assert set(after["regenerated_days"]) == unsafe
+    assert allergen_meals(get_week("week_refresh"), "peanut allergy") == []
+
+def test_swaps_never_bring_an_allergen_back():
+    create_week("week_swap", profile("soy allergy"), 3)
+    for slot in SLOTS:
+        try:
+            plan = swap_week_meal("week_swap", profile("soy allergy"), 2, slot)
+        except ValueError:
+            continue
+        assert allergen_meals(plan, "soy allergy") == []
+
+def test_get_week_repairs_a_stored_unsafe_plan():
+    create_week("week_stale", profile(), 7)
+    safe = create_week("week_stale_safe", profile("peanut allergy"), 7)
+    # A plan saved for a peanut allergy while its meals still held peanuts,
+    # as happened before meals carried allergen tags.
+    stored = PLAN_STORE.get("week_stale_safe")
+    PLAN_STORE.save("week_stale", stored["inputs"], 7, {})
+    assert allergen_meals(get_week("week_stale"), "peanut allergy") == []
+    assert get_week("week_stale_safe")["regenerated_days"] == []
+    assert safe["days"] == get_week("week_stale_safe")["days"]